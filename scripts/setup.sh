@@ -36,7 +36,16 @@ else
 fi
 sed -i "s|^geometadb_path\\s*=\\s*.*|geometadb_path=${geometadb_path}|" config.properties
 
-echo '4. Creating ~/.pubtrends-datasets directory'
+echo '4. Creating GEOmetadb indexes'
+uv run python -m src.db.geometadb_indexes --create --path "$geometadb_path"
+
+echo '5. Building the GEOmetadb search index'
+uv run python -m src.db.geometadb_search --create --path "$geometadb_path"
+
+echo '6. Building the GEOmetadb series index'
+uv run python -m src.db.gse_record_index --build --path "$geometadb_path" --index-path "${geometadb_path}.gseidx"
+
+echo '7. Creating ~/.pubtrends-datasets directory'
 mkdir -p ~/.pubtrends-datasets/logs
 echo 'Setup finished'
 echo 'Please copy the config.properties file to ~/.pubtrends-datasets before running the app'
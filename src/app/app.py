@@ -1,28 +1,214 @@
 """Flask application for GEOmetadb dataset queries."""
 
+import atexit
+import itertools
 import json
 import logging
+import math
 import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict
 
-import requests
+import httpx
 from flasgger import Swagger
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 
 from src.app.swagger_template import swagger_template
 from src.config.config import Config
+from src.db.async_cached_dataset_linker import AsyncCachedDatasetLinker
+from src.db.async_chained_dataset_linker import AsyncChainedDatasetLinker
+from src.db.async_chained_gse_loader import AsyncChainedGSELoader
+from src.db.async_elink_dataset_linker import AsyncELinkDatasetLinker
+from src.db.async_entrez_client import AsyncEntrezClient
+from src.db.async_esummary_gse_loader import AsyncESummaryGSELoader
+from src.db.async_europepmc_dataset_linker import AsyncEuropePMCDatasetLinker
+from src.db.async_ncbi_gse_loader import AsyncNCBIGSELoader
+from src.db.cached_dataset_linker import CachedDatasetLinker
+from src.db.cached_gse_loader import CachedGSELoader
 from src.db.chained_dataset_linker import ChainedDatasetLinker
 from src.db.elink_dataset_linker import ELinkDatasetLinker
+from src.db.entrez_client import EntrezClient
+from src.db.esummary_gse_loader import ESummaryGSELoader
 from src.db.europepmc_dataset_linker import EuropePMCDatasetLinker
+from src.db.geometadb_dataset_linker import GEOmetadbDatasetLinker
 from src.db.geometadb_gse_loader import GEOmetadbGSELoader
+from src.db.gse import normalize_fields
+from src.db.gse_negative_cache import GSENegativeCache
+from src.db.geometadb_indexes import check_indexes
+from src.db.geometadb_search import GEOmetadbSearch, SearchIndexMissingError, has_search_index
+from src.db.http_session import PooledHTTPSession
+from src.db.indexed_gse_loader import IndexedGSELoader
+from src.db.metrics import REGISTRY
 from src.db.ncbi_gse_loader import NCBIGSELoader
 from src.db.chained_gse_loader import ChainedGSELoader
+from src.db.chained_gsm_loader import ChainedGSMLoader
+from src.db.geometadb_gsm_loader import GEOmetadbGSMLoader
+from src.db.ncbi_gsm_loader import NCBIGSMLoader
+from src.db.offloaded_dataset_linker import OffloadedDatasetLinker
+from src.db.offloaded_gse_loader import OffloadedGSELoader
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
+from src.exception.geo_error import GEOError
 
 app = Flask(__name__)
 swagger = Swagger(app, template=swagger_template)
 CONFIG = Config(test=False)
 
-geometadb_gse_loader = GEOmetadbGSELoader(CONFIG)
+# Readers switch to a new GEOmetadb version once it is activated with `python -m src.db.geometadb_versions`
+geometadb_connections = ReadOnlySQLiteConnections(CONFIG.geometadb_path, CONFIG.geometadb_mmap_size,
+                                                  CONFIG.geometadb_cache_size, CONFIG.geometadb_swap_check_interval,
+                                                  CONFIG.geometadb_max_connections)
+atexit.register(geometadb_connections.close)
+# Series are read from the memory-mapped index, and from GEOmetadb if they aren't indexed
+indexed_gse_loader = IndexedGSELoader(GEOmetadbGSELoader(CONFIG, geometadb_connections), CONFIG.gse_index_path,
+                                      CONFIG.geometadb_path, CONFIG.gse_index_reload_interval,
+                                      CONFIG.gse_index_rebuild_threshold)
+geometadb_gse_loader = CachedGSELoader(indexed_gse_loader, CONFIG.gse_cache_max_bytes, CONFIG.gse_cache_ttl)
+# Indexes rebuilt by a sync or a version switch may have newer versions of the cached series
+indexed_gse_loader.reload_listeners.append(geometadb_gse_loader.clear)
+# NCBI rate limits apply per client, so all requests share the same limiter
+ncbi_rate_limiter = TokenBucketRateLimiter(CONFIG.ncbi_requests_per_second)
+# All requests share the HTTP connections to NCBI, EuropePMC and GEO
+http_session = PooledHTTPSession(CONFIG.http_pool_connections, CONFIG.http_pool_maxsize)
+atexit.register(http_session.close)
+
+elink_dataset_linker = CachedDatasetLinker(ELinkDatasetLinker(http_session, ncbi_rate_limiter, CONFIG.ncbi_api_key),
+                                           CONFIG.cache_path, CONFIG.link_cache_ttl, CONFIG.link_cache_negative_ttl)
+europepmc_dataset_linker = CachedDatasetLinker(
+    EuropePMCDatasetLinker(http_session, CONFIG.europepmc_max_concurrent_requests),
+    CONFIG.cache_path, CONFIG.link_cache_ttl, CONFIG.link_cache_negative_ttl)
+gse_negative_cache = GSENegativeCache(CONFIG.cache_path, {
+    GEOError.NOT_FOUND: CONFIG.gse_missing_ttl,
+    GEOError.EMPTY_RECORD: CONFIG.gse_missing_ttl,
+    GEOError.HTTP_ERROR: CONFIG.gse_error_ttl,
+})
+# The index is invalidated before the cache, so the cache never stores series read from an outdated index
+ncbi_gse_loader = NCBIGSELoader(http_session, CONFIG, ncbi_rate_limiter,
+                                save_listeners=[indexed_gse_loader.invalidate, geometadb_gse_loader.invalidate,
+                                                gse_negative_cache.clear],
+                                negative_cache=gse_negative_cache, write_behind=CONFIG.gse_write_behind)
+# Writes the series still queued for GEOmetadb on shutdown
+atexit.register(ncbi_gse_loader.close)
+
+geometadb_dataset_linker = GEOmetadbDatasetLinker(CONFIG, geometadb_connections)
+
+# Link papers with GEOmetadb first, and with the network linkers for the rest
+# (or for all papers, if complete linking is configured). The chains are told
+# apart by their names in the metrics.
+dataset_linker = ChainedDatasetLinker(
+    geometadb_dataset_linker,
+    ChainedDatasetLinker(elink_dataset_linker, europepmc_dataset_linker, name="network"),
+    complete=CONFIG.complete_dataset_linking,
+    name="all",
+)
+# Queries for the fields that ESummary provides load missing series in batches
+esummary_gse_loader = ESummaryGSELoader(EntrezClient(http_session, ncbi_rate_limiter, CONFIG.ncbi_api_key))
+
+# Load the GSE objects using a chain: GEOmetadb first, then NCBI for missing ones
+gse_loader = ChainedGSELoader(geometadb_gse_loader, esummary_gse_loader, ncbi_gse_loader)
+
+# Keyword search over the series in GEOmetadb, needs the full-text search index
+geometadb_search = GEOmetadbSearch(CONFIG, geometadb_connections)
+
+# Samples are read page by page from GEOmetadb, series missing there are downloaded from NCBI
+gsm_loader = ChainedGSMLoader(GEOmetadbGSMLoader(CONFIG, geometadb_connections),
+                              NCBIGSMLoader(http_session, CONFIG, ncbi_rate_limiter))
+
+# The blocking GEOmetadb and cache calls of the async pipeline run in a long-lived thread pool
+async_offload_executor = ThreadPoolExecutor(max_workers=CONFIG.async_offload_workers,
+                                            thread_name_prefix="async-offload")
+atexit.register(async_offload_executor.shutdown, cancel_futures=True)
+
+
+def async_pipeline(http_client):
+    """
+    Builds the async counterparts of `dataset_linker` and `gse_loader`. They
+    send their requests to NCBI and EuropePMC with the given client, and
+    share the caches, the rate limiter and the GEOmetadb writes of the
+    blocking pipeline.
+
+    :param http_client: Client of the event loop that runs the pipeline.
+    :return: Async dataset linker and async GSE loader.
+    """
+    linker = AsyncChainedDatasetLinker(
+        OffloadedDatasetLinker(geometadb_dataset_linker, async_offload_executor),
+        AsyncChainedDatasetLinker(
+            AsyncCachedDatasetLinker(elink_dataset_linker, AsyncELinkDatasetLinker(
+                http_client, ncbi_rate_limiter, CONFIG.ncbi_api_key), async_offload_executor),
+            AsyncCachedDatasetLinker(europepmc_dataset_linker, AsyncEuropePMCDatasetLinker(
+                http_client, CONFIG.europepmc_max_concurrent_requests), async_offload_executor),
+            name="network",
+        ),
+        complete=CONFIG.complete_dataset_linking,
+        name="all",
+    )
+    loader = AsyncChainedGSELoader(
+        OffloadedGSELoader(geometadb_gse_loader, async_offload_executor),
+        AsyncESummaryGSELoader(AsyncEntrezClient(http_client, ncbi_rate_limiter, CONFIG.ncbi_api_key)),
+        AsyncNCBIGSELoader(ncbi_gse_loader, http_client, async_offload_executor),
+    )
+    return linker, loader
+
+
+# Linkers and loaders record their own metrics, the caches, the write queue
+# and the connection pool are read when /metrics is scraped
+CACHES = {
+    "gse": geometadb_gse_loader,
+    "gse_index": indexed_gse_loader,
+    "elink": elink_dataset_linker,
+    "europepmc": europepmc_dataset_linker,
+}
+
+
+def cache_requests():
+    values = {}
+    for name, cache in CACHES.items():
+        stats = cache.stats()
+        values[(name, "hit")] = stats["hits"]
+        values[(name, "miss")] = stats["misses"]
+    return values
+
+
+def cache_hit_ratios():
+    ratios = {}
+    for name, cache in CACHES.items():
+        stats = cache.stats()
+        lookups = stats["hits"] + stats["misses"]
+        ratios[(name,)] = stats["hits"] / lookups if lookups else math.nan
+    return ratios
+
+
+def write_queue_stat(key):
+    queue = ncbi_gse_loader.write_queue
+    return lambda: {(): queue.stats()[key]} if queue is not None else {}
+
+
+def http_connection_stat(key):
+    return lambda: {(host,): stats[key] for host, stats in http_session.connection_stats().items()}
+
+
+REGISTRY.callback('pubtrends_datasets_cache_requests_total',
+                  'Series or papers looked up in the caches, by cache and result.',
+                  'counter', ['cache', 'result'], cache_requests)
+REGISTRY.callback('pubtrends_datasets_cache_hit_ratio',
+                  'Fraction of the lookups in the caches that were hits since the start.',
+                  'gauge', ['cache'], cache_hit_ratios)
+REGISTRY.callback('pubtrends_datasets_gse_write_queue_depth',
+                  'Series waiting to be written to GEOmetadb.', 'gauge', [], write_queue_stat('depth'))
+REGISTRY.callback('pubtrends_datasets_gse_write_queue_written_total',
+                  'Series written to GEOmetadb by the write-behind queue.',
+                  'counter', [], write_queue_stat('items_written'))
+REGISTRY.callback('pubtrends_datasets_http_requests_total',
+                  'Requests sent to the upstream services, by host.',
+                  'counter', ['host'], http_connection_stat('requests'))
+REGISTRY.callback('pubtrends_datasets_http_connections_total',
+                  'Connections opened to the upstream services, by host.',
+                  'counter', ['host'], http_connection_stat('connections'))
+REQUEST_DURATION = REGISTRY.histogram('pubtrends_datasets_request_duration_seconds',
+                                      'Time spent handling requests until the response starts, by route and status.',
+                                      ['route', 'status'])
 
 # Deployment and development
 LOG_PATHS = ['/logs', os.path.expanduser('~/.pubtrends-datasets/logs')]
@@ -41,11 +227,83 @@ logging.basicConfig(filename=logfile,
 
 logger = app.logger
 
+if CONFIG.geometadb_index_check != 'off':
+    strict_index_check = CONFIG.geometadb_index_check == 'strict'
+    try:
+        with geometadb_connections.reader() as geometadb_conn:
+            check_indexes(geometadb_conn, strict=strict_index_check)
+    except sqlite3.Error:
+        if strict_index_check:
+            raise
+        logger.exception('Failed to check GEOmetadb indexes')
+    try:
+        with geometadb_connections.reader() as geometadb_conn:
+            if not has_search_index(geometadb_conn):
+                logger.error('GEOmetadb has no search index, /datasets/search is unavailable. '
+                             'Run `python -m src.db.geometadb_search --create` to build it.')
+    except sqlite3.Error:
+        logger.exception('Failed to check the GEOmetadb search index')
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_duration(response):
+    # Unmatched paths are grouped, so that arbitrary URLs can't create new time series
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    started = g.get('request_started')
+    if started is not None:
+        REQUEST_DURATION.observe(time.perf_counter() - started, route=route, status=str(response.status_code))
+    return response
+
 
 def log_request(r):
     return f'addr:{r.remote_addr} args:{json.dumps(r.args)}'
 
 
+def parse_pubmed_ids(r):
+    """
+    Parses the comma-separated `pubmed_ids` query parameter.
+
+    :return: PubMed IDs and None, or None and the error response.
+    """
+    pubmed_ids_param = r.args.get('pubmed_ids', '')
+
+    if not pubmed_ids_param:
+        logger.error(f'{r.path} error {log_request(r)}')
+        return None, (jsonify({"error": "pubmed_ids parameter is required"}), 400)
+
+    pubmed_ids = [pid.strip() for pid in pubmed_ids_param.split(',') if pid.strip()]
+
+    if not pubmed_ids:
+        return None, (jsonify({"error": "At least one valid PubMed ID is required"}), 400)
+    return pubmed_ids, None
+
+
+def parse_fields(r):
+    """
+    Parses the optional comma-separated `fields` query parameter.
+
+    :return: Normalized field names (None for all fields) and None, or None and the error response.
+    """
+    fields_param = r.args.get('fields', '')
+    if not fields_param:
+        return None, None
+    try:
+        return normalize_fields(f.strip() for f in fields_param.split(',') if f.strip()), None
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+
+
+def serialize_gse(gse, fields):
+    if fields is None:
+        return asdict(gse)
+    return {name: getattr(gse, name) for name in fields}
+
+
 @app.route('/datasets', methods=['GET'])
 def get_datasets():
     """
@@ -62,6 +320,27 @@ def get_datasets():
         required: true
         description: Comma-separated list of PubMed IDs (e.g., "30530648,31018141")
         example: "30530648,31018141"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: |
+          Comma-separated list of GSE fields to return (e.g., "gse,title,pubmed_id").
+          The gse field is always returned. All fields are returned if omitted.
+        example: "gse,title,pubmed_id"
+      - name: format
+        in: query
+        type: string
+        required: false
+        enum: [json, ndjson]
+        default: json
+        description: |
+          Response format. `ndjson` streams one GSE object per line as soon as it is loaded:
+          series from GEOmetadb first, then series downloaded from NCBI as each download completes.
+          If loading fails midway, the last line is an object with an `error` field.
+    produces:
+      - application/json
+      - application/x-ndjson
     responses:
       200:
         description: Successful response with list of GSE datasets
@@ -92,43 +371,445 @@ def get_datasets():
             error: "pubmed_ids parameter is required"
     """
     logger.info(f'/datasets {log_request(request)}')
-    pubmed_ids_param = request.args.get('pubmed_ids', '')
+    pubmed_ids, error = parse_pubmed_ids(request)
+    if error:
+        return error
+    fields, error = parse_fields(request)
+    if error:
+        return error
 
-    if not pubmed_ids_param:
-        logger.error(f'/datasets error {log_request(request)}')
-        return jsonify({"error": "pubmed_ids parameter is required"}), 400
+    response_format = request.args.get('format', 'json')
+    if response_format not in ('json', 'ndjson'):
+        return jsonify({"error": "format must be json or ndjson"}), 400
 
-    pubmed_ids = [pid.strip() for pid in pubmed_ids_param.split(',') if pid.strip()]
+    try:
+        gse_accessions = dataset_linker.link_to_datasets(pubmed_ids)
+        gse_accessions = list(filter(lambda acc: acc.startswith("GSE"), gse_accessions))
+
+        if response_format == 'ndjson':
+            return Response(stream_with_context(stream_gses(gse_accessions, fields)), mimetype='application/x-ndjson')
+
+        if not gse_accessions:
+            return jsonify([])
+
+        gse_objects = gse_loader.load_gses(gse_accessions, fields)
+
+        result = [serialize_gse(gse, fields) for gse in gse_objects]
+
+        return jsonify(result)
 
+    except Exception as e:
+        logger.exception(f'/datasets exception {e}')
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/datasets', methods=['POST'])
+def post_datasets():
+    """
+    POST endpoint to retrieve GSE objects for many PubMed IDs, grouped by PubMed ID.
+    ---
+    summary: Get GSE datasets associated with each of many PubMed IDs
+    description: |
+      Retrieves the Gene Expression Omnibus Series (GSE) datasets linked to each of the PubMed IDs
+      provided in the JSON body. Every series is loaded once, even if several papers are linked to it.
+    consumes:
+      - application/json
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          required:
+            - pubmed_ids
+          properties:
+            pubmed_ids:
+              type: array
+              items:
+                type: string
+              example: ["30530648", "31018141"]
+            fields:
+              type: array
+              items:
+                type: string
+              description: GSE fields to return. The gse field is always returned. All fields if omitted.
+              example: ["gse", "title", "pubmed_id"]
+    responses:
+      200:
+        description: Object that maps every PubMed ID to the list of its GSE datasets
+        schema:
+          type: object
+          additionalProperties:
+            type: array
+            items:
+              $ref: '#/definitions/GSE'
+        examples:
+          application/json:
+            "30530648":
+              - gse: "GSE12345"
+                title: "Gene expression analysis"
+                pubmed_id: 30530648
+            "31018141": []
+      400:
+        description: Bad request - missing or invalid PubMed IDs or fields
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "pubmed_ids must be a non-empty list"
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({"error": "JSON object body is required"}), 400
+    pubmed_ids = body.get('pubmed_ids')
+    if not isinstance(pubmed_ids, list) or not all(isinstance(pid, (str, int)) for pid in pubmed_ids):
+        return jsonify({"error": "pubmed_ids must be a non-empty list"}), 400
+    pubmed_ids = list(dict.fromkeys(str(pid).strip() for pid in pubmed_ids if str(pid).strip()))
     if not pubmed_ids:
-        return jsonify({"error": "At least one valid PubMed ID is required"}), 400
+        return jsonify({"error": "pubmed_ids must be a non-empty list"}), 400
+    if len(pubmed_ids) > CONFIG.max_bulk_pubmed_ids:
+        return jsonify({"error": f"At most {CONFIG.max_bulk_pubmed_ids} PubMed IDs are allowed"}), 400
+    logger.info(f'POST /datasets addr:{request.remote_addr} pubmed_ids:{len(pubmed_ids)}')
+
+    fields = body.get('fields')
+    if fields is not None:
+        if not isinstance(fields, list) or not all(isinstance(f, str) for f in fields):
+            return jsonify({"error": "fields must be a list of field names"}), 400
+        try:
+            fields = normalize_fields(fields)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
     try:
-        with requests.Session() as http_session:
-            europepmc_dataset_linker = EuropePMCDatasetLinker(http_session)
-            elink_dataset_linker = ELinkDatasetLinker(http_session)
-            dataset_linker = ChainedDatasetLinker(elink_dataset_linker, europepmc_dataset_linker)
-            gse_accessions = dataset_linker.link_to_datasets(pubmed_ids)
-            gse_accessions = list(filter(lambda acc: acc.startswith("GSE"), gse_accessions))
+        accessions_by_paper = dataset_linker.link_to_datasets_by_paper(pubmed_ids)
+        accessions_by_paper = {pubmed_id: [acc for acc in accessions_by_paper.get(pubmed_id, [])
+                                           if acc.startswith("GSE")]
+                               for pubmed_id in pubmed_ids}
 
-            if not gse_accessions:
-                return jsonify([])
+        # Every series is loaded and serialized once, however many papers it is linked to
+        gse_accessions = list(dict.fromkeys(acc for accessions in accessions_by_paper.values()
+                                            for acc in accessions))
+        gses = {gse.gse: serialize_gse(gse, fields) for gse in gse_loader.load_gses(gse_accessions, fields)} \
+            if gse_accessions else {}
 
-            # Load the GSE objects using a chain: GEOmetadb first, then NCBI for missing ones
-            chained_loader = ChainedGSELoader(
-                geometadb_gse_loader,
-                NCBIGSELoader(http_session, CONFIG)
-            )
-            gse_objects = chained_loader.load_gses(gse_accessions)
+        return jsonify({pubmed_id: [gses[acc] for acc in accessions if acc in gses]
+                        for pubmed_id, accessions in accessions_by_paper.items()})
 
-            result = [asdict(gse) for gse in gse_objects]
+    except Exception as e:
+        logger.exception(f'POST /datasets exception {e}')
+        return jsonify({"error": str(e)}), 500
 
-            return jsonify(result)
 
+def stream_gses(gse_accessions, fields):
+    """
+    Yields the GSE objects as NDJSON lines as soon as they are loaded. The
+    status code has already been sent when loading fails, so the error is
+    reported as the last line instead.
+    """
+    try:
+        for gse in gse_loader.iter_gses(gse_accessions, fields):
+            yield json.dumps(serialize_gse(gse, fields)) + '\n'
     except Exception as e:
-        logger.exception(f'/datasets exception {e}')
+        logger.exception(f'/datasets stream exception {e}')
+        yield json.dumps({"error": str(e)}) + '\n'
+
+
+def parse_limit(r, default, maximum):
+    """
+    Parses the optional `limit` query parameter.
+
+    :return: Limit and None, or None and the error response.
+    """
+    try:
+        limit = int(r.args.get('limit', default))
+    except ValueError:
+        return None, (jsonify({"error": "limit parameter must be an integer"}), 400)
+    if not 1 <= limit <= maximum:
+        return None, (jsonify({"error": f"limit parameter must be between 1 and {maximum}"}), 400)
+    return limit, None
+
+
+@app.route('/datasets/search', methods=['GET'])
+def search_datasets():
+    """
+    GET endpoint to find GSE objects by keywords.
+    ---
+    summary: Search GSE datasets by keywords
+    description: |
+      Finds Gene Expression Omnibus Series (GSE) datasets whose title, summary or overall design contains
+      all words of the query. The datasets are ranked by BM25, with matches in the title ranked highest.
+    parameters:
+      - name: q
+        in: query
+        type: string
+        required: true
+        description: Keywords to search for
+        example: "human microglia"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of datasets to return, 20 by default
+        example: 20
+      - name: offset
+        in: query
+        type: integer
+        required: false
+        description: Number of best ranked datasets to skip
+        example: 0
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: |
+          Comma-separated list of GSE fields to return (e.g., "gse,title,pubmed_id").
+          The gse field is always returned. All fields are returned if omitted.
+        example: "gse,title"
+    responses:
+      200:
+        description: Matching GSE datasets, best ranked first
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/GSE'
+      400:
+        description: Bad request - missing query or invalid parameters
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "The search query must contain at least one word"
+      503:
+        description: GEOmetadb has no search index
+    """
+    logger.info(f'/datasets/search {log_request(request)}')
+    limit, error = parse_limit(request, CONFIG.search_page_size, CONFIG.max_search_page_size)
+    if error:
+        return error
+    fields, error = parse_fields(request)
+    if error:
+        return error
+    try:
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return jsonify({"error": "offset parameter must be an integer"}), 400
+
+    try:
+        gse_accessions = geometadb_search.search(request.args.get('q', ''), limit, offset)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SearchIndexMissingError as e:
+        logger.error(f'/datasets/search error {e}')
+        return jsonify({"error": str(e)}), 503
+
+    try:
+        # Every indexed series is in GEOmetadb, and the loader returns them in the order of the accessions
+        gses = geometadb_gse_loader.load_gses(gse_accessions, fields) if gse_accessions else []
+        return jsonify([serialize_gse(gse, fields) for gse in gses])
+    except Exception as e:
+        logger.exception(f'/datasets/search exception {e}')
         return jsonify({"error": str(e)}), 500
 
 
+def stream_samples(gsms, limit):
+    """
+    Yields a JSON document with a page of the samples, one sample at a time.
+    One more sample than the limit is passed to find out whether there is a
+    next page. The status code has already been sent when loading fails, so
+    the error is reported in the document instead.
+    """
+    yield '{"samples": ['
+    last = None
+    count = 0
+    try:
+        for gsm in gsms:
+            count += 1
+            if count > limit:
+                break
+            yield (', ' if last else '') + json.dumps(asdict(gsm))
+            last = gsm.gsm
+    except Exception as e:
+        logger.exception(f'/samples stream exception {e}')
+        yield '], "next": null, "error": ' + json.dumps(str(e)) + '}'
+        return
+    yield '], "next": ' + json.dumps(last if count > limit else None) + '}'
+
+
+@app.route('/samples', methods=['GET'])
+def get_samples():
+    """
+    GET endpoint to retrieve the samples of a GEO series page by page.
+    ---
+    summary: Get GSM samples of a GSE dataset
+    description: |
+      Returns the samples of a Gene Expression Omnibus Series (GSE) ordered by their accessions.
+      The response is streamed, so large series don't have to be held in memory. Pass the `next`
+      cursor of a response as the `after` parameter to get the following page.
+    parameters:
+      - name: gse
+        in: query
+        type: string
+        required: true
+        description: Accession number of the series
+        example: "GSE116672"
+      - name: after
+        in: query
+        type: string
+        required: false
+        description: Cursor of the page, the `next` value of the previous response
+        example: "GSM3245112"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: Maximum number of samples to return, 1000 by default
+        example: 100
+    responses:
+      200:
+        description: Page of samples and the cursor of the next page, null on the last page
+        schema:
+          type: object
+          properties:
+            samples:
+              type: array
+              items:
+                $ref: '#/definitions/GSM'
+            next:
+              type: string
+              example: "GSM3245112"
+      400:
+        description: Bad request - missing or invalid parameters
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "gse parameter must be a GSE accession"
+      404:
+        description: The series has no samples in GEOmetadb or GEO
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "GEO series GSE0 not found"
+    """
+    logger.info(f'/samples {log_request(request)}')
+    gse_accession = request.args.get('gse', '').strip()
+    if not gse_accession.startswith('GSE'):
+        return jsonify({"error": "gse parameter must be a GSE accession"}), 400
+    limit, error = parse_limit(request, CONFIG.samples_page_size, CONFIG.max_samples_page_size)
+    if error:
+        return error
+    after = request.args.get('after') or None
+
+    # The first sample is loaded before the response starts, so that an unknown series gets its own status code
+    try:
+        gsms = iter(gsm_loader.iter_gsms(gse_accession, after, limit + 1))
+        first = next(gsms, None)
+        # A cursor past the last sample gives an empty page of an existing series
+        if first is None and (after is None or next(iter(gsm_loader.iter_gsms(gse_accession, None, 1)), None) is None):
+            return jsonify({"error": f"GEO series {gse_accession} not found"}), 404
+    except Exception as e:
+        if isinstance(e, GEOError) and e.reason == GEOError.NOT_FOUND:
+            return jsonify({"error": f"GEO series {gse_accession} not found"}), 404
+        logger.exception(f'/samples exception {e}')
+        return jsonify({"error": str(e)}), 500
+
+    samples = itertools.chain([first], gsms) if first is not None else gsms
+    return Response(stream_with_context(stream_samples(samples, limit)), mimetype='application/json')
+
+
+async def load_datasets_async(pubmed_ids, fields):
+    # Flask runs every async view in its own event loop, and connections can't be shared between loops
+    async with httpx.AsyncClient(timeout=None) as http_client:
+        async_dataset_linker, async_gse_loader = async_pipeline(http_client)
+        gse_accessions = await async_dataset_linker.link_to_datasets(pubmed_ids)
+        gse_accessions = [acc for acc in gse_accessions if acc.startswith("GSE")]
+        if not gse_accessions:
+            return []
+        return await async_gse_loader.load_gses(gse_accessions, fields)
+
+
+@app.route('/datasets/async', methods=['GET'])
+async def get_datasets_async():
+    """
+    GET endpoint to retrieve GSE objects by PubMed IDs using the async pipeline.
+    ---
+    summary: Get GSE datasets associated with PubMed IDs (async pipeline)
+    description: |
+      Same as /datasets, but served by an async view: requests to ELink, ESummary, EuropePMC and
+      NCBI are sent with an async HTTP client, the linkers are awaited concurrently and every
+      missing series is downloaded from NCBI as a separate task. GEOmetadb is read in a thread pool.
+    parameters:
+      - name: pubmed_ids
+        in: query
+        type: string
+        required: true
+        description: Comma-separated list of PubMed IDs (e.g., "30530648,31018141")
+        example: "30530648,31018141"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: |
+          Comma-separated list of GSE fields to return (e.g., "gse,title,pubmed_id").
+          The gse field is always returned. All fields are returned if omitted.
+        example: "gse,title,pubmed_id"
+    responses:
+      200:
+        description: Successful response with list of GSE datasets
+        schema:
+          type: array
+          items:
+            $ref: '#/definitions/GSE'
+      400:
+        description: Bad request - missing or invalid PubMed IDs
+        schema:
+          type: object
+          properties:
+            error:
+              type: string
+              example: "pubmed_ids parameter is required"
+    """
+    logger.info(f'/datasets/async {log_request(request)}')
+    pubmed_ids, error = parse_pubmed_ids(request)
+    if error:
+        return error
+    fields, error = parse_fields(request)
+    if error:
+        return error
+
+    try:
+        gse_objects = await load_datasets_async(pubmed_ids, fields)
+        return jsonify([serialize_gse(gse, fields) for gse in gse_objects])
+    except Exception as e:
+        logger.exception(f'/datasets/async exception {e}')
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    GET endpoint to scrape the metrics of the service.
+    ---
+    summary: Get the metrics of the service in the Prometheus text format
+    description: |
+      Latency histograms of the requests and of every paper dataset linker and GSE loader,
+      exceptions raised by them by type (e.g. EntrezError, EuropePMCError, GEOError),
+      numbers of datasets linked and series loaded by each of them, cache hit ratios,
+      and counters of the write-behind queue and the upstream HTTP connections.
+      Each worker process reports its own metrics.
+    produces:
+      - text/plain
+    responses:
+      200:
+        description: Metrics in the Prometheus text exposition format 0.0.4
+    """
+    return Response(REGISTRY.render(), content_type=REGISTRY.CONTENT_TYPE)
+
+
 if __name__ == '__main__':
     app.run(debug=True)
@@ -89,6 +89,41 @@ swagger_template = {
                     "example": "ftp://ftp.ncbi.nlm.nih.gov/geo/series/GSE12nnn/GSE12345/suppl/"
                 }
             }
+        },
+        "GSM": {
+            "type": "object",
+            "properties": {
+                "gsm": {
+                    "type": "string",
+                    "description": "GSM accession number",
+                    "example": "GSM123"
+                },
+                "title": {
+                    "type": "string",
+                    "description": "Title of the sample",
+                    "example": "Control replicate 1"
+                },
+                "series_id": {
+                    "type": "string",
+                    "description": "Comma-separated accessions of the series that contain the sample",
+                    "example": "GSE12345"
+                },
+                "gpl": {
+                    "type": "string",
+                    "description": "Accession number of the platform",
+                    "example": "GPL570"
+                },
+                "organism_ch1": {
+                    "type": "string",
+                    "description": "Organism of the first channel",
+                    "example": "Homo sapiens"
+                },
+                "characteristics_ch1": {
+                    "type": "string",
+                    "description": "Characteristics of the first channel",
+                    "example": "tissue: liver"
+                }
+            }
         }
     }
 }
\ No newline at end of file
@@ -0,0 +1,366 @@
+"""
+Measures the linkers and loaders one by one, and the /datasets endpoint end
+to end, against the local stand-in of NCBI, EuropePMC and GEO in
+`mock_upstream`, and writes the results as JSON::
+
+    python -m src.benchmark.datasets --latency 0.05 --jitter 0.05 --output baseline.json
+    python -m src.benchmark.datasets --latency 0.05 --jitter 0.05 --output new.json --compare baseline.json
+
+Every request asks for papers that weren't asked for before, so the caches
+and GEOmetadb never already hold the answer and every request reaches the
+upstream services. The components write to a copy of the test GEOmetadb and
+a cache in a temporary directory. The end-to-end benchmark goes through the
+Flask app with its linkers and loaders replaced by the same components, so
+the configuration of the app must be readable.
+
+The latency, jitter, error rate and rate limit apply to all services,
+`--profiles` overrides them per service, e.g. '{"geo": {"latency": 0.3}}'.
+"""
+
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional
+
+from src.benchmark.mock_upstream import SERVICES, MockUpstream, UpstreamProfile, point_components_at
+from src.config.config import Config
+from src.db.cached_dataset_linker import CachedDatasetLinker
+from src.db.cached_gse_loader import CachedGSELoader
+from src.db.chained_dataset_linker import ChainedDatasetLinker
+from src.db.chained_gse_loader import ChainedGSELoader
+from src.db.elink_dataset_linker import ELinkDatasetLinker
+from src.db.entrez_client import EntrezClient
+from src.db.esummary_gse_loader import ESummaryGSELoader
+from src.db.europepmc_dataset_linker import EuropePMCDatasetLinker
+from src.db.geometadb_dataset_linker import GEOmetadbDatasetLinker
+from src.db.geometadb_gse_loader import GEOmetadbGSELoader
+from src.db.gse_loader import GSELoader
+from src.db.gse_negative_cache import GSENegativeCache
+from src.db.gse_record_index import build_gse_record_index
+from src.db.http_session import PooledHTTPSession
+from src.db.indexed_gse_loader import IndexedGSELoader
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.ncbi_gsm_loader import NCBIGSMLoader
+from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.exception.geo_error import GEOError
+
+# Fields that ESummary provides, so that ESummaryGSELoader is measured instead of the downloads
+ESUMMARY_FIELDS = ["gse", "title", "pubmed_id"]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    :param sorted_values: Values in ascending order.
+    :param fraction: Fraction of the values that are at most the percentile, e.g. 0.99.
+    :return: Nearest-rank percentile of the values, 0 if there are none.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(fraction * len(sorted_values)), 1) - 1]
+
+
+def summarize(latencies: List[float], errors: int, results: int, elapsed: float) -> Dict[str, float]:
+    """
+    :param latencies: Durations of the successful calls in seconds.
+    :param errors: Number of calls that raised an exception.
+    :param results: Number of items returned by the successful calls.
+    :param elapsed: Wall-clock duration of the benchmark in seconds.
+    :return: Throughput and latency percentiles in milliseconds.
+    """
+    latencies = sorted(latencies)
+    calls = len(latencies) + errors
+    return {
+        "calls": calls,
+        "errors": errors,
+        "results": results,
+        "throughput_per_second": calls / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": latencies[-1] * 1000 if latencies else 0.0,
+    }
+
+
+def measure(call: Callable[[int], int], calls: int, concurrency: int) -> Dict[str, float]:
+    """
+    Runs the calls on `concurrency` threads and measures each of them.
+
+    :param call: Function of the number of the call that returns the number of its results.
+    :param calls: Number of calls.
+    :param concurrency: Number of calls running at the same time.
+    :return: Summary of the calls, see `summarize`.
+    """
+    latencies: List[float] = []
+    counts = {"errors": 0, "results": 0}
+    lock = threading.Lock()
+
+    def timed(number: int) -> None:
+        start = time.perf_counter()
+        try:
+            results = call(number)
+        except Exception:
+            with lock:
+                counts["errors"] += 1
+            return
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            counts["results"] += results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="benchmark") as executor:
+        list(executor.map(timed, range(calls)))
+    return summarize(latencies, counts["errors"], counts["results"], time.perf_counter() - start)
+
+
+class PaperIds:
+    """
+    Hands out PubMed IDs that weren't used before, so that every call misses the caches.
+    """
+
+    def __init__(self) -> None:
+        self._next = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def take(self, count: int) -> List[str]:
+        with self._lock:
+            return [str(next(self._next)) for _ in range(count)]
+
+
+def series_of(upstream: MockUpstream, pubmed_ids: List[str]) -> List[str]:
+    return [f"GSE{number}" for pubmed_id in pubmed_ids for number in upstream.series_of(pubmed_id)]
+
+
+@contextmanager
+def serving(dataset_linker: PaperDatasetLinker, gse_loader: GSELoader) -> Iterator:
+    """
+    Provides a test client of the Flask app that serves /datasets with the given components.
+    """
+    import src.app.app as datasets_app
+    originals = datasets_app.dataset_linker, datasets_app.gse_loader
+    datasets_app.dataset_linker, datasets_app.gse_loader = dataset_linker, gse_loader
+    try:
+        yield datasets_app.app.test_client()
+    finally:
+        datasets_app.dataset_linker, datasets_app.gse_loader = originals
+
+
+def run_benchmarks(config: Config, upstream: MockUpstream, args: argparse.Namespace) -> Dict[str, Dict]:
+    """
+    Runs the micro-benchmarks of the linkers and loaders and the end-to-end benchmark.
+
+    :return: Summaries of the benchmarks by name.
+    """
+    papers = PaperIds()
+    rate_limiter = TokenBucketRateLimiter(config.ncbi_requests_per_second)
+    results: Dict[str, Dict] = {}
+    with PooledHTTPSession(config.http_pool_connections, config.http_pool_maxsize) as session:
+        elink = ELinkDatasetLinker(session, rate_limiter)
+        europepmc = EuropePMCDatasetLinker(session, config.europepmc_max_concurrent_requests)
+        geometadb_linker = GEOmetadbDatasetLinker(config)
+        esummary = ESummaryGSELoader(EntrezClient(session, rate_limiter))
+        ncbi = NCBIGSELoader(session, config, rate_limiter)
+        geometadb_loader = GEOmetadbGSELoader(config)
+        ncbi_gsm = NCBIGSMLoader(session, config, rate_limiter)
+        # Series downloaded by the NCBI benchmark, which the GEOmetadb benchmark loads again
+        downloaded: List[List[str]] = []
+
+        def download(_: int) -> int:
+            accessions = series_of(upstream, papers.take(args.papers))
+            downloaded.append(accessions)
+            return len(ncbi.load_gses(accessions))
+
+        micro: Dict[str, Callable[[int], int]] = {
+            "ELinkDatasetLinker.link_to_datasets_by_paper":
+                lambda _: sum(map(len, elink.link_to_datasets_by_paper(papers.take(args.papers)).values())),
+            "EuropePMCDatasetLinker.link_to_datasets_by_paper":
+                lambda _: sum(map(len, europepmc.link_to_datasets_by_paper(papers.take(args.papers)).values())),
+            "GEOmetadbDatasetLinker.link_to_datasets_by_paper":
+                lambda _: sum(map(len, geometadb_linker.link_to_datasets_by_paper(papers.take(args.papers)).values())),
+            "ESummaryGSELoader.load_gses":
+                lambda _: len(esummary.load_gses(series_of(upstream, papers.take(args.papers)), ESUMMARY_FIELDS)),
+            "NCBIGSELoader.load_gses": download,
+            "GEOmetadbGSELoader.load_gses":
+                lambda number: len(geometadb_loader.load_gses(downloaded[number % len(downloaded)])),
+            "NCBIGSMLoader.download_gsms":
+                lambda _: len(ncbi_gsm.download_gsms(series_of(upstream, papers.take(1))[0])),
+        }
+        for name, call in micro.items():
+            if args.only and not any(pattern in name for pattern in args.only):
+                continue
+            if name == "GEOmetadbGSELoader.load_gses" and not downloaded:
+                continue
+            results[name] = measure(call, args.calls, 1)
+            print(f"{name}: {_format_summary(results[name])}")
+
+        if not args.only or any(pattern in "/datasets" for pattern in args.only):
+            results["/datasets"] = benchmark_datasets(config, session, rate_limiter, upstream, papers, args)
+            print(f"/datasets: {_format_summary(results['/datasets'])}")
+        ncbi.close()
+    return results
+
+
+def benchmark_datasets(config: Config, session: PooledHTTPSession, rate_limiter: TokenBucketRateLimiter,
+                       upstream: MockUpstream, papers: PaperIds, args: argparse.Namespace) -> Dict[str, float]:
+    """
+    Measures concurrent GET /datasets requests served by the same chain of
+    linkers and loaders as the app, reading series from an index of the
+    GEOmetadb copy.
+    """
+    build_gse_record_index(config.geometadb_path, config.gse_index_path)
+    indexed_gse_loader = IndexedGSELoader(GEOmetadbGSELoader(config), config.gse_index_path, config.geometadb_path,
+                                          config.gse_index_reload_interval, config.gse_index_rebuild_threshold)
+    cached_gse_loader = CachedGSELoader(indexed_gse_loader, config.gse_cache_max_bytes, config.gse_cache_ttl)
+    indexed_gse_loader.reload_listeners.append(cached_gse_loader.clear)
+    negative_cache = GSENegativeCache(config.cache_path, {
+        GEOError.NOT_FOUND: config.gse_missing_ttl,
+        GEOError.EMPTY_RECORD: config.gse_missing_ttl,
+        GEOError.HTTP_ERROR: config.gse_error_ttl,
+    })
+    ncbi = NCBIGSELoader(session, config, rate_limiter,
+                         save_listeners=[indexed_gse_loader.invalidate, cached_gse_loader.invalidate,
+                                         negative_cache.clear],
+                         negative_cache=negative_cache, write_behind=config.gse_write_behind)
+    dataset_linker = ChainedDatasetLinker(
+        GEOmetadbDatasetLinker(config),
+        ChainedDatasetLinker(
+            CachedDatasetLinker(ELinkDatasetLinker(session, rate_limiter), config.cache_path,
+                                config.link_cache_ttl, config.link_cache_negative_ttl),
+            CachedDatasetLinker(EuropePMCDatasetLinker(session, config.europepmc_max_concurrent_requests),
+                                config.cache_path, config.link_cache_ttl, config.link_cache_negative_ttl),
+            name="network",
+        ),
+        complete=config.complete_dataset_linking,
+        name="all",
+    )
+    gse_loader = ChainedGSELoader(cached_gse_loader, ESummaryGSELoader(EntrezClient(session, rate_limiter)), ncbi)
+    query = {"fields": ",".join(args.fields)} if args.fields else {}
+
+    def request(_: int) -> int:
+        response = client.get("/datasets", query_string={"pubmed_ids": ",".join(papers.take(args.papers)), **query})
+        if response.status_code != 200:
+            raise RuntimeError(f"/datasets status {response.status_code}")
+        return len(response.get_json())
+
+    try:
+        with serving(dataset_linker, gse_loader) as client:
+            return measure(request, args.requests, args.concurrency)
+    finally:
+        ncbi.close()
+
+
+def compare(baseline: Dict, results: Dict) -> None:
+    """
+    Prints the changes of throughput and latency percentiles of the benchmarks since the baseline results.
+    """
+    for name, summary in results["benchmarks"].items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None:
+            continue
+        changes = []
+        for key in ("throughput_per_second", "p50_ms", "p99_ms"):
+            change = (summary[key] / previous[key] - 1) * 100 if previous[key] else 0.0
+            changes.append(f"{key} {previous[key]:.1f} -> {summary[key]:.1f} ({change:+.0f}%)")
+        print(f"{name}: {', '.join(changes)}")
+
+
+def _format_summary(summary: Dict[str, float]) -> str:
+    return (f"{summary['throughput_per_second']:.1f}/s, p50 {summary['p50_ms']:.1f} ms, "
+            f"p99 {summary['p99_ms']:.1f} ms, {summary['errors']} errors of {summary['calls']}")
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the linkers, loaders and /datasets against a local "
+                                                 "stand-in of NCBI, EuropePMC and GEO.")
+    parser.add_argument("--latency", type=float, default=0.05, help="minimum upstream response time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="maximum random addition to the latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream requests that fail")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="upstream requests per second beyond which they fail with 429, 0 for no limit")
+    parser.add_argument("--profiles", type=json.loads, default={},
+                        help="JSON object of per-service overrides, e.g. '{\"geo\": {\"latency\": 0.3}}'")
+    parser.add_argument("--links-per-paper", type=int, default=2, help="number of series linked to every paper")
+    parser.add_argument("--papers", type=int, default=10, help="number of papers per call and per request")
+    parser.add_argument("--calls", type=int, default=20, help="number of calls of every micro-benchmark")
+    parser.add_argument("--requests", type=int, default=100, help="number of /datasets requests")
+    parser.add_argument("--concurrency", type=int, default=8, help="number of concurrent /datasets requests")
+    parser.add_argument("--fields", type=lambda value: value.split(","),
+                        help="fields requested from /datasets, all fields by default")
+    parser.add_argument("--ncbi-requests-per-second", type=float,
+                        help="NCBI rate limit of the components, overrides the configuration")
+    parser.add_argument("--only", nargs="+", help="run only the benchmarks whose names contain one of these")
+    parser.add_argument("--output", help="path of the JSON results")
+    parser.add_argument("--compare", help="path of earlier JSON results to compare with")
+    args = parser.parse_args()
+
+    defaults = UpstreamProfile(args.latency, args.jitter, args.error_rate, args.rate_limit)
+    profiles = {service: UpstreamProfile(**{**vars(defaults), **args.profiles.get(service, {})})
+                for service in SERVICES}
+
+    directory = tempfile.mkdtemp(prefix="pubtrends-datasets-benchmark.")
+    try:
+        config = Config(test=True)
+        config.geometadb_path = os.path.join(directory, "geometadb.sqlite")
+        shutil.copyfile(Config(test=True).geometadb_path, config.geometadb_path)
+        config.cache_path = os.path.join(directory, "cache.sqlite")
+        config.gse_index_path = os.path.join(directory, "geometadb.sqlite.gseidx")
+        if args.ncbi_requests_per_second:
+            config.ncbi_requests_per_second = args.ncbi_requests_per_second
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        with MockUpstream(profiles, links_per_paper=args.links_per_paper) as upstream, \
+                point_components_at(upstream.url):
+            benchmarks = run_benchmarks(config, upstream, args)
+            upstream_responses = upstream.stats()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    results = {
+        "started_at": started_at,
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "settings": {
+            "profiles": {service: vars(profile) for service, profile in profiles.items()},
+            "links_per_paper": args.links_per_paper,
+            "papers": args.papers,
+            "calls": args.calls,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "fields": args.fields,
+            "ncbi_requests_per_second": config.ncbi_requests_per_second,
+        },
+        "benchmarks": benchmarks,
+        "upstream_responses": upstream_responses,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
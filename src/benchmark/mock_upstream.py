@@ -0,0 +1,326 @@
+"""
+Local stand-in for the upstream services of the linkers and loaders: the
+E-utilities that they use (ELink and ESummary), the EuropePMC
+annotations API and GEO's acc.cgi. Every service answers after a
+configurable latency, fails a configurable fraction of the requests, and
+answers with 429 Too Many Requests beyond a configurable request rate.
+
+The services describe a synthetic world: paper `pmid` is linked to
+`links_per_paper` series, GSE{SERIES_NUMBER_BASE + pmid * links_per_paper + i},
+each with `samples_per_series` samples. The series numbers are far above the
+ones in GEO, so they are never found in a copy of GEOmetadb.
+
+`point_components_at` switches the URL constants of the components to the
+server for the duration of a benchmark::
+
+    with MockUpstream({"geo": UpstreamProfile(latency=0.2)}) as upstream, point_components_at(upstream.url):
+        ...
+"""
+
+import json
+import random
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.db.elink_dataset_linker import ELinkDatasetLinker
+from src.db.entrez_client import EntrezClient
+from src.db.esummary_gse_loader import ESummaryGSELoader
+from src.db.europepmc_dataset_linker import EuropePMCDatasetLinker
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.ncbi_gsm_loader import NCBIGSMLoader
+
+SERIES_NUMBER_BASE = 50_000_000
+SERVICES = ("eutils", "europepmc", "geo")
+
+EUTILS_PATH = "/entrez/eutils"
+EUROPEPMC_PATH = "/europepmc/annotations_api/annotationsByArticleIds"
+GEO_PATH = "/geo/query/acc.cgi"
+
+
+@dataclass
+class UpstreamProfile:
+    """
+    Behavior of one emulated service.
+    """
+    # Minimum number of seconds before a response
+    latency: float = 0.0
+    # Maximum number of seconds added to the latency, uniformly distributed
+    jitter: float = 0.0
+    # Fraction of the requests that fail with 500 Internal Server Error
+    error_rate: float = 0.0
+    # Number of requests per second beyond which requests fail with 429, 0 for no limit
+    rate_limit: float = 0.0
+
+
+@contextmanager
+def point_components_at(url: str) -> Iterator[None]:
+    """
+    Replaces the upstream URLs of the linkers and loaders with the URLs of
+    the mock server, and restores them on exit.
+
+    :param url: Base URL of the mock server.
+    """
+    eutils = f"{url}{EUTILS_PATH}"
+    replacements = [
+        (EntrezClient, "ESEARCH_REQUEST_URL", f"{eutils}/esearch.fcgi"),
+        (EntrezClient, "ELINK_REQUEST_URL", f"{eutils}/elink.fcgi"),
+        (EntrezClient, "ESUMMARY_REQUEST_URL", f"{eutils}/esummary.fcgi"),
+        (ELinkDatasetLinker, "ELINK_REQUEST_URL", f"{eutils}/elink.fcgi"),
+        (ELinkDatasetLinker, "ESUMMARY_REQUEST_URL", f"{eutils}/esummary.fcgi"),
+        (EuropePMCDatasetLinker, "EUROPEPMC_URL", f"{url}{EUROPEPMC_PATH}"),
+        (NCBIGSELoader, "DOWNLOAD_URL_TEMPLATE", f"{url}{GEO_PATH}?acc={{}}&targ=self&form=text&view=quick"),
+        (NCBIGSMLoader, "DOWNLOAD_URL_TEMPLATE", f"{url}{GEO_PATH}?acc={{}}&targ=gsm&form=text&view=brief"),
+    ]
+    originals = [(owner, name, getattr(owner, name)) for owner, name, _ in replacements]
+    try:
+        for owner, name, value in replacements:
+            setattr(owner, name, value)
+        yield
+    finally:
+        for owner, name, value in originals:
+            setattr(owner, name, value)
+
+
+class MockUpstream:
+    """
+    HTTP server that emulates the upstream services in a background thread.
+    """
+
+    def __init__(self, profiles: Optional[Dict[str, UpstreamProfile]] = None, links_per_paper: int = 2,
+                 samples_per_series: int = 3, host: str = "127.0.0.1", port: int = 0, seed: int = 0) -> None:
+        """
+        :param profiles: Behavior of the services by name ("eutils", "europepmc"
+        or "geo"). Services without a profile answer immediately.
+        :param links_per_paper: Number of series linked to every paper.
+        :param samples_per_series: Number of samples of every series.
+        :param host: Address to listen on.
+        :param port: Port to listen on, 0 for any free port.
+        :param seed: Seed of the latencies and failures.
+        """
+        unknown = set(profiles or {}) - set(SERVICES)
+        if unknown:
+            raise ValueError(f"Unknown services {sorted(unknown)}, expected some of {SERVICES}")
+        self.profiles = {service: (profiles or {}).get(service, UpstreamProfile()) for service in SERVICES}
+        self.links_per_paper = links_per_paper
+        self.samples_per_series = samples_per_series
+        self._random = random.Random(seed)
+        self._recent: Dict[str, Deque[float]] = {service: deque() for service in SERVICES}
+        self._responses: Counter = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockUpstream":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MockUpstream":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        :return: Numbers of responses by service and status code.
+        """
+        with self._lock:
+            responses = dict(self._responses)
+        stats: Dict[str, Dict[str, int]] = {}
+        for (service, status), count in sorted(responses.items()):
+            stats.setdefault(service, {})[str(status)] = count
+        return stats
+
+    def series_of(self, pubmed_id: str) -> List[int]:
+        """
+        :return: Numbers of the series linked to the paper.
+        """
+        first = SERIES_NUMBER_BASE + int(pubmed_id) * self.links_per_paper
+        return list(range(first, first + self.links_per_paper))
+
+    def paper_of(self, series_number: int) -> int:
+        return (series_number - SERIES_NUMBER_BASE) // self.links_per_paper
+
+    def admit(self, service: str) -> Tuple[int, float]:
+        """
+        Decides the fate of a request: its status code (200, 429 or 500) and
+        the number of seconds to wait before answering.
+        """
+        profile = self.profiles[service]
+        now = time.monotonic()
+        with self._lock:
+            delay = profile.latency + self._random.uniform(0, profile.jitter)
+            failed = self._random.random() < profile.error_rate
+            recent = self._recent[service]
+            while recent and recent[0] <= now - 1:
+                recent.popleft()
+            limited = profile.rate_limit > 0 and len(recent) >= profile.rate_limit
+            if not limited:
+                recent.append(now)
+        status = 429 if limited else 500 if failed else 200
+        return status, 0.0 if limited else delay
+
+    def record(self, service: str, status: int) -> None:
+        with self._lock:
+            self._responses[(service, status)] += 1
+
+    # Responses of the services
+
+    def elink(self, query: Dict[str, List[str]]) -> Tuple[str, str]:
+        uid_offset = ESummaryGSELoader.SERIES_UID_OFFSET
+        # Each `id` parameter is a separate linkset, like ELink does
+        linksets = []
+        for ids in query.get("id", []):
+            pubmed_ids = ids.split(",")
+            links = [str(uid_offset + number) for pubmed_id in pubmed_ids for number in self.series_of(pubmed_id)]
+            linksets.append({
+                "dbfrom": "pubmed",
+                "ids": pubmed_ids,
+                "linksetdbs": [{"dbto": "gds", "linkname": "pubmed_gds", "links": links}],
+            })
+        return "application/json", json.dumps({"header": {"type": "elink"}, "linksets": linksets})
+
+    def esummary(self, query: Dict[str, List[str]]) -> Tuple[str, str]:
+        uid_offset = ESummaryGSELoader.SERIES_UID_OFFSET
+        uids = [uid for ids in query.get("id", []) for uid in ids.split(",") if uid]
+        result: Dict = {"uids": uids}
+        for uid in uids:
+            number = int(uid) - uid_offset
+            result[uid] = {
+                "uid": uid,
+                "accession": f"GSE{number}",
+                "entrytype": "GSE",
+                "title": f"Synthetic series {number}",
+                "summary": f"Summary of the synthetic series {number}. " * 5,
+                "gdstype": "Expression profiling by high throughput sequencing",
+                "pubmedids": [str(self.paper_of(number))],
+                "pdat": "2018/11/19",
+            }
+        return "application/json", json.dumps({"header": {"type": "esummary"}, "result": result})
+
+    def europepmc(self, query: Dict[str, List[str]]) -> Tuple[str, str]:
+        articles = []
+        for article_id in query.get("articleIds", [""])[0].split(","):
+            pubmed_id = article_id.removeprefix("MED:")
+            articles.append({
+                "source": "MED",
+                "extId": pubmed_id,
+                "annotations": [{"exact": f"GSE{number}", "type": "Accession Numbers"}
+                                for number in self.series_of(pubmed_id)],
+            })
+        return "application/json", json.dumps(articles)
+
+    def geo(self, query: Dict[str, List[str]]) -> Tuple[str, str]:
+        accession = query.get("acc", [""])[0]
+        number = int(accession[3:])
+        samples = [f"GSM{number * self.samples_per_series + i}" for i in range(self.samples_per_series)]
+        if query.get("targ") == ["gsm"]:
+            lines = []
+            for sample in samples:
+                lines += [
+                    f"^SAMPLE = {sample}",
+                    f"!Sample_title = Sample {sample} of {accession}",
+                    f"!Sample_geo_accession = {sample}",
+                    "!Sample_status = Public on Nov 19 2018",
+                    "!Sample_submission_date = Jul 05 2018",
+                    "!Sample_last_update_date = Dec 31 2019",
+                    "!Sample_type = SRA",
+                    "!Sample_source_name_ch1 = synthetic tissue",
+                    "!Sample_organism_ch1 = Homo sapiens",
+                    "!Sample_platform_id = GPL24676",
+                    f"!Sample_series_id = {accession}",
+                ]
+            return "text/plain", "\n".join(lines) + "\n"
+        lines = [
+            f"^SERIES = {accession}",
+            f"!Series_title = Synthetic series {number}",
+            f"!Series_geo_accession = {accession}",
+            "!Series_status = Public on Nov 19 2018",
+            "!Series_submission_date = Jul 05 2018",
+            "!Series_last_update_date = Dec 31 2019",
+            f"!Series_pubmed_id = {self.paper_of(number)}",
+            f"!Series_summary = {f'Summary of the synthetic series {number}. ' * 5}",
+            "!Series_overall_design = Synthetic design.",
+            "!Series_type = Expression profiling by high throughput sequencing",
+            "!Series_contributor = Jane,,Doe",
+            *(f"!Series_sample_id = {sample}" for sample in samples),
+            "!Series_contact_name = Jane,,Doe",
+            "!Series_contact_email = jane.doe@example.org",
+            "!Series_contact_country = Netherlands",
+            f"!Series_supplementary_file = ftp://ftp.ncbi.nlm.nih.gov/geo/series/{accession}/suppl/",
+            "!Series_platform_id = GPL24676",
+        ]
+        return "text/plain", "\n".join(lines) + "\n"
+
+
+def _handler(upstream: MockUpstream):
+    routes = {
+        f"{EUTILS_PATH}/elink.fcgi": ("eutils", upstream.elink),
+        f"{EUTILS_PATH}/esummary.fcgi": ("eutils", upstream.esummary),
+        EUROPEPMC_PATH: ("europepmc", upstream.europepmc),
+        GEO_PATH: ("geo", upstream.geo),
+    }
+
+    class Handler(BaseHTTPRequestHandler):
+        # Keep-alive, so that the connection pool of the components is exercised
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            self._respond("")
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length", 0))
+            self._respond(self.rfile.read(length).decode())
+
+        def _respond(self, body: str) -> None:
+            url = urlsplit(self.path)
+            if url.path not in routes:
+                self._send(404, "text/plain", "Not found")
+                return
+            service, render = routes[url.path]
+            query = parse_qs(url.query)
+            for name, values in parse_qs(body).items():
+                query.setdefault(name, []).extend(values)
+            status, delay = upstream.admit(service)
+            time.sleep(delay)
+            if status == 200:
+                self._send(200, *render(query))
+            elif status == 429:
+                self._send(429, "text/plain", "Too Many Requests", {"Retry-After": "1"})
+            else:
+                self._send(status, "text/plain", "Internal Server Error")
+            upstream.record(service, status)
+
+        def _send(self, status: int, content_type: str, body: str, headers: Optional[Dict[str, str]] = None) -> None:
+            data = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    return Handler
@@ -0,0 +1,93 @@
+"""
+Compares the parse time and peak memory of the SOFT series header parser
+with GEOparse, which NCBIGSELoader used before. GEOparse is not a
+dependency of the service anymore, so it has to be installed separately
+to run the comparison::
+
+    python -m src.benchmark.soft_header_parser --samples 500 --repeat 200
+"""
+
+import argparse
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from src.db.soft_header_parser import parse_series_header
+
+try:
+    import GEOparse
+except ImportError:
+    GEOparse = None
+
+
+def make_series_soft(samples: int, trailing_lines: int) -> List[str]:
+    """
+    Creates the lines of a synthetic series in SOFT format.
+
+    :param samples: Number of samples of the series (one `!Series_sample_id` line each).
+    :param trailing_lines: Number of lines of other entities after the series header.
+    :return: Lines of the SOFT stream.
+    """
+    lines = [
+        "^SERIES = GSE100000",
+        "!Series_title = Single-cell transcriptomics of a synthetic benchmark series",
+        "!Series_geo_accession = GSE100000",
+        "!Series_status = Public on Nov 19 2018",
+        "!Series_submission_date = Jul 05 2018",
+        "!Series_last_update_date = Dec 31 2019",
+        "!Series_pubmed_id = 30530648",
+    ]
+    lines += [f"!Series_summary = {'Summary sentence of the benchmark series. ' * 20}"] * 3
+    lines += [f"!Series_overall_design = {'Design sentence. ' * 20}"]
+    lines += ["!Series_type = Expression profiling by high throughput sequencing"]
+    lines += [f"!Series_contributor = First{i},M,Last{i}" for i in range(20)]
+    lines += [f"!Series_sample_id = GSM{1000000 + i}" for i in range(samples)]
+    lines += ["!Series_contact_name = Fabio,,Zanini", "!Series_contact_email = contact@example.org",
+              "!Series_contact_country = Australia", "!Series_supplementary_file = ftp://ftp.ncbi.nlm.nih.gov/"]
+    for i in range(trailing_lines):
+        if i % 20 == 0:
+            lines.append(f"^SAMPLE = GSM{1000000 + i // 20}")
+        else:
+            lines.append(f"!Sample_characteristics_ch1 = characteristic {i}")
+    return lines
+
+
+def measure(parse: Callable[[List[str]], Dict], lines: List[str], repeat: int) -> Dict[str, float]:
+    """
+    :return: Mean parse time in milliseconds and peak memory allocated by one parse in KiB.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        parse(iter(lines))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    parse(iter(lines))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"mean_ms": elapsed / repeat * 1000, "peak_kib": peak / 1024}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the SOFT series header parser against GEOparse.")
+    parser.add_argument("--samples", type=int, default=500, help="Number of samples of the series")
+    parser.add_argument("--trailing-lines", type=int, default=0,
+                        help="Number of lines of other entities after the series header")
+    parser.add_argument("--repeat", type=int, default=200, help="Number of parses to time")
+    args = parser.parse_args()
+
+    lines = make_series_soft(args.samples, args.trailing_lines)
+    parsers = {"soft_header_parser": parse_series_header}
+    if GEOparse is not None:
+        parsers["GEOparse"] = GEOparse.GEOparse.parse_metadata
+    else:
+        print("GEOparse is not installed, only the header parser is measured")
+
+    print(f"{len(lines)} lines, {sum(len(line) for line in lines) / 1024:.0f} KiB")
+    for name, parse in parsers.items():
+        result = measure(parse, lines, args.repeat)
+        print(f"{name:>20}: {result['mean_ms']:.3f} ms per parse, {result['peak_kib']:.0f} KiB peak")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,3 +24,55 @@ class Config:
         params = config_parser['params']
 
         self.geometadb_path = params['geometadb_path' if not test else 'test_geometadb_path']
+        # Memory-mapped part of GEOmetadb in bytes, and the SQLite page cache size (KiB if negative)
+        self.geometadb_mmap_size = params.getint('geometadb_mmap_size', fallback=256 * 1024 * 1024)
+        self.geometadb_cache_size = params.getint('geometadb_cache_size', fallback=-64 * 1024)
+        # Read-only GEOmetadb connections are pooled and shared by the requests, whichever thread serves them
+        self.geometadb_max_connections = params.getint('geometadb_max_connections', fallback=16)
+        # How often readers check whether another GEOmetadb version was activated
+        self.geometadb_swap_check_interval = params.getfloat('geometadb_swap_check_interval_seconds', fallback=5.0)
+        # What to do at startup when GEOmetadb queries would scan whole tables: warn, strict (refuse to start) or off
+        self.geometadb_index_check = params.get('geometadb_index_check', fallback='warn')
+        # Memory-mapped index of the GEOmetadb series, how often to check whether it was rebuilt, and
+        # the number of series written to GEOmetadb that triggers a rebuild (0 to only rebuild with the CLI)
+        self.gse_index_path = os.path.expanduser(params.get('gse_index_path', fallback=self.geometadb_path + '.gseidx'))
+        self.gse_index_reload_interval = params.getfloat('gse_index_reload_interval_seconds', fallback=5.0)
+        self.gse_index_rebuild_threshold = params.getint('gse_index_rebuild_threshold', fallback=1000)
+        # Number of hosts with pooled HTTP connections and connections kept per host
+        self.http_pool_connections = params.getint('http_pool_connections', fallback=10)
+        self.http_pool_maxsize = params.getint('http_pool_maxsize', fallback=20)
+        # Maximum number of PubMed IDs in one POST /datasets request
+        self.max_bulk_pubmed_ids = params.getint('max_bulk_pubmed_ids', fallback=10000)
+        # Threads that run the blocking GEOmetadb and cache calls of the async /datasets pipeline
+        self.async_offload_workers = params.getint('async_offload_workers', fallback=32)
+        # Samples returned by one /samples request when the limit isn't given, and the largest allowed limit
+        self.samples_page_size = params.getint('samples_page_size', fallback=1000)
+        self.max_samples_page_size = params.getint('max_samples_page_size', fallback=10000)
+        # Series whose samples downloaded from NCBI are kept for the following pages, and for how many seconds
+        self.gsm_cache_max_series = params.getint('gsm_cache_max_series', fallback=16)
+        self.gsm_cache_ttl = params.getfloat('gsm_cache_ttl_seconds', fallback=600)
+        # Series returned by one /datasets/search request when the limit isn't given, and the largest allowed limit
+        self.search_page_size = params.getint('search_page_size', fallback=20)
+        self.max_search_page_size = params.getint('max_search_page_size', fallback=100)
+        # Whether the network linkers are asked about papers that GEOmetadb already links to series
+        self.complete_dataset_linking = params.getboolean('complete_dataset_linking', fallback=False)
+        self.europepmc_max_concurrent_requests = params.getint('europepmc_max_concurrent_requests', fallback=4)
+        self.max_ncbi_connections = params.getint('max_ncbi_connections', fallback=10)
+        self.ncbi_api_key = params.get('ncbi_api_key', fallback='') or None
+        # NCBI allows 3 requests per second without an API key and 10 with one
+        self.ncbi_requests_per_second = params.getfloat('ncbi_requests_per_second',
+                                                        fallback=10 if self.ncbi_api_key else 3)
+        self.cache_path = os.path.expanduser(params.get('cache_path', fallback='~/.pubtrends-datasets/cache.sqlite'))
+        self.link_cache_ttl = params.getfloat('link_cache_ttl_seconds', fallback=7 * 24 * 3600)
+        self.link_cache_negative_ttl = params.getfloat('link_cache_negative_ttl_seconds', fallback=24 * 3600)
+        self.gse_cache_max_bytes = params.getint('gse_cache_max_bytes', fallback=64 * 1024 * 1024)
+        self.gse_cache_ttl = params.getfloat('gse_cache_ttl_seconds', fallback=3600)
+        # Whether series downloaded from NCBI are written to GEOmetadb in batches by a background thread
+        self.gse_write_behind = params.getboolean('gse_write_behind', fallback=True)
+        self.gse_write_batch_size = params.getint('gse_write_batch_size', fallback=500)
+        # Number of series downloaded and written to GEOmetadb at once by the incremental sync
+        self.sync_batch_size = params.getint('sync_batch_size', fallback=200)
+        self.gse_write_interval = params.getfloat('gse_write_interval_seconds', fallback=1.0)
+        # How long series that GEO has no record of, and series that failed with other HTTP errors, are skipped
+        self.gse_missing_ttl = params.getfloat('gse_missing_ttl_seconds', fallback=24 * 3600)
+        self.gse_error_ttl = params.getfloat('gse_error_ttl_seconds', fallback=600)
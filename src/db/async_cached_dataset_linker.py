@@ -0,0 +1,48 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.cached_dataset_linker import CachedDatasetLinker
+
+
+class AsyncCachedDatasetLinker(AsyncPaperDatasetLinker):
+    """
+    Asynchronous counterpart of `CachedDatasetLinker`, which links the papers
+    missing from the cache of a `CachedDatasetLinker` with an asynchronous
+    linker. The blocking and asynchronous pipelines share the cache entries
+    and the hit and miss counters.
+    """
+
+    def __init__(self, cache: CachedDatasetLinker, linker: AsyncPaperDatasetLinker,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        :param cache: Cached linker whose cache is used. Its own linker isn't called.
+        :param linker: Linker of the papers that aren't cached.
+        :param executor: Thread pool that reads and writes the cache. The event
+        loop's default pool is used if not provided.
+        """
+        self.cache = cache
+        self.linker = linker
+        self.executor = executor
+
+    @property
+    def name(self) -> str:
+        return self.cache.name
+
+    async def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        accessions_by_paper = await self.link_to_datasets_by_paper(pubmed_ids)
+        return list(dict.fromkeys(acc for accessions in accessions_by_paper.values() for acc in accessions))
+
+    async def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        pubmed_ids = list(dict.fromkeys(pubmed_ids))
+        loop = asyncio.get_running_loop()
+
+        links, missing = await loop.run_in_executor(self.executor, self.cache._lookup, pubmed_ids)
+        if missing:
+            fetched = await self.linker.link_to_datasets_by_paper(missing)
+            links.update(await loop.run_in_executor(self.executor, self.cache._store_fetched, missing, fetched))
+
+        return {pubmed_id: links[pubmed_id] for pubmed_id in pubmed_ids}
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.chained_dataset_linker import ChainedDatasetLinker
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class AsyncChainedDatasetLinker(AsyncPaperDatasetLinker):
+    """
+    Asynchronous counterpart of `ChainedDatasetLinker`.
+
+    - Awaits all linkers concurrently, so the latency is that of the slowest linker.
+    - Merges the returned GEO accessions in linker order, deduplicated.
+    - Skips linkers that raise an exception.
+    - Logs how long each linker took.
+
+    With `complete` disabled, the linkers are awaited one after the other,
+    each of them only for the papers that the previous linkers found no
+    datasets for.
+    """
+
+    def __init__(self, *linkers: AsyncPaperDatasetLinker, complete: bool = True, name: Optional[str] = None) -> None:
+        """
+        :param linkers: Linkers to await, in merge order.
+        :param complete: Whether every linker is awaited for all papers.
+        :param name: Name of the chain in logs.
+        """
+        if not linkers:
+            raise ValueError("At least one AsyncPaperDatasetLinker must be provided")
+        self.linkers: List[AsyncPaperDatasetLinker] = list(linkers)
+        self.complete = complete
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name or super().name
+
+    async def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        if not self.complete:
+            return ChainedDatasetLinker._merge(list((await self._link_unresolved(pubmed_ids)).values()))
+        results = await self._run_linkers(lambda linker: linker.link_to_datasets(pubmed_ids), [])
+        return ChainedDatasetLinker._merge([result or [] for result in results])
+
+    async def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        if not self.complete:
+            return await self._link_unresolved(pubmed_ids)
+        results = await self._run_linkers(lambda linker: linker.link_to_datasets_by_paper(pubmed_ids), {})
+        return {pubmed_id: ChainedDatasetLinker._merge([(result or {}).get(pubmed_id, []) for result in results])
+                for pubmed_id in dict.fromkeys(pubmed_ids)}
+
+    async def _link_unresolved(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Awaits the linkers in order, each of them only for the papers without
+        datasets so far, and logs how long each of them took.
+        """
+        accessions_by_paper: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        remaining = list(accessions_by_paper)
+        timings: Dict[str, float] = {}
+        for linker in self.linkers:
+            if not remaining:
+                break
+            result, timings[linker.name] = await self._run_linker(
+                linker, lambda linker: linker.link_to_datasets_by_paper(remaining), {})
+            for pubmed_id in remaining:
+                accessions_by_paper[pubmed_id] = ChainedDatasetLinker._merge([(result or {}).get(pubmed_id, [])])
+            remaining = [pubmed_id for pubmed_id in remaining if not accessions_by_paper[pubmed_id]]
+
+        logger.info("Linker timings: " + ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in timings.items())
+                    + f", unresolved papers: {len(remaining)}")
+        return accessions_by_paper
+
+    async def _run_linkers(self, link: Callable[[AsyncPaperDatasetLinker], Awaitable[T]],
+                           failed_result: T) -> List[T]:
+        """
+        Runs all linkers concurrently and logs how long each of them took.
+
+        :param link: Function that runs a single linker.
+        :param failed_result: Result used for linkers that raised an exception.
+        :return: Results of the linkers, in linker order.
+        """
+        results = await asyncio.gather(*(self._run_linker(linker, link, failed_result) for linker in self.linkers))
+        logger.info("Linker timings: " + ", ".join(f"{linker.name}={elapsed:.3f}s"
+                                                   for linker, (_, elapsed) in zip(self.linkers, results)))
+        return [result for result, _ in results]
+
+    @staticmethod
+    async def _run_linker(linker: AsyncPaperDatasetLinker, link: Callable[[AsyncPaperDatasetLinker], Awaitable[T]],
+                          failed_result: T) -> Tuple[T, float]:
+        start = time.perf_counter()
+        try:
+            result = await link(linker)
+        except Exception:
+            logger.exception("Error linking papers to datasets")
+            result = failed_result
+        return result, time.perf_counter() - start
@@ -0,0 +1,35 @@
+from typing import Dict, List, Optional
+
+from src.db.async_gse_loader import AsyncGSELoader
+from src.db.gse import GSE
+
+
+class AsyncChainedGSELoader(AsyncGSELoader):
+    """
+    Asynchronous counterpart of `ChainedGSELoader`: tries the loaders in
+    order, querying each of them only for the accessions that remain
+    unresolved by the previous loaders.
+    """
+
+    def __init__(self, *loaders: AsyncGSELoader) -> None:
+        if not loaders:
+            raise ValueError("At least one AsyncGSELoader must be provided")
+        self.loaders: List[AsyncGSELoader] = list(loaders)
+
+    async def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        if not gse_accessions:
+            return []
+
+        found_map: Dict[str, GSE] = {}
+        remaining: List[str] = list(dict.fromkeys(gse_accessions))
+
+        for loader in self.loaders:
+            if not remaining:
+                break
+            results = await loader.load_gses(remaining, fields)
+            for g in results:
+                if g and g.gse and g.gse not in found_map:
+                    found_map[g.gse] = g
+            remaining = [acc for acc in remaining if acc not in found_map]
+
+        return [found_map[acc] for acc in gse_accessions if acc in found_map]
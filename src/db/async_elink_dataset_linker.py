@@ -0,0 +1,81 @@
+import asyncio
+from typing import Dict, List, Optional
+
+import httpx
+
+from src.db.async_entrez_client import AsyncEntrezClient
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.elink_dataset_linker import ELinkDatasetLinker
+from src.db.rate_limiter import TokenBucketRateLimiter
+
+
+class AsyncELinkDatasetLinker(AsyncPaperDatasetLinker):
+    """
+    Asynchronous counterpart of `ELinkDatasetLinker`. The ELink and ESummary
+    batches are sent concurrently, spaced out by the shared rate limiter.
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 api_key: Optional[str] = None):
+        """
+        :param http_client: Client used for requests to the E-utilities.
+        :param rate_limiter: Limiter shared by everything that sends requests to NCBI.
+        :param api_key: NCBI API key sent with every request, if provided.
+        """
+        self.entrez = AsyncEntrezClient(http_client, rate_limiter, api_key)
+
+    async def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        accessions_by_paper = await self.link_to_datasets_by_paper(pubmed_ids)
+        return list(dict.fromkeys(acc for accessions in accessions_by_paper.values() for acc in accessions))
+
+    async def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        geo_ids_by_paper = await self._fetch_geo_ids_by_paper(pubmed_ids)
+        geo_ids = list(dict.fromkeys(geo_id for ids in geo_ids_by_paper.values() for geo_id in ids))
+        accessions_by_id = await self._fetch_series_accessions_by_id(geo_ids)
+        return {
+            pubmed_id: list(dict.fromkeys(accessions_by_id[geo_id] for geo_id in ids if geo_id in accessions_by_id))
+            for pubmed_id, ids in geo_ids_by_paper.items()
+        }
+
+    async def _fetch_geo_ids_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Fetches GEO dataset ids for each of the papers with the specified
+        PubMed IDs, `ELINK_BATCH_SIZE` papers per request.
+
+        :param pubmed_ids: List of PubMed IDs to fetch GEO dataset ids for.
+        :returns: Dictionary that maps each PubMed ID to the IDs of its GEO datasets.
+        """
+        batch_size = ELinkDatasetLinker.ELINK_BATCH_SIZE
+        responses = await asyncio.gather(*(
+            self.entrez.request_json("ELink", ELinkDatasetLinker.ELINK_REQUEST_URL,
+                                     params=ELinkDatasetLinker.ELINK_PARAMS,
+                                     data={"id": pubmed_ids[i: i + batch_size]})
+            for i in range(0, len(pubmed_ids), batch_size)
+        ))
+        geo_ids: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        for response in responses:
+            ELinkDatasetLinker._parse_geo_ids_by_paper(response, geo_ids)
+        return geo_ids
+
+    async def _fetch_series_accessions_by_id(self, geo_ids: List[str]) -> Dict[str, str]:
+        """
+        Fetches GEO series accessions for the given GEO IDs from the ESummary
+        E-Utility, `ESUMMARY_BATCH_SIZE` IDs per request.
+
+        :param geo_ids: GEO dataset IDs for which to fetch accessions.
+        :return: Dictionary that maps GEO IDs of series to their accessions.
+        """
+        batch_size = ELinkDatasetLinker.ESUMMARY_BATCH_SIZE
+        responses = await asyncio.gather(*(
+            self.entrez.request_json("ESummary", ELinkDatasetLinker.ESUMMARY_REQUEST_URL,
+                                     params=ELinkDatasetLinker.ESUMMARY_PARAMS,
+                                     data={"id": ",".join(geo_ids[i: i + batch_size])})
+            for i in range(0, len(geo_ids), batch_size)
+        ))
+        accessions = {}
+        for response in responses:
+            accessions.update(ELinkDatasetLinker._parse_series_accessions(response))
+        return accessions
@@ -0,0 +1,62 @@
+from typing import Dict, Optional
+
+import httpx
+
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.exception.entrez_error import EntrezError
+
+
+class AsyncEntrezClient:
+    """
+    Asynchronous counterpart of `EntrezClient`. Waiting for the rate limiter
+    and for the E-utilities doesn't block the event loop.
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 api_key: Optional[str] = None):
+        """
+        :param http_client: Client used for requests to the E-utilities.
+        :param rate_limiter: Limiter shared by everything that sends requests to NCBI.
+        :param api_key: NCBI API key sent with every request, if provided.
+        """
+        self.http_client = http_client
+        self.rate_limiter = rate_limiter
+        self.api_key = api_key
+
+    async def request_json(self, api_name: str, url: str, params: Dict, data: Optional[Dict] = None) -> Dict:
+        """
+        Sends a request to one of the E-utilities and parses the JSON response.
+        See `request` for the parameters.
+        """
+        try:
+            return (await self.request(api_name, url, params, data)).json()
+        except ValueError:
+            raise EntrezError(f"Malformed response from {api_name}")
+
+    async def request(self, api_name: str, url: str, params: Dict, data: Optional[Dict] = None) -> httpx.Response:
+        """
+        Sends a request to one of the E-utilities. Requests with a body are sent
+        as POST requests, all others as GET requests.
+
+        :param api_name: Name of the E-utility, used in error messages.
+        :param url: URL of the E-utility.
+        :param params: Query parameters.
+        :param data: Form data for POST requests.
+        :return: Successful response.
+        """
+        if self.api_key:
+            params = {**params, "api_key": self.api_key}
+        if self.rate_limiter:
+            await self.rate_limiter.acquire_async()
+        try:
+            if data is None:
+                response = await self.http_client.get(url, params=params)
+            else:
+                response = await self.http_client.post(url, params=params, data=data)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPStatusError as e:
+            raise EntrezError(f"{api_name} status {e.response.status_code}")
+        except httpx.RequestError:
+            raise EntrezError(f"Network error during {api_name} API call")
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from src.db.async_entrez_client import AsyncEntrezClient
+from src.db.async_gse_loader import AsyncGSELoader
+from src.db.entrez_client import EntrezClient
+from src.db.esummary_gse_loader import ESummaryGSELoader
+from src.db.gse import FIELD_NAMES, GSE, project
+from src.db.gse_loader import LOADER_ERRORS
+from src.exception.entrez_error import EntrezError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncESummaryGSELoader(AsyncGSELoader):
+    """
+    Asynchronous counterpart of `ESummaryGSELoader`. The batches of summaries
+    are requested concurrently, spaced out by the shared rate limiter.
+
+    Series are only loaded when all requested fields are provided by ESummary
+    (see `ESummaryGSELoader.FIELDS`), otherwise they are left to the next
+    loader of a chain without any request.
+    """
+
+    def __init__(self, entrez: AsyncEntrezClient) -> None:
+        """
+        :param entrez: Client for the E-utilities.
+        """
+        self.entrez = entrez
+
+    async def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        if any(name not in ESummaryGSELoader.FIELDS for name in (fields or FIELD_NAMES)):
+            return []
+        gse_accessions = list(dict.fromkeys(gse_accessions))
+        uids = {}
+        for accession in gse_accessions:
+            uid = ESummaryGSELoader._series_uid(accession)
+            if uid is not None:
+                uids[uid] = accession
+        uid_list = list(uids)
+        batches = [uid_list[i: i + ESummaryGSELoader.BATCH_SIZE]
+                   for i in range(0, len(uid_list), ESummaryGSELoader.BATCH_SIZE)]
+        results = await asyncio.gather(*(self._fetch_summaries(batch) for batch in batches), return_exceptions=True)
+
+        found: Dict[str, GSE] = {}
+        for batch, summaries in zip(batches, results):
+            if isinstance(summaries, EntrezError):
+                # The series of the batch are left to the next loader
+                LOADER_ERRORS.inc(loader=type(self).__name__, exception=type(summaries).__name__)
+                logger.error(f"Failed to fetch summaries of {len(batch)} GEO series: {summaries}")
+                continue
+            if isinstance(summaries, BaseException):
+                raise summaries
+            for uid in batch:
+                summary = summaries.get(uid)
+                if summary is not None and summary.get("accession") == uids[uid]:
+                    found[uids[uid]] = ESummaryGSELoader._to_gse(summary)
+        return [project(found[accession], fields) for accession in gse_accessions if accession in found]
+
+    async def _fetch_summaries(self, uids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetches the ESummary document summaries of GEO DataSets entries.
+
+        :param uids: UIDs of the entries.
+        :return: Dictionary that maps the UIDs to their summaries.
+        """
+        response = await self.entrez.request_json("ESummary", EntrezClient.ESUMMARY_REQUEST_URL,
+                                                  params={"db": "gds", "retmode": "json"},
+                                                  data={"id": ",".join(uids)})
+        return ESummaryGSELoader._parse_summaries(response)
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Dict, List
+
+import httpx
+
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.europepmc_dataset_linker import EuropePMCDatasetLinker
+from src.exception.europepmc_error import EuropePMCError
+
+
+class AsyncEuropePMCDatasetLinker(AsyncPaperDatasetLinker):
+    """
+    Asynchronous counterpart of `EuropePMCDatasetLinker`. At most
+    `max_concurrent_requests` batches of a call are fetched at the same time.
+    """
+
+    def __init__(self, http_client: httpx.AsyncClient, max_concurrent_requests: int = 1):
+        """
+        :param http_client: Client used for requests to the annotations API.
+        :param max_concurrent_requests: Maximum number of batches that are
+        fetched at the same time. 1 fetches the batches one after another.
+        """
+        if max_concurrent_requests < 1:
+            raise ValueError("max_concurrent_requests must be at least 1")
+        self.http_client = http_client
+        self.max_concurrent_requests = max_concurrent_requests
+
+    async def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        accessions_by_paper = await self.link_to_datasets_by_paper(pubmed_ids)
+        # There may multiple annotations for the same GEO accession
+        return list(set(acc for accessions in accessions_by_paper.values() for acc in accessions))
+
+    async def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        # There is no explicit rate limit for EuropePMC
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        batch_size = EuropePMCDatasetLinker.BATCH_SIZE
+        # Semaphores are bound to an event loop, so every call gets its own
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+
+        async def fetch(batch: List[str]) -> Dict[str, List[str]]:
+            async with semaphore:
+                return await self._fetch_geo_accession_batch(batch)
+
+        tasks = [asyncio.ensure_future(fetch(pubmed_ids[i: i + batch_size]))
+                 for i in range(0, len(pubmed_ids), batch_size)]
+        try:
+            batches = await asyncio.gather(*tasks)
+        except BaseException:
+            # Don't start the remaining batches once one of them has failed
+            for task in tasks:
+                task.cancel()
+            raise
+        accessions_by_paper: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        for batch_accessions in batches:
+            for pubmed_id, accessions in batch_accessions.items():
+                accessions_by_paper.setdefault(pubmed_id, []).extend(accessions)
+        return {pubmed_id: list(dict.fromkeys(accessions)) for pubmed_id, accessions in accessions_by_paper.items()}
+
+    async def _fetch_geo_accession_batch(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Fetches GEO references in a list of papers (max 8 papers) from EuropePMC's
+        annotations API.
+
+        :param pubmed_ids: PubMed IDs of the papers for which to fetch GEO dataset
+        accessions.
+        :return: Dictionary that maps PubMed IDs of the papers to the GEO acessions
+        mentioned in them.
+        """
+        try:
+            response = await self.http_client.get(EuropePMCDatasetLinker.EUROPEPMC_URL,
+                                                  params=EuropePMCDatasetLinker._request_params(pubmed_ids))
+            response.raise_for_status()
+            return EuropePMCDatasetLinker._parse_geo_accessions(response.json())
+        except httpx.HTTPStatusError as e:
+            raise EuropePMCError(f"EuropePMC Annotations API status {e.response.status_code}")
+        except httpx.RequestError:
+            raise EuropePMCError("Network error during EuropePMC API call")
@@ -0,0 +1,24 @@
+from abc import ABCMeta, abstractmethod
+from typing import List, Optional
+from src.db.gse import GSE
+
+
+class AsyncGSELoader(metaclass=ABCMeta):
+    """
+    Asynchronous counterpart of `GSELoader`.
+    """
+
+    @abstractmethod
+    async def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        """
+        Returns GSE objects associated with the GEO series with the acession
+        numbers provided in the list
+
+        :param gse_accessions: Accession numbers of the GEO series to load.
+        :type gse_accessions: List[str]
+        :param fields: Names of the GSE fields to load. All fields are loaded if None.
+        :type fields: Optional[List[str]]
+        :return: GSE objects representing the series.
+        :rtype: List[GSE]
+        """
+        pass
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import List, Optional
+
+import httpx
+
+from src.db.async_gse_loader import AsyncGSELoader
+from src.db.gse import GSE, project
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.exception.geo_error import GEOError
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncNCBIGSELoader(AsyncGSELoader):
+    """
+    Asynchronous counterpart of `NCBIGSELoader`.
+
+    Every series is downloaded from acc.cgi as a separate task, and at most
+    `max_ncbi_connections` downloads of a call are in flight at once. The
+    downloads share the rate limiter, the parser, the negative cache and the
+    GEOmetadb writes of the wrapped loader; the blocking SQLite calls run in a
+    thread pool.
+    """
+
+    def __init__(self, loader: NCBIGSELoader, http_client: httpx.AsyncClient,
+                 executor: Optional[Executor] = None) -> None:
+        """
+        :param loader: Loader whose rate limiter, negative cache and writes are used.
+        :param http_client: Client used to download the series.
+        :param executor: Thread pool that runs the blocking calls. The event
+        loop's default pool is used if not provided.
+        """
+        self.loader = loader
+        self.http_client = http_client
+        self.executor = executor
+
+    async def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        loop = asyncio.get_running_loop()
+        if self.loader.negative_cache is not None:
+            gse_accessions = await loop.run_in_executor(self.executor, self.loader.skip_known_failures,
+                                                        gse_accessions)
+        if not gse_accessions:
+            return []
+        # Semaphores are bound to an event loop, so every call gets its own
+        semaphore = asyncio.Semaphore(self.loader.max_connections)
+
+        async def download(accession: str) -> Optional[GSE]:
+            async with semaphore:
+                return await self.download_or_record_failure(accession)
+
+        tasks = [asyncio.ensure_future(download(accession)) for accession in gse_accessions]
+        try:
+            gses = [gse for gse in await asyncio.gather(*tasks) if gse is not None]
+        except BaseException:
+            # Don't start the remaining downloads once one of them has failed
+            for task in tasks:
+                task.cancel()
+            raise
+        if gses:
+            # Complete series are saved, so that later queries for any field can be served by GEOmetadb
+            await loop.run_in_executor(self.executor, self.loader._save_downloaded, gses)
+        return [project(gse, fields) for gse in gses]
+
+    async def download_or_record_failure(self, accession: str) -> Optional[GSE]:
+        """
+        Downloads the GEO dataset with the given accession. See
+        `NCBIGSELoader.download_or_record_failure`.
+
+        :param accession: GEO accession for the dataset (ex. GSE12345)
+        :return: GEO dataset, or None if its failure was recorded.
+        """
+        try:
+            return await self.download_geo_dataset(accession)
+        except GEOError as e:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.loader.record_failure, accession, e)
+            return None
+
+    async def download_geo_dataset(self, accession: str) -> GSE:
+        """
+        Downloads the GEO dataset with the given accession.
+
+        :param accession: GEO accession for the dataset (ex. GSE12345)
+        :return: GEO dataset
+        :raises GEOError: If the download fails or GEO returns no record of the dataset.
+        """
+        try:
+            response = await self._rate_limited_get(NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format(accession))
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise NCBIGSELoader._status_error(accession, e.response.status_code)
+        except httpx.RequestError:
+            raise GEOError(f"Network failure when downloading GEO dataset {accession}")
+        return NCBIGSELoader._parse_series(accession, response.text.splitlines())
+
+    async def _rate_limited_get(self, url: str) -> httpx.Response:
+        """
+        Sends a GET request once the rate limiter allows it. If NCBI still
+        answers with 429 Too Many Requests, waits for the time given in the
+        Retry-After header and tries again.
+
+        :param url: URL to request.
+        :return: Response.
+        """
+        params = {"api_key": self.loader.api_key} if self.loader.api_key else None
+        retries = 0
+        while True:
+            await self.loader.rate_limiter.acquire_async()
+            response = await self.http_client.get(url, params=params)
+            if response.status_code != 429 or retries == NCBIGSELoader.MAX_RATE_LIMIT_RETRIES:
+                return response
+            retries += 1
+            retry_after = response.headers.get("Retry-After", "")
+            logger.warning(f"NCBI rate limit exceeded, retrying {url}")
+            await asyncio.sleep(int(retry_after) if retry_after.isdigit() else 1)
@@ -0,0 +1,49 @@
+import asyncio
+from abc import ABCMeta
+from abc import abstractmethod
+from typing import Dict, List
+
+
+class AsyncPaperDatasetLinker(metaclass=ABCMeta):
+    """
+    Asynchronous counterpart of `PaperDatasetLinker`.
+    """
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the data source, used in logs and timing reports.
+        """
+        return type(self).__name__
+
+    @abstractmethod
+    async def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        """
+        Returns a list GEO accessions (GSExxx) for datasets associated with
+        the articles provided by the list of PubMed IDs.
+
+        :param pubmed_ids: List of Pubmed IDs for which to get associtated GEO acessions.
+        :type pubmed_ids: List[str]
+        :return: List GEO accessions for datasets associated with the articles
+        provided by the list of PubMed IDs.
+        :rtype: List[str]
+        """
+        pass
+
+    async def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Returns the GEO accessions for datasets associated with each of the
+        articles provided by the list of PubMed IDs. The default implementation
+        links the articles concurrently, one request per article.
+
+        :param pubmed_ids: List of Pubmed IDs for which to get associtated GEO acessions.
+        :type pubmed_ids: List[str]
+        :return: Dictionary that maps each PubMed ID to the GEO accessions of
+        its datasets (an empty list if there are none).
+        :rtype: Dict[str, List[str]]
+        """
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        pubmed_ids = list(dict.fromkeys(pubmed_ids))
+        accessions = await asyncio.gather(*(self.link_to_datasets([pubmed_id]) for pubmed_id in pubmed_ids))
+        return dict(zip(pubmed_ids, accessions))
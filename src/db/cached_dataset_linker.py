@@ -0,0 +1,150 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from src.db.paper_dataset_linker import PaperDatasetLinker
+
+logger = logging.getLogger(__name__)
+
+
+class CachedDatasetLinker(PaperDatasetLinker):
+    """
+    Decorator that caches the datasets linked to each paper by another
+    `PaperDatasetLinker` in a local SQLite table.
+
+    - Only PubMed IDs that are not cached (or whose entry has expired) are
+      passed to the wrapped linker, and its results are merged with the cached ones.
+    - Papers without datasets are cached as well (negative entries), usually
+      with a shorter time to live, since links are often added after publication.
+    - Exceptions of the wrapped linker are propagated and nothing is cached,
+      so upstream failures are never mistaken for papers without datasets.
+    """
+
+    TABLE = "paper_dataset_links"
+
+    def __init__(self, linker: PaperDatasetLinker, cache_path: str, ttl: float, negative_ttl: float) -> None:
+        """
+        :param linker: Linker whose results are cached.
+        :param cache_path: Path to the SQLite database that stores the cache.
+        :param ttl: Number of seconds for which links are cached.
+        :param negative_ttl: Number of seconds for which papers without links are cached.
+        """
+        self.linker = linker
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._create_table()
+
+    @property
+    def name(self) -> str:
+        return self.linker.name
+
+    def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        accessions_by_paper = self.link_to_datasets_by_paper(pubmed_ids)
+        return list(dict.fromkeys(acc for accessions in accessions_by_paper.values() for acc in accessions))
+
+    def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        pubmed_ids = list(dict.fromkeys(pubmed_ids))
+
+        links, missing = self._lookup(pubmed_ids)
+        if missing:
+            links.update(self._store_fetched(missing, self.linker.link_to_datasets_by_paper(missing)))
+
+        return {pubmed_id: links[pubmed_id] for pubmed_id in pubmed_ids}
+
+    def _lookup(self, pubmed_ids: List[str]) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Loads the cached links of the papers and counts the hits and misses.
+
+        :param pubmed_ids: Deduplicated PubMed IDs of the papers.
+        :return: Cached links by PubMed ID, and the PubMed IDs that aren't cached.
+        """
+        links = self._load(pubmed_ids)
+        missing = [pubmed_id for pubmed_id in pubmed_ids if pubmed_id not in links]
+        logger.info(f"{self.name} link cache: {len(links)} hits, {len(missing)} misses")
+        with self._lock:
+            self.hits += len(links)
+            self.misses += len(missing)
+        return links, missing
+
+    def _store_fetched(self, missing: List[str], fetched: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Stores the links that the wrapped linker fetched for the papers that
+        weren't cached, including the papers without links.
+
+        :param missing: PubMed IDs of the papers that weren't cached.
+        :param fetched: Links returned by the wrapped linker.
+        :return: Links of the papers that weren't cached.
+        """
+        fetched = {pubmed_id: fetched.get(pubmed_id, []) for pubmed_id in missing}
+        self._store(fetched)
+        return fetched
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Numbers of papers whose links were read from the cache and
+        passed to the wrapped linker.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def _create_table(self) -> None:
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                # WAL lets requests read the cache while another request writes to it
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                        source TEXT NOT NULL,
+                        pubmed_id TEXT NOT NULL,
+                        accessions TEXT NOT NULL,
+                        linked_at REAL NOT NULL,
+                        PRIMARY KEY (source, pubmed_id)
+                    )""")
+        except sqlite3.Error:
+            logger.exception("Failed to create the paper dataset link cache:")
+
+    def _load(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Loads the cached links of the papers that have not expired.
+
+        :param pubmed_ids: PubMed IDs of the papers.
+        :return: Dictionary that maps the cached PubMed IDs to their GEO accessions.
+        """
+        now = time.time()
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT pubmed_id, accessions FROM {self.TABLE}
+                    WHERE source = ?
+                      AND pubmed_id IN (SELECT value FROM json_each(?))
+                      AND linked_at >= CASE WHEN accessions = '[]' THEN ? ELSE ? END""",
+                               (self.name, json.dumps(pubmed_ids), now - self.negative_ttl, now - self.ttl))
+                return {pubmed_id: json.loads(accessions) for pubmed_id, accessions in cursor.fetchall()}
+        except sqlite3.Error:
+            # Treat an unusable cache as empty so as not to fail the whole pipeline.
+            logger.exception("Failed to read the paper dataset link cache:")
+            return {}
+
+    def _store(self, links: Dict[str, List[str]]) -> None:
+        """
+        Stores the links of the papers, replacing existing entries.
+
+        :param links: Dictionary that maps PubMed IDs to their GEO accessions.
+        """
+        now = time.time()
+        rows = [(self.name, pubmed_id, json.dumps(accessions), now) for pubmed_id, accessions in links.items()]
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                conn.executemany(f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error:
+            logger.exception("Failed to write the paper dataset link cache:")
@@ -0,0 +1,171 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.db.gse import GSE, project
+from src.db.gse_loader import GSELoader
+
+
+@dataclass
+class _CacheEntry:
+    gse: GSE
+    expires_at: float
+    size: int
+
+
+class CachedGSELoader(GSELoader):
+    """
+    In-process LRU cache in front of another `GSELoader`.
+
+    - The cache is bounded by the estimated memory used by the cached GSE
+      objects rather than by their number, since series vary a lot in size.
+    - Entries expire after `ttl` seconds and can be invalidated explicitly,
+      e.g. when newer versions of the series are written to GEOmetadb.
+    - Only accessions that are not cached are passed to the wrapped loader.
+    - Loads of a subset of the fields are served from the cached series, but
+      the partial series loaded for the misses are not cached.
+
+    Cached GSE objects are shared between callers and must not be modified.
+    """
+
+    def __init__(self, loader: GSELoader, max_bytes: int, ttl: float) -> None:
+        """
+        :param loader: Loader whose results are cached.
+        :param max_bytes: Maximum estimated size of the cached GSE objects in bytes.
+        :param ttl: Number of seconds for which a GSE object is cached.
+        """
+        self.loader = loader
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._size = 0
+        # Incremented on every invalidation, so results loaded concurrently with it aren't cached
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        if not gse_accessions:
+            return []
+        gse_accessions = list(dict.fromkeys(gse_accessions))
+
+        found, missing, generation, now = self._lookup(gse_accessions, fields)
+        if missing:
+            loaded = [gse for gse in self.loader.load_gses(missing, fields) if gse and gse.gse]
+            if fields is None:
+                with self._lock:
+                    if generation == self._generation:
+                        for gse in loaded:
+                            self._put(gse, now + self.ttl)
+            for gse in loaded:
+                found.setdefault(gse.gse, gse)
+
+        return [found[accession] for accession in gse_accessions if accession in found]
+
+    def iter_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> Iterator[GSE]:
+        """
+        Yields the cached series first, then the series provided by the
+        wrapped loader as it provides them.
+        """
+        gse_accessions = list(dict.fromkeys(gse_accessions))
+        if not gse_accessions:
+            return
+        found, missing, generation, now = self._lookup(gse_accessions, fields)
+        yield from found.values()
+        if missing:
+            for gse in self.loader.iter_gses(missing, fields):
+                if not gse or not gse.gse or gse.gse in found:
+                    continue
+                if fields is None:
+                    with self._lock:
+                        if generation == self._generation:
+                            self._put(gse, now + self.ttl)
+                found[gse.gse] = gse
+                yield gse
+
+    def _lookup(self, gse_accessions: List[str],
+                fields: Optional[List[str]]) -> Tuple[Dict[str, GSE], List[str], int, float]:
+        """
+        Looks up the series in the cache and updates the hit and miss counters.
+
+        :param gse_accessions: Deduplicated accessions of the series.
+        :param fields: Names of the fields of the cached series to return, or None for all fields.
+        :return: Cached series by accession, accessions that are not cached,
+        the current generation and the current time.
+        """
+        found: Dict[str, GSE] = {}
+        missing: List[str] = []
+        now = time.monotonic()
+        with self._lock:
+            for accession in gse_accessions:
+                entry = self._entries.get(accession)
+                if entry is not None and entry.expires_at > now:
+                    self._entries.move_to_end(accession)
+                    found[accession] = project(entry.gse, fields)
+                else:
+                    if entry is not None:
+                        self._remove(accession)
+                    missing.append(accession)
+            self.hits += len(found)
+            self.misses += len(missing)
+            return found, missing, self._generation, now
+
+    def invalidate(self, gse_accessions: Iterable[str]) -> None:
+        """
+        Removes the given series from the cache.
+
+        :param gse_accessions: Accessions of the series to remove.
+        """
+        with self._lock:
+            self._generation += 1
+            for accession in gse_accessions:
+                if accession in self._entries:
+                    self._remove(accession)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Hit, miss and eviction counters and the current size of the cache.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+    def _put(self, gse: GSE, expires_at: float) -> None:
+        size = self._estimate_size(gse)
+        if size > self.max_bytes:
+            return
+        if gse.gse in self._entries:
+            self._remove(gse.gse)
+        self._entries[gse.gse] = _CacheEntry(gse, expires_at, size)
+        self._size += size
+        while self._size > self.max_bytes:
+            # Evict the least recently used entries
+            accession = next(iter(self._entries))
+            self._remove(accession)
+            self.evictions += 1
+
+    def _remove(self, accession: str) -> None:
+        self._size -= self._entries.pop(accession).size
+
+    @staticmethod
+    def _estimate_size(gse: GSE) -> int:
+        """
+        Estimates the memory used by a GSE object and its field values in bytes.
+        """
+        return sys.getsizeof(gse) + sum(sys.getsizeof(value) for value in vars(gse).values())
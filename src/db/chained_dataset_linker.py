@@ -1,44 +1,147 @@
 import logging
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, TypeVar
 
 from src.db.paper_dataset_linker import PaperDatasetLinker
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 
 class ChainedDatasetLinker(PaperDatasetLinker):
     """
     Chain-of-responsibility dataset linker that queries multiple
     `PaperDatasetLinker` implementations and merges their results.
 
-    - Calls each linker in order with the provided PubMed IDs.
+    - Calls the linkers with the provided PubMed IDs, in parallel by default,
+      so the latency is that of the slowest linker rather than the sum.
     - Merges the returned GEO accessions.
     - Deduplicates while preserving the first-seen order across linkers.
+    - Logs how long each linker took. The linkers are shared by concurrent
+      requests, so the durations aren't kept on the instance; they are
+      recorded in the linker metrics (see `PaperDatasetLinker`).
+
+    With `complete` disabled, the linkers are instead called one after the
+    other, each of them only for the papers that the previous linkers found
+    no datasets for. Cheap, local linkers placed first then spare the
+    network linkers for most papers, at the cost of missing the datasets
+    that only later linkers know of.
     """
 
-    def __init__(self, *linkers: PaperDatasetLinker) -> None:
+    def __init__(self, *linkers: PaperDatasetLinker, parallel: bool = True, complete: bool = True,
+                 name: Optional[str] = None) -> None:
+        """
+        :param linkers: Linkers to query, in merge order.
+        :param parallel: Whether the linkers are called in parallel.
+        :param complete: Whether every linker is called for all papers.
+        :param name: Name of the chain in logs and metrics. Nested chains need
+        different names, or their metrics are recorded as one.
+        """
         if not linkers:
             raise ValueError("At least one PaperDatasetLinker must be provided")
         self.linkers: List[PaperDatasetLinker] = list(linkers)
+        self.parallel = parallel
+        self.complete = complete
+        self._name = name
+
+    @property
+    def name(self) -> str:
+        return self._name or super().name
 
     def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
         if not pubmed_ids:
             raise ValueError("At least one valid PubMed ID is required")
+        if not self.complete:
+            return self._merge(list(self._link_unresolved(pubmed_ids).values()))
+        results = self._run_linkers(lambda linker: linker.link_to_datasets(pubmed_ids) or [], [])
+        return self._merge(results)
 
-        seen = set()
-        merged: List[str] = []
+    def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        if not self.complete:
+            return self._link_unresolved(pubmed_ids)
+        results = self._run_linkers(lambda linker: linker.link_to_datasets_by_paper(pubmed_ids) or {}, {})
+        return {pubmed_id: self._merge([result.get(pubmed_id, []) for result in results])
+                for pubmed_id in dict.fromkeys(pubmed_ids)}
 
+    def _link_unresolved(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Calls the linkers in order, each of them only for the papers without
+        datasets so far, and logs how long each of them took.
+
+        :param pubmed_ids: PubMed IDs of the papers.
+        :return: Dictionary that maps each PubMed ID to the GEO accessions of its datasets.
+        """
+        accessions_by_paper: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        remaining = list(accessions_by_paper)
+        timings: Dict[str, float] = {}
         for linker in self.linkers:
-            try:
-                accessions = linker.link_to_datasets(pubmed_ids) or []
-            except Exception:
-                # Fail-fast could be an option, but to keep the chain resilient,
-                # skip failing linkers and proceed with others.
-                logger.exception("Error linking papers to datasets")
-                continue
+            if not remaining:
+                break
+            result, timings[linker.name] = self._run_linker(
+                linker, lambda linker: linker.link_to_datasets_by_paper(remaining) or {}, {})
+            for pubmed_id in remaining:
+                accessions_by_paper[pubmed_id] = self._merge([result.get(pubmed_id, [])])
+            remaining = [pubmed_id for pubmed_id in remaining if not accessions_by_paper[pubmed_id]]
+
+        logger.info("Linker timings: " + ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in timings.items())
+                    + f", unresolved papers: {len(remaining)}")
+        return accessions_by_paper
+
+    def _run_linkers(self, link: Callable[[PaperDatasetLinker], T], failed_result: T) -> List[T]:
+        """
+        Runs all linkers and logs how long each of them took.
+
+        :param link: Function that runs a single linker.
+        :param failed_result: Result used for linkers that raised an exception.
+        :return: Results of the linkers, in linker order.
+        """
+        if self.parallel and len(self.linkers) > 1:
+            with ThreadPoolExecutor(max_workers=len(self.linkers), thread_name_prefix="linker") as executor:
+                results = list(executor.map(lambda linker: self._run_linker(linker, link, failed_result),
+                                            self.linkers))
+        else:
+            results = [self._run_linker(linker, link, failed_result) for linker in self.linkers]
+
+        logger.info("Linker timings: " + ", ".join(f"{linker.name}={elapsed:.3f}s"
+                                                   for linker, (_, elapsed) in zip(self.linkers, results)))
+        return [result for result, _ in results]
+
+    @staticmethod
+    def _run_linker(linker: PaperDatasetLinker, link: Callable[[PaperDatasetLinker], T],
+                    failed_result: T) -> Tuple[T, float]:
+        """
+        Runs a single linker and measures how long it took.
+
+        :param linker: Linker to run.
+        :param link: Function that runs the linker.
+        :param failed_result: Result returned if the linker fails.
+        :return: Result of the linker and the elapsed time in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            result = link(linker)
+        except Exception:
+            # Fail-fast could be an option, but to keep the chain resilient,
+            # skip failing linkers and proceed with others.
+            logger.exception("Error linking papers to datasets")
+            result = failed_result
+        return result, time.perf_counter() - start
+
+    @staticmethod
+    def _merge(accession_lists: List[List[str]]) -> List[str]:
+        """
+        Merges accession lists in linker order, so the output doesn't depend on
+        which linker finished first. Deduplicates while preserving the first-seen order.
+        """
+        seen = set()
+        merged: List[str] = []
+        for accessions in accession_lists:
             for acc in accessions:
                 if acc not in seen:
                     seen.add(acc)
                     merged.append(acc)
-
         return merged
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import Dict, Iterator, List, Optional
 
 from src.db.gse import GSE
 from src.db.gse_loader import GSELoader
@@ -9,6 +9,9 @@ class ChainedGSELoader(GSELoader):
     Chain-of-Responsibility GSE loader that tries multiple loaders in order
     (e.g., GEOmetadb first, then NCBI, etc.). Each loader is queried only for
     accessions that remain unresolved by the previous loaders.
+
+    `iter_gses` yields the series of each loader as the loader provides
+    them, so fast loaders' results are available before slow loaders finish.
     """
 
     def __init__(self, *loaders: GSELoader) -> None:
@@ -16,7 +19,7 @@ class ChainedGSELoader(GSELoader):
             raise ValueError("At least one GSELoader must be provided")
         self.loaders: List[GSELoader] = list(loaders)
 
-    def load_gses(self, gse_accessions: List[str]) -> List[GSE]:
+    def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
         if not gse_accessions:
             return []
 
@@ -26,7 +29,7 @@ class ChainedGSELoader(GSELoader):
         for loader in self.loaders:
             if not remaining:
                 break
-            results = loader.load_gses(remaining)
+            results = loader.load_gses(remaining, fields)
             for g in results:
                 if g and g.gse and g.gse not in found_map:
                     found_map[g.gse] = g
@@ -34,3 +37,16 @@ class ChainedGSELoader(GSELoader):
 
         ordered_results: List[GSE] = [found_map[acc] for acc in gse_accessions if acc in found_map]
         return ordered_results
+
+    def iter_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> Iterator[GSE]:
+        found = set()
+        remaining: List[str] = list(dict.fromkeys(gse_accessions))
+
+        for loader in self.loaders:
+            if not remaining:
+                break
+            for g in loader.iter_gses(remaining, fields):
+                if g and g.gse and g.gse not in found:
+                    found.add(g.gse)
+                    yield g
+            remaining = [acc for acc in remaining if acc not in found]
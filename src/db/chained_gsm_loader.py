@@ -0,0 +1,36 @@
+from typing import Iterator, List, Optional
+
+from src.db.gsm import GSM
+from src.db.gsm_loader import GSMLoader
+
+
+class ChainedGSMLoader(GSMLoader):
+    """
+    GSM loader that tries multiple loaders in order (e.g., GEOmetadb first,
+    then NCBI). The samples of a series are taken from the first loader that
+    has any of them, so the pages of a series are never mixed from different
+    sources. A loader that has samples of the series but none after `after`
+    ends the iteration instead of passing the series to the next loader.
+    """
+
+    def __init__(self, *loaders: GSMLoader) -> None:
+        if not loaders:
+            raise ValueError("At least one GSMLoader must be provided")
+        self.loaders: List[GSMLoader] = list(loaders)
+
+    def iter_gsms(self, gse_accession: str, after: Optional[str] = None,
+                  limit: Optional[int] = None) -> Iterator[GSM]:
+        for loader in self.loaders:
+            found = False
+            for gsm in loader.iter_gsms(gse_accession, after, limit):
+                found = True
+                yield gsm
+            if found or (after is not None and self._has_gsms(loader, gse_accession)):
+                return
+
+    @staticmethod
+    def _has_gsms(loader: GSMLoader, gse_accession: str) -> bool:
+        """
+        :return: Whether the loader has any samples of the series.
+        """
+        return next(iter(loader.iter_gsms(gse_accession, None, 1)), None) is not None
@@ -1,16 +1,30 @@
-from typing import List
-import re
+from typing import Dict, List, Optional
 import requests
+from src.db.entrez_client import EntrezClient
 from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.db.rate_limiter import TokenBucketRateLimiter
 from src.exception.entrez_error import EntrezError
 
 
 class ELinkDatasetLinker(PaperDatasetLinker):
-    ELINK_REQUEST_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi"
-    EFETCH_REQUEST_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
+    ELINK_REQUEST_URL = EntrezClient.ELINK_REQUEST_URL
+    ESUMMARY_REQUEST_URL = EntrezClient.ESUMMARY_REQUEST_URL
+    # Maximum number of PubMed IDs sent in one ELink request
+    ELINK_BATCH_SIZE = 500
+    # Maximum number of GEO document summaries requested at once
+    ESUMMARY_BATCH_SIZE = 500
+    ELINK_PARAMS = {"dbfrom": "pubmed", "db": "gds", "linkname": "pubmed_gds", "retmode": "json"}
+    ESUMMARY_PARAMS = {"db": "gds", "retmode": "json"}
 
-    def __init__(self, http_session: requests.Session):
-        self.http_session = http_session
+    def __init__(self, http_session: requests.Session,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 api_key: Optional[str] = None):
+        """
+        :param http_session: Session used for requests to the E-utilities.
+        :param rate_limiter: Limiter shared by everything that sends requests to NCBI.
+        :param api_key: NCBI API key sent with every request, if provided.
+        """
+        self.entrez = EntrezClient(http_session, rate_limiter, api_key)
 
     def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
         if not pubmed_ids:
@@ -18,66 +32,117 @@ class ELinkDatasetLinker(PaperDatasetLinker):
         geo_ids = self._fetch_geo_ids(pubmed_ids)
         return self._fetch_geo_accessions(geo_ids)
 
+    def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        geo_ids_by_paper = self._fetch_geo_ids_by_paper(pubmed_ids)
+        geo_ids = list(dict.fromkeys(geo_id for ids in geo_ids_by_paper.values() for geo_id in ids))
+        accessions_by_id = self._fetch_series_accessions_by_id(geo_ids)
+        return {
+            pubmed_id: list(dict.fromkeys(accessions_by_id[geo_id] for geo_id in ids if geo_id in accessions_by_id))
+            for pubmed_id, ids in geo_ids_by_paper.items()
+        }
+
     def _fetch_geo_ids(self, pubmed_ids: List[str]) -> List[str]:
         """
         Fetches GEO dataset ids for papers with the specified PubMed IDs.
         These IDs cannot be directly used to fetch the datasets themselves but
         can be translated to GEO accessions, which are then used to fetch the
-        actual datasets.
+        actual datasets. PubMed IDs are sent in chunks of `ELINK_BATCH_SIZE`.
 
         :param pubmed_ids: List of PubMed IDs to fetch GEO dataset ids for.
         :returns: A list that contains the IDs of the GEO datasets associated with the PubMed IDs.
         """
-        try:
-            response = self.http_session.post(
-                ELinkDatasetLinker.ELINK_REQUEST_URL,
-                params={
-                    "dbfrom": "pubmed",
-                    "db": "gds",
-                    "linkname": "pubmed_gds",
-                    "retmode": "json",
-                },
-                data={
-                    "id": ",".join(pubmed_ids),
-                }
-            )
-            response.raise_for_status()
-            response = response.json()
+        batch_size = ELinkDatasetLinker.ELINK_BATCH_SIZE
+        geo_ids = {}
+        for i in range(0, len(pubmed_ids), batch_size):
+            response = self.entrez.request_json("ELink", ELinkDatasetLinker.ELINK_REQUEST_URL,
+                                                params=ELinkDatasetLinker.ELINK_PARAMS,
+                                                data={"id": ",".join(pubmed_ids[i: i + batch_size])})
             if "ERROR" in response:
                 raise EntrezError("Error when fetching GEO IDs")
+            for linkset in response.get("linksets", []):
+                for linkset_db in linkset.get("linksetdbs", []):
+                    geo_ids.update(dict.fromkeys(linkset_db.get("links", [])))
+        return list(geo_ids)
+
+    def _fetch_geo_ids_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Fetches GEO dataset ids for each of the papers with the specified
+        PubMed IDs. Every PubMed ID is sent as a separate `id` parameter, so
+        ELink returns a separate linkset for each paper.
+
+        :param pubmed_ids: List of PubMed IDs to fetch GEO dataset ids for.
+        :returns: Dictionary that maps each PubMed ID to the IDs of its GEO datasets.
+        """
+        batch_size = ELinkDatasetLinker.ELINK_BATCH_SIZE
+        geo_ids: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        for i in range(0, len(pubmed_ids), batch_size):
+            response = self.entrez.request_json("ELink", ELinkDatasetLinker.ELINK_REQUEST_URL,
+                                                params=ELinkDatasetLinker.ELINK_PARAMS,
+                                                data={"id": pubmed_ids[i: i + batch_size]})
+            self._parse_geo_ids_by_paper(response, geo_ids)
+        return geo_ids
+
+    @staticmethod
+    def _parse_geo_ids_by_paper(elink_response: Dict, geo_ids: Dict[str, List[str]]) -> None:
+        """
+        Extracts the GEO dataset ids of each paper from an ELink JSON response
+        to a request with a separate `id` parameter for every paper.
 
-            linksets = response.get("linksets")
-            if not linksets:
-                return []
-            linkset_dbs = linksets[0].get("linksetdbs")
-            if not linkset_dbs:
-                return []
-            return linkset_dbs[0].get("links", [])
-        except requests.HTTPError as e:
-            raise EntrezError(f"ELink status {e.response.status_code}")
-        except requests.RequestException:
-            raise EntrezError("Network error during ELink API call")
+        :param elink_response: Parsed ELink response.
+        :param geo_ids: Dictionary that maps PubMed IDs to the IDs of their GEO
+        datasets, extended with the IDs in the response.
+        """
+        if "ERROR" in elink_response:
+            raise EntrezError("Error when fetching GEO IDs")
+        for linkset in elink_response.get("linksets", []):
+            for pubmed_id in linkset.get("ids", []):
+                links = geo_ids.setdefault(str(pubmed_id), [])
+                for linkset_db in linkset.get("linksetdbs", []):
+                    links.extend(linkset_db.get("links", []))
 
     def _fetch_geo_accessions(self, geo_ids: List[str]) -> List[str]:
         """
-        Fetches GEO accessions for the given GEO IDs from the NCBI E-Utilities.
+        Fetches GEO series accessions for the given GEO IDs.
 
         :param geo_ids: GEO dataset IDs for which to fetch accessions.
-        :return: List of GEO accessions in the same order.
+        :return: List of GEO series accessions in the same order.
+        """
+        accessions_by_id = self._fetch_series_accessions_by_id(geo_ids)
+        return [accessions_by_id[geo_id] for geo_id in geo_ids if geo_id in accessions_by_id]
+
+    def _fetch_series_accessions_by_id(self, geo_ids: List[str]) -> Dict[str, str]:
+        """
+        Fetches GEO series accessions for the given GEO IDs from the ESummary
+        E-Utility, `ESUMMARY_BATCH_SIZE` IDs at a time.
+
+        :param geo_ids: GEO dataset IDs for which to fetch accessions.
+        :return: Dictionary that maps GEO IDs of series to their accessions.
+        """
+        batch_size = ELinkDatasetLinker.ESUMMARY_BATCH_SIZE
+        accessions = {}
+        for i in range(0, len(geo_ids), batch_size):
+            response = self.entrez.request_json("ESummary", ELinkDatasetLinker.ESUMMARY_REQUEST_URL,
+                                                params=ELinkDatasetLinker.ESUMMARY_PARAMS,
+                                                data={"id": ",".join(geo_ids[i: i + batch_size])})
+            accessions.update(self._parse_series_accessions(response))
+        return accessions
+
+    @staticmethod
+    def _parse_series_accessions(esummary_response: Dict) -> Dict[str, str]:
+        """
+        Extracts GEO series accessions from an ESummary JSON response.
+
+        :param esummary_response: Parsed ESummary response.
+        :return: Dictionary that maps GEO IDs of series to their accessions.
         """
-        try:
-            response = self.http_session.get(
-                ELinkDatasetLinker.EFETCH_REQUEST_URL,
-                params={"db": "gds", "id": ",".join(geo_ids)},
-            )
-            response.raise_for_status()
-            geo_summaries = response.text
-
-            # Series are the only type of GEO entry that contain all the infromation
-            # we are looking for. Therefore we need to search for series accessions,
-            # which begin with GSE.
-            return re.findall("Accession: (GSE\\d+)", geo_summaries)
-        except requests.HTTPError as e:
-            raise EntrezError(f"EFetch status {e.response.status_code}")
-        except requests.RequestException:
-            raise EntrezError("Network error during EFetch API call")
+        if "error" in esummary_response:
+            raise EntrezError("Error when fetching GEO summaries")
+        result = esummary_response.get("result", {})
+        uids = result.get("uids", [])
+        # Series are the only type of GEO entry that contain all the information
+        # we are looking for. Therefore we only keep series accessions,
+        # which begin with GSE.
+        accessions = {uid: result.get(uid, {}).get("accession", "") for uid in uids}
+        return {uid: accession for uid, accession in accessions.items() if accession.startswith("GSE")}
@@ -0,0 +1,66 @@
+from typing import Dict, Optional
+
+import requests
+
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.exception.entrez_error import EntrezError
+
+
+class EntrezClient:
+    """
+    Sends requests to the NCBI E-utilities with the API key and the rate
+    limit shared by all components that use them.
+    """
+
+    ESEARCH_REQUEST_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
+    ELINK_REQUEST_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/elink.fcgi"
+    ESUMMARY_REQUEST_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esummary.fcgi"
+
+    def __init__(self, http_session: requests.Session,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 api_key: Optional[str] = None):
+        """
+        :param http_session: Session used for requests to the E-utilities.
+        :param rate_limiter: Limiter shared by everything that sends requests to NCBI.
+        :param api_key: NCBI API key sent with every request, if provided.
+        """
+        self.http_session = http_session
+        self.rate_limiter = rate_limiter
+        self.api_key = api_key
+
+    def request_json(self, api_name: str, url: str, params: Dict, data: Optional[Dict] = None) -> Dict:
+        """
+        Sends a request to one of the E-utilities and parses the JSON response.
+        See `request` for the parameters.
+        """
+        try:
+            return self.request(api_name, url, params, data).json()
+        except ValueError:
+            raise EntrezError(f"Malformed response from {api_name}")
+
+    def request(self, api_name: str, url: str, params: Dict, data: Optional[Dict] = None) -> requests.Response:
+        """
+        Sends a request to one of the E-utilities. Requests with a body are sent
+        as POST requests, all others as GET requests.
+
+        :param api_name: Name of the E-utility, used in error messages.
+        :param url: URL of the E-utility.
+        :param params: Query parameters.
+        :param data: Form data for POST requests.
+        :return: Successful response.
+        """
+        if self.api_key:
+            params = {**params, "api_key": self.api_key}
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+        try:
+            if data is None:
+                response = self.http_session.get(url, params=params)
+            else:
+                response = self.http_session.post(url, params=params, data=data)
+            response.raise_for_status()
+            return response
+        except requests.HTTPError as e:
+            raise EntrezError(f"{api_name} status {e.response.status_code}")
+        except requests.RequestException:
+            raise EntrezError(f"Network error during {api_name} API call")
@@ -0,0 +1,133 @@
+import logging
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from src.db.entrez_client import EntrezClient
+from src.db.gse import GSE, project
+from src.db.gse_loader import GSELoader, LOADER_ERRORS
+from src.exception.entrez_error import EntrezError
+
+logger = logging.getLogger(__name__)
+
+
+class ESummaryGSELoader(GSELoader):
+    """
+    Loads series metadata with E-utilities ESummary on the GEO DataSets
+    (gds) database, which returns the summaries of up to 500 series in one
+    request instead of one acc.cgi request per series.
+
+    ESummary only provides some of the GSE fields (see `FIELDS`), so the
+    loader only loads series when no other fields are requested and returns
+    nothing otherwise. Series that ESummary doesn't know of are skipped too.
+    It is meant to be chained before `NCBIGSELoader`, which then loads the
+    remaining series. The partial series are never saved to GEOmetadb.
+    """
+
+    # Fields of the GSE objects that can be filled from ESummary
+    FIELDS = frozenset(["gse", "title", "summary", "type", "pubmed_id", "status"])
+    # Maximum number of series summaries requested at once
+    BATCH_SIZE = 500
+    # GEO DataSets UIDs of series are the series number plus this offset (GSE116672 -> 200116672)
+    SERIES_UID_OFFSET = 200000000
+    ESUMMARY_DATE_FORMAT = "%Y/%m/%d"
+    STATUS_DATE_FORMAT = "%b %d %Y"
+    GEOMETADB_SEPARATOR = ";\t"
+
+    def __init__(self, entrez: EntrezClient) -> None:
+        """
+        :param entrez: Client for the E-utilities, shared with other NCBI components.
+        """
+        self.entrez = entrez
+
+    def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        gse_accessions = list(dict.fromkeys(gse_accessions))
+        found = {gse.gse: gse for gse in self.iter_gses(gse_accessions, fields)}
+        return [found[accession] for accession in gse_accessions if accession in found]
+
+    def iter_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> Iterator[GSE]:
+        if fields is None or not ESummaryGSELoader.FIELDS.issuperset(fields):
+            return
+        uids = {}
+        for accession in dict.fromkeys(gse_accessions):
+            uid = self._series_uid(accession)
+            if uid is not None:
+                uids[uid] = accession
+        uid_list = list(uids)
+        for i in range(0, len(uid_list), ESummaryGSELoader.BATCH_SIZE):
+            batch = uid_list[i: i + ESummaryGSELoader.BATCH_SIZE]
+            try:
+                summaries = self._fetch_summaries(batch)
+            except EntrezError as e:
+                # The series of the batch are left to the next loader
+                LOADER_ERRORS.inc(loader=type(self).__name__, exception=type(e).__name__)
+                logger.exception(f"Failed to fetch summaries of {len(batch)} GEO series")
+                continue
+            for uid in batch:
+                summary = summaries.get(uid)
+                if summary is not None and summary.get("accession") == uids[uid]:
+                    yield project(self._to_gse(summary), fields)
+
+    @staticmethod
+    def _series_uid(accession: str) -> Optional[str]:
+        """
+        :return: GEO DataSets UID of the series, or None if the accession is not a series accession.
+        """
+        number = accession[3:]
+        if not accession.startswith("GSE") or not number.isdigit():
+            return None
+        return str(ESummaryGSELoader.SERIES_UID_OFFSET + int(number))
+
+    def _fetch_summaries(self, uids: List[str]) -> Dict[str, Dict]:
+        """
+        Fetches the ESummary document summaries of GEO DataSets entries.
+
+        :param uids: UIDs of the entries.
+        :return: Dictionary that maps the UIDs to their summaries.
+        """
+        response = self.entrez.request_json("ESummary", EntrezClient.ESUMMARY_REQUEST_URL,
+                                            params={"db": "gds", "retmode": "json"},
+                                            data={"id": ",".join(uids)})
+        return self._parse_summaries(response)
+
+    @staticmethod
+    def _parse_summaries(esummary_response: Dict) -> Dict[str, Dict]:
+        """
+        Extracts the document summaries from an ESummary JSON response.
+
+        :param esummary_response: Parsed ESummary response.
+        :return: Dictionary that maps the UIDs to their summaries.
+        """
+        if "error" in esummary_response:
+            raise EntrezError("Error when fetching GEO summaries")
+        result = esummary_response.get("result", {})
+        return {uid: result[uid] for uid in result.get("uids", []) if uid in result}
+
+    @staticmethod
+    def _to_gse(summary: Dict) -> GSE:
+        """
+        Creates a GSE object from an ESummary document summary, with values
+        formatted as in GEOmetadb.
+        """
+        pubmed_ids = summary.get("pubmedids") or []
+        return GSE(
+            gse=summary.get("accession"),
+            title=summary.get("title"),
+            summary=summary.get("summary"),
+            type=ESummaryGSELoader.GEOMETADB_SEPARATOR.join(
+                series_type.strip() for series_type in summary.get("gdstype", "").split(";") if series_type.strip()
+            ) or None,
+            pubmed_id=int(pubmed_ids[0]) if pubmed_ids else None,
+            status=ESummaryGSELoader._format_status(summary.get("pdat", "")),
+        )
+
+    @staticmethod
+    def _format_status(public_date: str) -> Optional[str]:
+        """
+        Formats the public date of a series ("2018/11/19") as a GEOmetadb
+        status ("Public on Nov 19 2018"). ESummary only returns public series.
+        """
+        try:
+            date = datetime.strptime(public_date, ESummaryGSELoader.ESUMMARY_DATE_FORMAT)
+        except ValueError:
+            return None
+        return f"Public on {date.strftime(ESummaryGSELoader.STATUS_DATE_FORMAT)}"
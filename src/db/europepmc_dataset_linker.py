@@ -1,4 +1,5 @@
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 import requests
 from src.exception.europepmc_error import EuropePMCError
 from src.db.paper_dataset_linker import PaperDatasetLinker
@@ -11,8 +12,16 @@ class EuropePMCDatasetLinker(PaperDatasetLinker):
     )
     BATCH_SIZE = 8
 
-    def __init__(self, http_session: requests.Session):
+    def __init__(self, http_session: requests.Session, max_concurrent_requests: int = 1):
+        """
+        :param http_session: Session used for requests to the annotations API.
+        :param max_concurrent_requests: Maximum number of batches that are
+        fetched at the same time. 1 fetches the batches one after another.
+        """
+        if max_concurrent_requests < 1:
+            raise ValueError("max_concurrent_requests must be at least 1")
         self.http_session = http_session
+        self.max_concurrent_requests = max_concurrent_requests
 
     def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
         """
@@ -22,6 +31,12 @@ class EuropePMCDatasetLinker(PaperDatasetLinker):
         accessions.
         :return: List of GEO acessions associated with the papers.
         """
+        accessions_by_paper = self.link_to_datasets_by_paper(pubmed_ids)
+        accessions = itertools.chain.from_iterable(accessions_by_paper.values())
+        # There may multiple annotations for the same GEO accession
+        return list(set(accessions))
+
+    def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
         # There is no explicit rate limit for EuropePMC
         if not pubmed_ids:
             raise ValueError("At least one valid PubMed ID is required")
@@ -30,45 +45,81 @@ class EuropePMCDatasetLinker(PaperDatasetLinker):
             pubmed_ids[i: i + batch_size]
             for i in range(0, len(pubmed_ids), batch_size)
         ]
-        accession_batches = (
-            self._fetch_geo_accession_batch(batch) for batch in batches
-        )
-        accessions = itertools.chain.from_iterable(accession_batches)
-        # There may multiple annotations for the same GEO accession
-        return list(set(accessions))
+        accessions_by_paper: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        for batch_accessions in self._fetch_geo_accession_batches(batches):
+            for pubmed_id, accessions in batch_accessions.items():
+                accessions_by_paper.setdefault(pubmed_id, []).extend(accessions)
+        return {pubmed_id: list(dict.fromkeys(accessions)) for pubmed_id, accessions in accessions_by_paper.items()}
+
+    def _fetch_geo_accession_batches(self, batches: List[List[str]]) -> List[Dict[str, List[str]]]:
+        """
+        Fetches GEO references for several batches of papers, running at most
+        `max_concurrent_requests` requests at the same time.
+
+        :param batches: Batches of PubMed IDs (max 8 papers per batch).
+        :return: GEO accessions of the papers in each batch, in the same order as the batches.
+        """
+        workers = min(self.max_concurrent_requests, len(batches))
+        if workers <= 1:
+            return [self._fetch_geo_accession_batch(batch) for batch in batches]
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="europepmc")
+        try:
+            # map re-raises the EuropePMCError of the first failed batch
+            return list(executor.map(self._fetch_geo_accession_batch, batches))
+        finally:
+            # Don't start the remaining batches once one of them has failed
+            executor.shutdown(cancel_futures=True)
 
-    def _fetch_geo_accession_batch(self, pubmed_ids: List[str]) -> List[str]:
+    def _fetch_geo_accession_batch(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
         """
         Fetches GEO references in a list of papers (max 8 papers) from EuropePMC's
         annotations API.
 
         :param pubmed_ids: PubMed IDs of the papers for which to fetch GEO dataset
         accessions.
-        :return: List of GEO acessions associated with the papers.
+        :return: Dictionary that maps PubMed IDs of the papers to the GEO acessions
+        mentioned in them.
         """
-        article_ids = ",".join([f"MED:{pubmed_id}" for pubmed_id in pubmed_ids])
         try:
-            pmc_response = self.http_session.get(
-                EuropePMCDatasetLinker.EUROPEPMC_URL,
-                params={
-                    "articleIds": article_ids,
-                    "type": "Accession Numbers",
-                    "subType": "geo",
-                    "format": "json",
-                },
-            )
+            pmc_response = self.http_session.get(EuropePMCDatasetLinker.EUROPEPMC_URL,
+                                                 params=self._request_params(pubmed_ids))
             pmc_response.raise_for_status()
-            accessions = [
-                annotation["exact"]
-                for article in pmc_response.json()
-                for annotation in article["annotations"]
-            ]
-            return accessions
+            return self._parse_geo_accessions(pmc_response.json())
         except requests.HTTPError as e:
             raise EuropePMCError(
                 f"EuropePMC Annotations API status {e.response.status_code}"
             )
         except requests.RequestException:
             raise EuropePMCError("Network error during EuropePMC API call")
+
+    @staticmethod
+    def _request_params(pubmed_ids: List[str]) -> Dict[str, str]:
+        """
+        :return: Query parameters of the annotations API request for a batch of papers.
+        """
+        return {
+            "articleIds": ",".join([f"MED:{pubmed_id}" for pubmed_id in pubmed_ids]),
+            "type": "Accession Numbers",
+            "subType": "geo",
+            "format": "json",
+        }
+
+    @staticmethod
+    def _parse_geo_accessions(articles: List[Dict]) -> Dict[str, List[str]]:
+        """
+        Extracts the GEO accessions mentioned in each paper from a response of
+        the annotations API.
+
+        :param articles: Parsed JSON response.
+        :return: Dictionary that maps PubMed IDs of the papers to the GEO acessions
+        mentioned in them.
+        """
+        try:
+            accessions: Dict[str, List[str]] = {}
+            for article in articles:
+                accessions.setdefault(str(article["extId"]), []).extend(
+                    annotation["exact"] for annotation in article["annotations"]
+                )
+            return accessions
         except KeyError:
             raise EuropePMCError("Malformed response from EuropePMC API")
@@ -0,0 +1,50 @@
+import json
+from typing import Dict, List, Optional
+
+from src.config.config import Config
+from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
+
+
+class GEOmetadbDatasetLinker(PaperDatasetLinker):
+    """
+    Links papers to the GEO series that reference them in the `pubmed_id`
+    column of the GEOmetadb `gse` table. The lookup is a local indexed query,
+    but GEOmetadb only knows the primary publication of each series and
+    misses series that are newer than the database.
+    """
+
+    def __init__(self, config: Config, connections: Optional[ReadOnlySQLiteConnections] = None) -> None:
+        """
+        :param config: Service configuration.
+        :param connections: Read-only GEOmetadb connections shared with other
+        components. Connections with the settings from the configuration are
+        created if not provided.
+        """
+        self.connections = connections or ReadOnlySQLiteConnections(
+            config.geometadb_path, config.geometadb_mmap_size, config.geometadb_cache_size,
+            config.geometadb_swap_check_interval, config.geometadb_max_connections
+        )
+
+    def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        accessions_by_paper = self.link_to_datasets_by_paper(pubmed_ids)
+        return list(dict.fromkeys(acc for accessions in accessions_by_paper.values() for acc in accessions))
+
+    def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        pubmed_ids = list(dict.fromkeys(pubmed_ids))
+        accessions_by_paper: Dict[str, List[str]] = {pubmed_id: [] for pubmed_id in pubmed_ids}
+        # pubmed_id is an integer column, so the IDs are compared as integers to use its index
+        numeric_ids = [int(pubmed_id) for pubmed_id in pubmed_ids if pubmed_id.isdigit()]
+        if not numeric_ids:
+            return accessions_by_paper
+
+        with self.connections.reader() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pubmed_id, gse FROM gse WHERE pubmed_id IN (SELECT value FROM json_each(?))",
+                           (json.dumps(numeric_ids),))
+            for pubmed_id, accession in cursor.fetchall():
+                if accession:
+                    accessions_by_paper.setdefault(str(pubmed_id), []).append(accession)
+        return accessions_by_paper
@@ -1,21 +1,33 @@
-from typing import List
-import sqlite3
+from typing import List, Optional
 import json
 from src.config.config import Config
-from src.db.gse import GSE
+from src.db.gse import FIELD_NAMES, GSE
 from src.db.gse_loader import GSELoader
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
 
 
 class GEOmetadbGSELoader(GSELoader):
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, connections: Optional[ReadOnlySQLiteConnections] = None) -> None:
+        """
+        :param config: Service configuration.
+        :param connections: Read-only GEOmetadb connections shared with other
+        components. Connections with the settings from the configuration are
+        created if not provided.
+        """
         self.geometadb_path = config.geometadb_path
+        self.connections = connections or ReadOnlySQLiteConnections(
+            config.geometadb_path, config.geometadb_mmap_size, config.geometadb_cache_size,
+            config.geometadb_swap_check_interval, config.geometadb_max_connections
+        )
 
-    def load_gses(self, gse_accessions: List[str]) -> List[GSE]:
+    def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
         if not gse_accessions:
             return []
-        with sqlite3.connect(self.geometadb_path) as conn:
+        # Only the requested columns are read, which skips the long text columns of lightweight queries
+        columns = fields or FIELD_NAMES
+        with self.connections.reader() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM gse WHERE gse IN (SELECT value FROM json_each(?))",
+            cursor.execute(f"SELECT {', '.join(columns)} FROM gse WHERE gse IN (SELECT value FROM json_each(?))",
                            (json.dumps(gse_accessions),))
             results = cursor.fetchall()
-            return [GSE(*result) for result in results]
+            return [GSE(**dict(zip(columns, result))) for result in results]
@@ -0,0 +1,57 @@
+from dataclasses import fields
+from typing import Iterator, Optional
+
+from src.config.config import Config
+from src.db.gsm import GSM
+from src.db.gsm_loader import GSMLoader
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
+
+
+class GEOmetadbGSMLoader(GSMLoader):
+    """
+    Loads the samples of a series from GEOmetadb through the `gse_gsm` table,
+    which also links samples that belong to several series.
+
+    Samples are read in pages of `page_size` rows with keyset pagination
+    (`gsm > last accession`), which the (gse, gsm) index serves without
+    sorting, so memory use doesn't depend on the number of samples.
+    """
+
+    GSM_COLUMNS = ", ".join(f"gsm.{f.name}" for f in fields(GSM))
+    # Position of the sample accession in the selected columns
+    GSM_INDEX = [f.name for f in fields(GSM)].index("gsm")
+
+    def __init__(self, config: Config, connections: Optional[ReadOnlySQLiteConnections] = None,
+                 page_size: int = 500) -> None:
+        """
+        :param config: Service configuration.
+        :param connections: Read-only GEOmetadb connections shared with other
+        components. Connections with the settings from the configuration are
+        created if not provided.
+        :param page_size: Number of samples read from GEOmetadb at once.
+        """
+        self.connections = connections or ReadOnlySQLiteConnections(
+            config.geometadb_path, config.geometadb_mmap_size, config.geometadb_cache_size,
+            config.geometadb_swap_check_interval, config.geometadb_max_connections
+        )
+        self.page_size = page_size
+
+    def iter_gsms(self, gse_accession: str, after: Optional[str] = None,
+                  limit: Optional[int] = None) -> Iterator[GSM]:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            page_size = self.page_size if remaining is None else min(self.page_size, remaining)
+            with self.connections.reader() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT {self.GSM_COLUMNS} FROM gse_gsm JOIN gsm ON gsm.gsm = gse_gsm.gsm
+                    WHERE gse_gsm.gse = ? AND gse_gsm.gsm > ?
+                    ORDER BY gse_gsm.gsm LIMIT ?""", (gse_accession, after or "", page_size))
+                rows = cursor.fetchall()
+            for row in rows:
+                yield GSM(*row)
+            if len(rows) < page_size:
+                return
+            after = rows[-1][self.GSM_INDEX]
+            if remaining is not None:
+                remaining -= len(rows)
@@ -0,0 +1,150 @@
+"""
+Audit of the query plans of the GEOmetadb queries issued by the service.
+
+The stock GEOmetadb download doesn't guarantee the indexes these queries
+need, and SQLite silently falls back to full table scans without them.
+Every hot query is registered here together with the indexes that serve it,
+so missing indexes can be detected at startup and created by running::
+
+    python -m src.db.geometadb_indexes --create
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from src.config.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    """A query issued by the service on the request path."""
+
+    name: str
+    sql: str
+    parameters: Tuple
+    # Statements that create the indexes the query needs to avoid full scans
+    indexes: Tuple[str, ...]
+
+
+HOT_QUERIES: List[HotQuery] = [
+    HotQuery(
+        name="GSE by accession",
+        sql="SELECT * FROM gse WHERE gse IN (SELECT value FROM json_each(?))",
+        parameters=('["GSE1"]',),
+        indexes=("CREATE INDEX IF NOT EXISTS gse_gse_idx ON gse (gse)",),
+    ),
+    HotQuery(
+        name="GSE by PubMed ID",
+        sql="SELECT pubmed_id, gse FROM gse WHERE pubmed_id IN (SELECT value FROM json_each(?))",
+        parameters=("[1]",),
+        # Covers both selected columns, so the table itself isn't read
+        indexes=("CREATE INDEX IF NOT EXISTS gse_pubmed_id_gse_idx ON gse (pubmed_id, gse)",),
+    ),
+    HotQuery(
+        name="Samples by series",
+        sql="""SELECT gsm.* FROM gse_gsm JOIN gsm ON gsm.gsm = gse_gsm.gsm
+                 WHERE gse_gsm.gse = ? AND gse_gsm.gsm > ? ORDER BY gse_gsm.gsm LIMIT ?""",
+        parameters=("GSE1", "", 500),
+        # The (gse, gsm) index serves both the filter and the order of the keyset pagination
+        indexes=("CREATE INDEX IF NOT EXISTS gse_gsm_gse_gsm_idx ON gse_gsm (gse, gsm)",
+                 "CREATE INDEX IF NOT EXISTS gsm_gsm_idx ON gsm (gsm)"),
+    ),
+]
+
+
+class MissingIndexError(RuntimeError):
+    """
+    Raised when a hot query would scan a whole GEOmetadb table.
+    """
+
+
+def find_table_scans(conn: sqlite3.Connection) -> Dict[str, List[str]]:
+    """
+    Finds hot queries whose query plans contain full table scans. Query plans
+    cached by the connection don't see indexes created by other connections
+    afterward, so audits after creating indexes need a new connection.
+
+    :param conn: Connection to GEOmetadb.
+    :return: Dictionary that maps names of the queries that scan tables to the offending plan steps.
+    """
+    scans = {}
+    for query in HOT_QUERIES:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {query.sql}", query.parameters).fetchall()
+        details = [detail for *_, detail in plan if _is_table_scan(detail)]
+        if details:
+            scans[query.name] = details
+    return scans
+
+
+def _is_table_scan(plan_detail: str) -> bool:
+    # "SCAN gse" and "SCAN gse USING COVERING INDEX ..." read a whole table or index, while
+    # "SCAN json_each VIRTUAL TABLE ..." and "SCAN CONSTANT ROW" don't touch GEOmetadb tables
+    return (plan_detail.startswith("SCAN ") and "VIRTUAL TABLE" not in plan_detail
+            and plan_detail != "SCAN CONSTANT ROW")
+
+
+def check_indexes(conn: sqlite3.Connection, strict: bool) -> None:
+    """
+    Checks that no hot query scans a whole table. Problems are logged as
+    errors, or raised if `strict` is set.
+
+    :param conn: Connection to GEOmetadb.
+    :param strict: Whether to raise an exception instead of logging.
+    """
+    scans = find_table_scans(conn)
+    if not scans:
+        return
+    message = ("GEOmetadb is missing indexes, these queries will scan whole tables: "
+               + "; ".join(f"{name} ({', '.join(details)})" for name, details in scans.items())
+               + ". Run `python -m src.db.geometadb_indexes --create` to create them.")
+    if strict:
+        raise MissingIndexError(message)
+    logger.error(message)
+
+
+def create_missing_indexes(geometadb_path: str) -> List[str]:
+    """
+    Creates the indexes of the hot queries that scan whole tables.
+
+    :param geometadb_path: Path to GEOmetadb.
+    :return: Names of the queries for which indexes were created.
+    """
+    with sqlite3.connect(geometadb_path) as conn:
+        scans = find_table_scans(conn)
+        for query in HOT_QUERIES:
+            if query.name in scans:
+                for index in query.indexes:
+                    logger.info(f"Creating index for query {query.name}: {index}")
+                    conn.execute(index)
+    return list(scans)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Check that GEOmetadb has the indexes the service needs.")
+    parser.add_argument("--create", action="store_true", help="create missing indexes")
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    parser.add_argument("--path", help="path to GEOmetadb, overrides the configuration")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    geometadb_path = args.path or Config(test=args.test).geometadb_path
+    if args.create:
+        create_missing_indexes(geometadb_path)
+    with sqlite3.connect(geometadb_path) as conn:
+        scans = find_table_scans(conn)
+    for name, details in scans.items():
+        print(f"{name}: {', '.join(details)}")
+    if scans:
+        return 1
+    print("All queries use indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
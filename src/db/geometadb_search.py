@@ -0,0 +1,188 @@
+"""
+Full-text search over the titles, summaries and overall designs of the
+series in GEOmetadb.
+
+The search index is an FTS5 table `gse_fts` whose rowids are the numbers of
+the GSE accessions (GSE12345 -> 12345). Triggers on the `gse` table keep it
+in sync with every later write, including the series that `NCBIGSELoader`
+saves. The index isn't part of the stock GEOmetadb download and is built by
+running::
+
+    python -m src.db.geometadb_search --create
+"""
+
+import argparse
+import logging
+import re
+import sqlite3
+import sys
+from typing import List, Optional
+
+from src.config.config import Config
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "gse_fts"
+# The columns are weighted in this order by the BM25 ranking
+FTS_COLUMNS = ("title", "summary", "overall_design")
+BM25_WEIGHTS = (10.0, 2.0, 1.0)
+
+# Numbers of the accessions, rows of other entities in the gse table are not indexed
+_ROWID = "CAST(substr({row}.gse, 4) AS INTEGER)"
+_INDEXED = "{row}.gse GLOB 'GSE[0-9]*'"
+
+_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+            {", ".join(FTS_COLUMNS)}, tokenize = 'porter unicode61 remove_diacritics 2')""",
+    # Series are written with INSERT OR REPLACE, and the gse table has no unique
+    # constraint on the accession, so the index entry of the accession is replaced
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON gse
+        WHEN {_INDEXED.format(row="new")} BEGIN
+            INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)})
+            VALUES ({_ROWID.format(row="new")}, {", ".join(f"new.{c}" for c in FTS_COLUMNS)});
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update AFTER UPDATE OF gse, {", ".join(FTS_COLUMNS)} ON gse
+        BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = {_ROWID.format(row="old")} AND {_INDEXED.format(row="old")};
+            INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)})
+            SELECT {_ROWID.format(row="new")}, {", ".join(f"new.{c}" for c in FTS_COLUMNS)}
+            WHERE {_INDEXED.format(row="new")};
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON gse
+        WHEN {_INDEXED.format(row="old")} BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = {_ROWID.format(row="old")};
+        END""",
+]
+
+
+class SearchIndexMissingError(RuntimeError):
+    """
+    Raised when GEOmetadb has no full-text search index.
+    """
+
+
+def create_search_index(geometadb_path: str, rebuild: bool = False) -> int:
+    """
+    Creates the full-text search index and its triggers, and indexes the
+    series already in GEOmetadb. Existing indexes are kept unless `rebuild`
+    is set, since the triggers keep them up to date.
+
+    :param geometadb_path: Path to GEOmetadb.
+    :param rebuild: Whether to drop and rebuild an existing index.
+    :return: Number of indexed series.
+    """
+    with sqlite3.connect(geometadb_path) as conn:
+        exists = has_search_index(conn)
+        if exists and rebuild:
+            logger.info(f"Dropping the {FTS_TABLE} search index")
+            conn.execute(f"DROP TABLE {FTS_TABLE}")
+            exists = False
+        for statement in _SCHEMA:
+            conn.execute(statement)
+        if not exists:
+            logger.info(f"Indexing the series in {geometadb_path}")
+            # Later rows of duplicated accessions replace the earlier ones, as in the triggers
+            conn.execute(f"""
+                INSERT OR REPLACE INTO {FTS_TABLE} (rowid, {", ".join(FTS_COLUMNS)})
+                SELECT {_ROWID.format(row="gse")}, {", ".join(FTS_COLUMNS)} FROM gse
+                WHERE {_INDEXED.format(row="gse")} ORDER BY rowid""")
+            conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return conn.execute(f"SELECT count(*) FROM {FTS_TABLE}").fetchone()[0]
+
+
+def has_search_index(conn: sqlite3.Connection) -> bool:
+    """
+    :param conn: Connection to GEOmetadb.
+    :return: Whether GEOmetadb has the full-text search index.
+    """
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (FTS_TABLE,)).fetchone() is not None
+
+
+def to_match_query(query: str) -> str:
+    """
+    Converts a keyword query to an FTS5 query that matches series containing
+    all of the words. Every word is quoted, so FTS5 operators and special
+    characters in the query are searched for literally instead of being
+    interpreted.
+
+    :param query: Keyword query, e.g. "human microglia".
+    :return: FTS5 query, e.g. '"human" "microglia"'.
+    :raises ValueError: If the query contains no words.
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        raise ValueError("The search query must contain at least one word")
+    return " ".join(f'"{word}"' for word in words)
+
+
+class GEOmetadbSearch:
+    """
+    Finds series by keywords with the full-text search index, ranked by BM25
+    with titles weighted above summaries and overall designs.
+    """
+
+    def __init__(self, config: Config, connections: Optional[ReadOnlySQLiteConnections] = None) -> None:
+        """
+        :param config: Service configuration.
+        :param connections: Read-only GEOmetadb connections shared with other
+        components. Connections with the settings from the configuration are
+        created if not provided.
+        """
+        self.connections = connections or ReadOnlySQLiteConnections(
+            config.geometadb_path, config.geometadb_mmap_size, config.geometadb_cache_size,
+            config.geometadb_swap_check_interval, config.geometadb_max_connections
+        )
+
+    def search(self, query: str, limit: int, offset: int = 0) -> List[str]:
+        """
+        Finds the series that contain all words of the query.
+
+        :param query: Keyword query.
+        :param limit: Maximum number of series to return.
+        :param offset: Number of best ranked series to skip.
+        :return: Accessions of the series, best ranked first.
+        :raises ValueError: If the query contains no words.
+        :raises SearchIndexMissingError: If GEOmetadb has no search index.
+        """
+        match_query = to_match_query(query)
+        with self.connections.reader() as conn:
+            try:
+                cursor = conn.execute(f"""
+                    SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?
+                    ORDER BY bm25({FTS_TABLE}, {", ".join(map(str, BM25_WEIGHTS))}) LIMIT ? OFFSET ?""",
+                                      (match_query, limit, offset))
+                return [f"GSE{rowid}" for rowid, in cursor.fetchall()]
+            except sqlite3.OperationalError:
+                if not has_search_index(conn):
+                    raise SearchIndexMissingError(
+                        "GEOmetadb has no search index, run `python -m src.db.geometadb_search --create`")
+                raise
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the full-text search index of GEOmetadb series.")
+    parser.add_argument("--create", action="store_true", help="create the index if it doesn't exist")
+    parser.add_argument("--rebuild", action="store_true", help="drop and rebuild an existing index")
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    parser.add_argument("--path", help="path to GEOmetadb, overrides the configuration")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    geometadb_path = args.path or Config(test=args.test).geometadb_path
+    if args.create or args.rebuild:
+        count = create_search_index(geometadb_path, rebuild=args.rebuild)
+        print(f"{count} series are indexed")
+        return 0
+    with sqlite3.connect(geometadb_path) as conn:
+        if not has_search_index(conn):
+            print("GEOmetadb has no search index")
+            return 1
+        count = conn.execute(f"SELECT count(*) FROM {FTS_TABLE}").fetchone()[0]
+    print(f"{count} series are indexed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+"""
+Incremental refresh of the series in GEOmetadb from NCBI GEO.
+
+Series created or updated since the last sync are found with ESearch on the
+GEO DataSets (gds) database, downloaded in rate-limited batches and upserted
+into GEOmetadb, one transaction per batch::
+
+    python -m src.db.geometadb_sync
+
+The first sync starts from the newest ISO `last_update_date` in GEOmetadb. Every
+completed sync records the date it started on, and the next one starts from
+there, since series downloaded on demand by the app would move the newest
+`last_update_date` past series that haven't been synced yet. Series that
+failed to download or to be written are recorded with that date and retried
+by the next sync, until they are written. An interrupted sync is repeated from
+the same date. A sync that wrote series rebuilds the GSE record index, which
+running apps reload.
+"""
+
+import argparse
+import logging
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+from src.config.config import Config
+from src.db.entrez_client import EntrezClient
+from src.db.esummary_gse_loader import ESummaryGSELoader
+from src.db.gse import GSE
+from src.db.gse_record_index import build_gse_record_index
+from src.db.http_session import PooledHTTPSession
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.exception.geo_error import GEOError
+
+logger = logging.getLogger(__name__)
+
+
+class GEOmetadbSync:
+    """
+    Finds the series modified since a date and writes their current versions
+    to GEOmetadb with `NCBIGSELoader`.
+    """
+
+    TABLE = "geometadb_sync"
+    FAILURES_TABLE = "geometadb_sync_failures"
+    # Maximum number of UIDs returned by one ESearch request
+    ESEARCH_PAGE_SIZE = 10000
+    ENTREZ_DATE_FORMAT = "%Y/%m/%d"
+
+    def __init__(self, config: Config, entrez: EntrezClient, loader: NCBIGSELoader, batch_size: int) -> None:
+        """
+        :param config: Service configuration.
+        :param entrez: Client for the E-utilities, shares the rate limiter with the loader.
+        :param loader: Loader that downloads and writes the series, without write-behind.
+        :param batch_size: Number of series downloaded and written to GEOmetadb at once.
+        :raises ValueError: If the loader writes behind, so that failed writes can't be retried.
+        """
+        if loader.write_queue is not None:
+            raise ValueError("The sync must write the series without write-behind")
+        self.geometadb_path = config.geometadb_path
+        self.gse_index_path = config.gse_index_path
+        self.state_path = config.cache_path
+        self.entrez = entrez
+        self.loader = loader
+        self.batch_size = batch_size
+        self._create_table()
+
+    def sync(self, since: Optional[date] = None, dry_run: bool = False) -> Dict[str, int]:
+        """
+        Downloads the series modified since the given date, and the series
+        that failed in the previous sync, and upserts them.
+
+        :param since: First modification date to sync, see `start_date` if None.
+        :param dry_run: Whether to only find the series without downloading them.
+        :return: Numbers of series found, retried from the previous sync, written
+        and failed to download or to be written.
+        """
+        started_on = date.today()
+        since = since or self.start_date()
+        found = self.find_modified_series(since, started_on)
+        found_set = set(found)
+        retried = [accession for accession in self.failed_accessions() if accession not in found_set]
+        accessions = found + retried
+        logger.info(f"Found {len(found)} GEO series modified since {since}, retrying {len(retried)} failed ones")
+        stats = {"found": len(found), "retried": len(retried), "written": 0, "failed": 0}
+        if dry_run:
+            return stats
+
+        failed = []
+        for i in range(0, len(accessions), self.batch_size):
+            batch = accessions[i: i + self.batch_size]
+            gses = self._download(batch)
+            if gses:
+                try:
+                    self.loader.save_gses(gses)
+                except sqlite3.Error:
+                    logger.exception(f"Failed to write {len(gses)} GEO series, they are retried by the next sync")
+                    gses = []
+            written = {gse.gse for gse in gses}
+            failed.extend(accession for accession in batch if accession not in written)
+            stats["written"] += len(gses)
+            logger.info(f"Synced {min(i + self.batch_size, len(accessions))} of {len(accessions)} GEO series")
+
+        stats["failed"] = len(failed)
+        self._store_result(started_on, failed)
+        if stats["written"]:
+            self._rebuild_index()
+        return stats
+
+    def start_date(self) -> date:
+        """
+        :return: Date the last completed sync started on, or the newest
+        `last_update_date` in GEOmetadb if no sync has completed.
+        :raises ValueError: If GEOmetadb has no series with ISO update dates.
+        """
+        with sqlite3.connect(self.state_path) as conn:
+            row = conn.execute(f"SELECT synced_on FROM {self.TABLE} WHERE geometadb_path = ?",
+                               (self.geometadb_path,)).fetchone()
+        if row is not None:
+            return date.fromisoformat(row[0])
+        with sqlite3.connect(f"file:{self.geometadb_path}?mode=ro", uri=True) as conn:
+            # Series saved before dates were formatted as in GEOmetadb have SOFT dates ("Dec 31 2019"),
+            # which sort after every ISO date
+            latest, = conn.execute("""
+                SELECT MAX(last_update_date) FROM gse
+                WHERE last_update_date GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'""").fetchone()
+        if latest is None:
+            raise ValueError("GEOmetadb has no series with update dates, pass the start date explicitly")
+        return datetime.strptime(latest, NCBIGSELoader.GEOMETADB_DATE_FORMAT).date()
+
+    def failed_accessions(self) -> List[str]:
+        """
+        :return: Accessions of the series that failed in the last completed sync.
+        """
+        with sqlite3.connect(self.state_path) as conn:
+            rows = conn.execute(f"SELECT gse FROM {self.FAILURES_TABLE} WHERE geometadb_path = ? ORDER BY gse",
+                                (self.geometadb_path,)).fetchall()
+        return [gse for gse, in rows]
+
+    def find_modified_series(self, since: date, until: date) -> List[str]:
+        """
+        Finds the series whose GEO DataSets entries were modified in the period.
+
+        :param since: First modification date, inclusive.
+        :param until: Last modification date, inclusive.
+        :return: Accessions of the series.
+        """
+        accessions = []
+        retstart = 0
+        while True:
+            result = self.entrez.request_json("ESearch", EntrezClient.ESEARCH_REQUEST_URL, {
+                "db": "gds",
+                "term": "GSE[ETYP]",
+                "datetype": "mdat",
+                "mindate": since.strftime(self.ENTREZ_DATE_FORMAT),
+                "maxdate": until.strftime(self.ENTREZ_DATE_FORMAT),
+                "retstart": retstart,
+                "retmax": self.ESEARCH_PAGE_SIZE,
+                "retmode": "json",
+            }).get("esearchresult", {})
+            uids = result.get("idlist", [])
+            accessions.extend(filter(None, map(self._series_accession, uids)))
+            retstart += len(uids)
+            if not uids or retstart >= int(result.get("count", 0)):
+                return list(dict.fromkeys(accessions))
+
+    @staticmethod
+    def _series_accession(uid: str) -> Optional[str]:
+        """
+        :return: Accession of the series with the GEO DataSets UID, or None if the UID isn't a series UID.
+        """
+        number = int(uid) - ESummaryGSELoader.SERIES_UID_OFFSET
+        return f"GSE{number}" if 0 < number < ESummaryGSELoader.SERIES_UID_OFFSET else None
+
+    def _download(self, accessions: List[str]) -> List[GSE]:
+        """
+        Downloads the series in parallel. Series that fail to download are
+        logged and skipped, so that one of them can't stop the sync.
+        """
+        def download(accession: str) -> Optional[GSE]:
+            try:
+                return self.loader.download_geo_dataset(accession)
+            except GEOError as e:
+                logger.warning(f"Skipping {accession}: {e}")
+                return None
+
+        executor = ThreadPoolExecutor(max_workers=min(self.loader.max_connections, len(accessions)),
+                                      thread_name_prefix="geometadb-sync")
+        try:
+            return [gse for gse in executor.map(download, accessions) if gse is not None]
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _rebuild_index(self) -> None:
+        """
+        Rebuilds the GSE record index, so that running apps stop serving the
+        old versions of the written series once they reload it. A failed
+        rebuild is only logged, since the series are already written.
+        """
+        try:
+            count = build_gse_record_index(self.geometadb_path, self.gse_index_path)
+            logger.info(f"Rebuilt the GSE record index {self.gse_index_path} with {count} series")
+        except (OSError, sqlite3.Error):
+            logger.exception(f"Failed to rebuild the GSE record index {self.gse_index_path}")
+
+    def _create_table(self) -> None:
+        with sqlite3.connect(self.state_path) as conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                    geometadb_path TEXT PRIMARY KEY,
+                    synced_on TEXT NOT NULL
+                )""")
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS {self.FAILURES_TABLE} (
+                    geometadb_path TEXT NOT NULL,
+                    gse TEXT NOT NULL,
+                    PRIMARY KEY (geometadb_path, gse)
+                )""")
+
+    def _store_result(self, started_on: date, failed: List[str]) -> None:
+        """
+        Records the start date of a completed sync and replaces the failed
+        series of the previous sync with its own, in one transaction.
+        """
+        with sqlite3.connect(self.state_path) as conn:
+            conn.execute(f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?)",
+                         (self.geometadb_path, started_on.isoformat()))
+            conn.execute(f"DELETE FROM {self.FAILURES_TABLE} WHERE geometadb_path = ?", (self.geometadb_path,))
+            conn.executemany(f"INSERT OR IGNORE INTO {self.FAILURES_TABLE} VALUES (?, ?)",
+                             [(self.geometadb_path, accession) for accession in failed])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Download the GEO series modified since the last sync to GEOmetadb.")
+    parser.add_argument("--since", type=date.fromisoformat,
+                        help="first modification date to sync (YYYY-MM-DD), overrides the date of the last sync")
+    parser.add_argument("--dry-run", action="store_true", help="only count the modified series")
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    parser.add_argument("--path", help="path to GEOmetadb, overrides the configuration")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    config = Config(test=args.test)
+    if args.path:
+        config.geometadb_path = args.path
+        config.gse_index_path = f"{args.path}.gseidx"
+    rate_limiter = TokenBucketRateLimiter(config.ncbi_requests_per_second)
+    with PooledHTTPSession(config.http_pool_connections, config.http_pool_maxsize) as session:
+        entrez = EntrezClient(session, rate_limiter, config.ncbi_api_key)
+        loader = NCBIGSELoader(session, config, rate_limiter)
+        stats = GEOmetadbSync(config, entrez, loader, config.sync_batch_size).sync(args.since, args.dry_run)
+    print(f"{stats['found']} series found, {stats['retried']} retried, {stats['written']} written, "
+          f"{stats['failed']} failed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
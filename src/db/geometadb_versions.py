@@ -0,0 +1,214 @@
+"""
+Installation of new GEOmetadb versions without restarting the app.
+
+The configured `geometadb_path` is a symlink to a version of GEOmetadb kept
+in the `geometadb-versions` directory next to it, numbered in the order the
+versions were prepared. A new version is installed
+in two steps::
+
+    python -m src.db.geometadb_versions prepare ~/Downloads/GEOmetadb.sqlite.gz
+    python -m src.db.geometadb_versions activate
+
+`prepare` copies (or decompresses) the file next to the active one and
+creates the indexes the service needs, so that the app can use it as is.
+`activate` reads the file into the OS page cache, switches the symlink
+atomically and rebuilds the series index. Running app processes switch their
+readers within `geometadb_swap_check_interval_seconds`, and queries that are
+running finish on the old version. Versions beyond the most recent ones are
+then deleted: processes that still read them keep the deleted file open, and
+its space is reclaimed once they close their last connection to it.
+
+Series written to the old version after the new one was prepared aren't in
+the new version.
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from typing import List, Optional
+
+from src.config.config import Config
+from src.db.geometadb_indexes import HOT_QUERIES, create_missing_indexes
+from src.db.geometadb_search import create_search_index
+from src.db.gse_record_index import build_gse_record_index
+
+logger = logging.getLogger(__name__)
+
+VERSIONS_DIRECTORY = "geometadb-versions"
+VERSION_PREFIX = "geometadb-"
+WARM_CHUNK_SIZE = 16 * 1024 * 1024
+
+
+def versions_directory(geometadb_path: str) -> str:
+    """
+    :param geometadb_path: Configured path to GEOmetadb.
+    :return: Directory with the versions of GEOmetadb.
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(geometadb_path)), VERSIONS_DIRECTORY)
+
+
+def list_versions(geometadb_path: str) -> List[str]:
+    """
+    :param geometadb_path: Configured path to GEOmetadb.
+    :return: Paths of the versions of GEOmetadb, oldest first.
+    """
+    directory = versions_directory(geometadb_path)
+    if not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(VERSION_PREFIX) and name.endswith(".sqlite")
+             and name[len(VERSION_PREFIX):-len(".sqlite")].isdigit()]
+    return sorted(paths, key=_version_number)
+
+
+def _version_number(version_path: str) -> int:
+    # "geometadb-versions/geometadb-0003.sqlite" -> 3
+    return int(os.path.basename(version_path)[len(VERSION_PREFIX):-len(".sqlite")])
+
+
+def active_version(geometadb_path: str) -> Optional[str]:
+    """
+    :param geometadb_path: Configured path to GEOmetadb.
+    :return: Path of the active version, or None if GEOmetadb isn't versioned yet.
+    """
+    if not os.path.islink(geometadb_path):
+        return None
+    return os.path.realpath(geometadb_path)
+
+
+def prepare_version(geometadb_path: str, source: str) -> str:
+    """
+    Copies a GEOmetadb file into the versions directory and creates the
+    indexes and the search index in it. The version is only visible once
+    it is complete.
+
+    :param geometadb_path: Configured path to GEOmetadb.
+    :param source: GEOmetadb file to install, gzip-compressed if it ends with .gz.
+    :return: Path of the new version.
+    """
+    directory = versions_directory(geometadb_path)
+    os.makedirs(directory, exist_ok=True)
+    versions = list_versions(geometadb_path)
+    number = _version_number(versions[-1]) + 1 if versions else 1
+    version_path = os.path.join(directory, f"{VERSION_PREFIX}{number:04d}.sqlite")
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".prepare.", suffix=".sqlite")
+    try:
+        with os.fdopen(fd, "wb") as target, (gzip.open if source.endswith(".gz") else open)(source, "rb") as f:
+            logger.info(f"Copying {source} to {version_path}")
+            shutil.copyfileobj(f, target, WARM_CHUNK_SIZE)
+        with sqlite3.connect(temp_path) as conn:
+            conn.execute("SELECT count(*) FROM gse").fetchone()
+        create_missing_indexes(temp_path)
+        create_search_index(temp_path)
+        # Temporary files are only readable by their owner, the app may run as another user
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, version_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+    logger.info(f"Prepared {version_path}")
+    return version_path
+
+
+def warm(version_path: str) -> None:
+    """
+    Reads the file into the OS page cache and runs the hot queries, so that
+    the first requests after the switch don't wait for the disk.
+
+    :param version_path: Path of the version.
+    """
+    logger.info(f"Warming {version_path}")
+    with open(version_path, "rb") as f:
+        while f.read(WARM_CHUNK_SIZE):
+            pass
+    with sqlite3.connect(f"file:{version_path}?mode=ro", uri=True) as conn:
+        for query in HOT_QUERIES:
+            conn.execute(query.sql, query.parameters).fetchall()
+
+
+def activate_version(geometadb_path: str, version_path: str) -> None:
+    """
+    Switches the GEOmetadb symlink to the version atomically. A regular file
+    at the configured path is first linked into the versions directory as
+    version 0, so that it stays available to the processes reading it.
+
+    :param geometadb_path: Configured path to GEOmetadb.
+    :param version_path: Path of the version to activate.
+    """
+    if os.path.exists(geometadb_path) and not os.path.islink(geometadb_path):
+        directory = versions_directory(geometadb_path)
+        os.makedirs(directory, exist_ok=True)
+        original_path = os.path.join(directory, f"{VERSION_PREFIX}{0:04d}.sqlite")
+        logger.info(f"Moving {geometadb_path} to {original_path}")
+        os.link(geometadb_path, original_path)
+    link_path = os.path.join(os.path.dirname(os.path.abspath(geometadb_path)), f".{os.getpid()}.geometadb.link")
+    os.symlink(os.path.abspath(version_path), link_path)
+    os.replace(link_path, geometadb_path)
+    logger.info(f"Activated {version_path}")
+
+
+def retire_versions(geometadb_path: str, keep: int) -> List[str]:
+    """
+    Deletes the versions older than the active one, except the `keep` most recent ones.
+
+    :param geometadb_path: Configured path to GEOmetadb.
+    :param keep: Number of previous versions to keep, e.g. to roll back to.
+    :return: Paths of the deleted versions.
+    """
+    active = active_version(geometadb_path)
+    versions = list_versions(geometadb_path)
+    if active not in versions:
+        return []
+    previous = versions[:versions.index(active)]
+    retired = previous[:max(len(previous) - keep, 0)]
+    for path in retired:
+        logger.info(f"Deleting {path}")
+        os.unlink(path)
+    return retired
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Install new versions of GEOmetadb without restarting the app.")
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    parser.add_argument("--path", help="path to GEOmetadb, overrides the configuration")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prepare = commands.add_parser("prepare", help="copy a GEOmetadb file next to the active version")
+    prepare.add_argument("source", help="GEOmetadb file, gzip-compressed if it ends with .gz")
+    activate = commands.add_parser("activate", help="switch the app to a prepared version")
+    activate.add_argument("version", nargs="?", help="path of the version, the newest one by default")
+    activate.add_argument("--keep", type=int, default=1, help="number of previous versions to keep")
+    activate.add_argument("--no-warm", action="store_true", help="don't read the version into the page cache")
+    commands.add_parser("list", help="list the versions")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    config = Config(test=args.test)
+    geometadb_path = args.path or config.geometadb_path
+    if args.command == "prepare":
+        print(prepare_version(geometadb_path, args.source))
+    elif args.command == "activate":
+        versions = list_versions(geometadb_path)
+        version_path = os.path.abspath(args.version) if args.version else (versions[-1] if versions else None)
+        if version_path is None or not os.path.isfile(version_path):
+            print("No prepared version to activate")
+            return 1
+        if not args.no_warm:
+            warm(version_path)
+        activate_version(geometadb_path, version_path)
+        # Running processes reload the series index once it is replaced
+        build_gse_record_index(version_path, f"{args.path}.gseidx" if args.path else config.gse_index_path)
+        retire_versions(geometadb_path, args.keep)
+    else:
+        active = active_version(geometadb_path)
+        for path in list_versions(geometadb_path):
+            print(f"{'*' if path == active else ' '} {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
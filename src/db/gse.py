@@ -1,7 +1,7 @@
 """Gene Expression Omnibus Series (GSE) data model."""
 
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, fields
+from typing import Iterable, List, Optional
 
 
 @dataclass
@@ -26,3 +26,36 @@ class GSE:
     variable_description: Optional[str] = None
     contact: Optional[str] = None
     supplementary_file: Optional[str] = None
+
+
+FIELD_NAMES = tuple(f.name for f in fields(GSE))
+
+
+def normalize_fields(field_names: Iterable[str]) -> List[str]:
+    """
+    Validates the names of the GSE fields to load and deduplicates them. The
+    accession is always included, since it identifies the series.
+
+    :param field_names: Names of the GSE fields.
+    :return: Field names in the order of the GSE fields.
+    :raises ValueError: If a field name is unknown.
+    """
+    field_names = set(field_names)
+    unknown = field_names.difference(FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown GSE fields: {', '.join(sorted(unknown))}")
+    field_names.add("gse")
+    return [name for name in FIELD_NAMES if name in field_names]
+
+
+def project(gse: GSE, field_names: Optional[List[str]]) -> GSE:
+    """
+    Returns a copy of the GSE object with only the given fields set.
+
+    :param gse: GSE object to project.
+    :param field_names: Names of the fields to keep, or None to keep all fields.
+    :return: Projected GSE object, or the same object if all fields are kept.
+    """
+    if field_names is None:
+        return gse
+    return GSE(**{name: getattr(gse, name) for name in field_names})
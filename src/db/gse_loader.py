@@ -1,18 +1,73 @@
 from abc import ABCMeta, abstractmethod
-from typing import Iterable, List
+from typing import Callable, Iterable, Iterator, List, Optional
 from src.db.gse import GSE
+from src.db.metrics import REGISTRY, instrument
+
+LOADER_DURATION = REGISTRY.histogram(
+    "pubtrends_datasets_gse_loader_duration_seconds",
+    "Time spent loading GEO series, by loader class and method.",
+    ["loader", "method"])
+LOADER_ERRORS = REGISTRY.counter(
+    "pubtrends_datasets_gse_loader_errors_total",
+    "Exceptions raised by the loaders and upstream failures they recorded, by loader class and exception type.",
+    ["loader", "exception"])
+LOADED_GSES = REGISTRY.counter(
+    "pubtrends_datasets_gses_loaded_total",
+    "GEO series returned by the loaders, by loader class.",
+    ["loader"])
+
+
+def _instrument(method: Callable, iterator: bool = False) -> Callable:
+    return instrument(method, LOADER_DURATION, LOADER_ERRORS, LOADED_GSES,
+                      lambda loader: {"loader": type(loader).__name__}, iterator=iterator)
 
 
 class GSELoader(metaclass=ABCMeta):
+    """
+    Loads GEO series by their accessions.
+
+    The `load_gses` and `iter_gses` methods of every loader are instrumented:
+    their durations, exceptions and numbers of loaded series are recorded in
+    the metrics of `src.db.metrics.REGISTRY`.
+    """
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for method_name, iterator in (("load_gses", False), ("iter_gses", True)):
+            method = cls.__dict__.get(method_name)
+            if method is not None and not getattr(method, "__isabstractmethod__", False):
+                setattr(cls, method_name, _instrument(method, iterator))
+
     @abstractmethod
-    def load_gses(self, gse_accessions: Iterable[str]) -> List[GSE]:
+    def load_gses(self, gse_accessions: Iterable[str], fields: Optional[List[str]] = None) -> List[GSE]:
         """
         Returns GSE objects associated with the GEO series with the acession
         numbers provided in the list
 
         :param gse_accessions: Accession numbers of the GEO series to load.
         :type gse_accessions: List[str] 
+        :param fields: Names of the GSE fields to load, normalized with
+        `normalize_fields`. Other fields are left unset. All fields are loaded if None.
+        :type fields: Optional[List[str]]
         :return: GSE objects representing the series.
         :rtype: List[GSE]
         """
         pass
+
+    def iter_gses(self, gse_accessions: Iterable[str], fields: Optional[List[str]] = None) -> Iterator[GSE]:
+        """
+        Yields GSE objects associated with the GEO series with the accession
+        numbers provided, as soon as each of them is available. The series
+        may be yielded in any order. The default implementation yields the
+        result of `load_gses`.
+
+        :param gse_accessions: Accession numbers of the GEO series to load.
+        :type gse_accessions: Iterable[str]
+        :param fields: Names of the GSE fields to load. All fields are loaded if None.
+        :type fields: Optional[List[str]]
+        :return: Iterator over the GSE objects representing the series.
+        :rtype: Iterator[GSE]
+        """
+        yield from self.load_gses(gse_accessions, fields)
+
+    iter_gses = _instrument(iter_gses, iterator=True)
@@ -0,0 +1,102 @@
+import json
+import logging
+import sqlite3
+import time
+from typing import Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class GSENegativeCache:
+    """
+    Persisted record of GEO series that could not be loaded, so that
+    withdrawn, private or nonexistent series aren't downloaded again on
+    every request.
+
+    - Failures are keyed by accession and failure reason, and every reason
+      has its own time to live. Reasons without a time to live aren't cached.
+    - Entries are removed when the series is saved to GEOmetadb.
+    - Errors of the cache database are logged and treated as misses.
+    """
+
+    TABLE = "gse_failures"
+
+    def __init__(self, cache_path: str, ttls: Dict[str, float]) -> None:
+        """
+        :param cache_path: Path to the SQLite database that stores the cache.
+        :param ttls: Dictionary that maps failure reasons to the number of seconds they are cached.
+        """
+        self.cache_path = cache_path
+        self.ttls = ttls
+        self._create_table()
+
+    def is_cached(self, reason: str) -> bool:
+        """
+        :return: Whether failures with the given reason are cached.
+        """
+        return self.ttls.get(reason, 0) > 0
+
+    def find(self, gse_accessions: List[str]) -> Dict[str, str]:
+        """
+        Finds the series with failures that have not expired.
+
+        :param gse_accessions: Accessions of the series.
+        :return: Dictionary that maps the accessions of the failed series to the failure reason.
+        """
+        if not gse_accessions:
+            return {}
+        now = time.time()
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"""
+                    SELECT gse, reason, failed_at FROM {self.TABLE}
+                    WHERE gse IN (SELECT value FROM json_each(?))""", (json.dumps(gse_accessions),))
+                rows = cursor.fetchall()
+        except sqlite3.Error:
+            logger.exception("Failed to read the GSE failure cache:")
+            return {}
+        return {accession: reason for accession, reason, failed_at in rows
+                if failed_at >= now - self.ttls.get(reason, 0)}
+
+    def record(self, accession: str, reason: str) -> None:
+        """
+        Records a failure of a series, if failures with the reason are cached.
+
+        :param accession: Accession of the series.
+        :param reason: Failure reason.
+        """
+        if not self.is_cached(reason):
+            return
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                conn.execute(f"INSERT OR REPLACE INTO {self.TABLE} VALUES (?, ?, ?)", (accession, reason, time.time()))
+        except sqlite3.Error:
+            logger.exception("Failed to write the GSE failure cache:")
+
+    def clear(self, gse_accessions: Iterable[str]) -> None:
+        """
+        Removes all failures of the given series.
+
+        :param gse_accessions: Accessions of the series.
+        """
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                conn.execute(f"DELETE FROM {self.TABLE} WHERE gse IN (SELECT value FROM json_each(?))",
+                             (json.dumps(list(gse_accessions)),))
+        except sqlite3.Error:
+            logger.exception("Failed to clear the GSE failure cache:")
+
+    def _create_table(self) -> None:
+        try:
+            with sqlite3.connect(self.cache_path) as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                        gse TEXT NOT NULL,
+                        reason TEXT NOT NULL,
+                        failed_at REAL NOT NULL,
+                        PRIMARY KEY (gse, reason)
+                    )""")
+        except sqlite3.Error:
+            logger.exception("Failed to create the GSE failure cache:")
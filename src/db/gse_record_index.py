@@ -0,0 +1,285 @@
+"""
+Memory-mapped index of the series in GEOmetadb, sorted by accession.
+
+The index file holds a sorted array of the numbers of the GSE accessions
+(GSE12345 -> 12345) and, in the same order, the offsets of the series rows
+packed as JSON arrays::
+
+    header       magic, number of series, length of the field names, build time
+    field names  JSON array of the names of the row values
+    ids          uint32 little-endian, sorted
+    offsets      uint64 little-endian, one more than the number of series
+    records      JSON arrays of the row values
+
+Lookups are a binary search over the mapped ids and the decoding of one
+record, without SQLite. The file is mapped read-only, so all worker processes
+share its pages through the OS page cache. It is built from GEOmetadb by
+running::
+
+    python -m src.db.gse_record_index --build
+
+and replaced atomically, so readers can reload it while it is rebuilt.
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+from array import array
+from bisect import bisect_left
+from typing import List, Optional, Sequence, Tuple
+
+from src.config.config import Config
+from src.db.gse import FIELD_NAMES, GSE
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"GSEIDX01"
+HEADER = struct.Struct("<8sIId")
+ALIGNMENT = 8
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def accession_number(accession: str) -> Optional[int]:
+    """
+    :param accession: GEO accession, e.g. "GSE12345".
+    :return: Number of a GSE accession (12345), or None if it isn't a GSE accession that fits the index.
+    """
+    if not accession.startswith("GSE") or not accession[3:].isdigit():
+        return None
+    number = int(accession[3:])
+    return number if number < 2 ** 32 else None
+
+
+def build_gse_record_index(geometadb_path: str, index_path: str) -> int:
+    """
+    Builds the index of the series in GEOmetadb. The new file replaces the
+    existing one atomically once it is complete.
+
+    The series are read in the order of their accession numbers and written
+    as they are read, so only the ids and the offsets are kept in memory.
+    The records are written to a temporary file first, since they follow the
+    ids and offsets, whose length is only known at the end.
+
+    :param geometadb_path: Path to GEOmetadb.
+    :param index_path: Path of the index file.
+    :return: Number of indexed series.
+    """
+    field_names = list(FIELD_NAMES)
+    gse_position = field_names.index("gse")
+    # Series written to GEOmetadb from now on may be missing from the index
+    built_at = time.time()
+    ids = array("I")
+    offsets = array("Q", [0])
+    directory = os.path.dirname(os.path.abspath(index_path))
+
+    with tempfile.TemporaryFile(dir=directory, prefix=".gse_index.") as records:
+        def write_record(number: int, row: Tuple) -> None:
+            record = json.dumps(row, separators=(",", ":")).encode()
+            records.write(record)
+            ids.append(number)
+            offsets.append(offsets[-1] + len(record))
+
+        with sqlite3.connect(f"file:{geometadb_path}?mode=ro", uri=True) as conn:
+            # Rows of duplicated accessions are ordered by rowid, and the last one replaces the earlier
+            # ones, as INSERT OR REPLACE is meant to
+            cursor = conn.execute(f"""
+                SELECT {', '.join(field_names)} FROM gse WHERE gse GLOB 'GSE[0-9]*'
+                ORDER BY CAST(substr(gse, 4) AS INTEGER), rowid""")
+            pending: Optional[Tuple[int, Tuple]] = None
+            for row in cursor:
+                number = accession_number(row[gse_position])
+                if number is None:
+                    continue
+                if pending is not None and pending[0] != number:
+                    write_record(*pending)
+                pending = (number, row)
+            if pending is not None:
+                write_record(*pending)
+
+        count = len(ids)
+        if sys.byteorder != "little":
+            ids.byteswap()
+            offsets.byteswap()
+        fields_json = json.dumps(field_names).encode()
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".gse_index.")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(HEADER.pack(MAGIC, count, len(fields_json), built_at))
+                f.write(fields_json)
+                _pad(f)
+                f.write(ids.tobytes())
+                _pad(f)
+                f.write(offsets.tobytes())
+                records.seek(0)
+                shutil.copyfileobj(records, f, COPY_BUFFER_SIZE)
+                f.flush()
+                os.fsync(f.fileno())
+            # Temporary files are only readable by their owner, the app may run as another user
+            os.chmod(temp_path, 0o644)
+            os.replace(temp_path, index_path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+    logger.info(f"Indexed {count} series of {geometadb_path} in {index_path}")
+    return count
+
+
+def _pad(f) -> None:
+    f.write(b"\0" * (-f.tell() % ALIGNMENT))
+
+
+class GSERecordIndex:
+    """
+    Read-only view of an index file built by `build_gse_record_index`.
+
+    The index is a snapshot of GEOmetadb at the time it was built. Call
+    `reload_if_changed` to switch to a rebuilt file; lookups that are running
+    meanwhile finish on the previous file, which is unmapped once they are done.
+    """
+
+    def __init__(self, index_path: str) -> None:
+        """
+        :param index_path: Path to the index file.
+        :raises OSError: If the file can't be read.
+        :raises ValueError: If the file isn't a valid index.
+        """
+        self.index_path = index_path
+        self._snapshot = _Snapshot.open(index_path)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.ids)
+
+    @property
+    def built_at(self) -> float:
+        """
+        Time at which the build started reading GEOmetadb, as returned by
+        `time.time()`. Series written to GEOmetadb earlier are in the index.
+        """
+        return self._snapshot.built_at
+
+    def __contains__(self, accession: str) -> bool:
+        number = accession_number(accession)
+        return number is not None and self._snapshot.position(number) is not None
+
+    def find(self, accession: str) -> Optional[GSE]:
+        """
+        :param accession: GEO accession of the series.
+        :return: Series with the accession, or None if it isn't indexed.
+        """
+        number = accession_number(accession)
+        if number is None:
+            return None
+        return self._snapshot.find(number)
+
+    def reload_if_changed(self) -> bool:
+        """
+        Maps the index file again if it was replaced since it was mapped.
+
+        :return: Whether the index was reloaded.
+        """
+        try:
+            identity = _file_identity(self.index_path)
+        except OSError:
+            return False
+        if identity == self._snapshot.identity:
+            return False
+        self._snapshot = _Snapshot.open(self.index_path)
+        logger.info(f"Reloaded {len(self)} series from {self.index_path}")
+        return True
+
+
+def _file_identity(path_or_fd) -> Tuple[int, int, int]:
+    stat = os.stat(path_or_fd)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class _Snapshot:
+    """One mapped version of the index file."""
+
+    def __init__(self, identity: Tuple[int, int, int], mapping: mmap.mmap, built_at: float,
+                 field_names: List[str], ids: Sequence[int], offsets: Sequence[int], records_start: int) -> None:
+        self.identity = identity
+        self.mapping = mapping
+        self.built_at = built_at
+        self.field_names = field_names
+        self.ids = ids
+        self.offsets = offsets
+        self.records_start = records_start
+
+    @classmethod
+    def open(cls, index_path: str) -> "_Snapshot":
+        with open(index_path, "rb") as f:
+            # The identity of the opened file, the path may already point to a newer one
+            identity = _file_identity(f.fileno())
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(mapping) < HEADER.size:
+            raise ValueError(f"{index_path} is not a GSE record index")
+        magic, count, fields_length, built_at = HEADER.unpack_from(mapping)
+        if magic != MAGIC:
+            raise ValueError(f"{index_path} is not a GSE record index")
+        position = HEADER.size
+        field_names = json.loads(mapping[position:position + fields_length])
+        position = _aligned(position + fields_length)
+        ids_end = position + 4 * count
+        offsets_start = _aligned(ids_end)
+        records_start = offsets_start + 8 * (count + 1)
+        view = memoryview(mapping)
+        ids, offsets = view[position:ids_end].cast("I"), view[offsets_start:records_start].cast("Q")
+        if sys.byteorder != "little":
+            ids, offsets = array("I", ids), array("Q", offsets)
+            ids.byteswap()
+            offsets.byteswap()
+        return cls(identity, mapping, built_at, field_names, ids, offsets, records_start)
+
+    def position(self, number: int) -> Optional[int]:
+        position = bisect_left(self.ids, number)
+        return position if position < len(self.ids) and self.ids[position] == number else None
+
+    def find(self, number: int) -> Optional[GSE]:
+        position = self.position(number)
+        if position is None:
+            return None
+        start = self.records_start + self.offsets[position]
+        end = self.records_start + self.offsets[position + 1]
+        values = json.loads(self.mapping[start:end])
+        return GSE(**{name: value for name, value in zip(self.field_names, values) if name in FIELD_NAMES})
+
+
+def _aligned(position: int) -> int:
+    return position + (-position % ALIGNMENT)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the memory-mapped index of GEOmetadb series.")
+    parser.add_argument("--build", action="store_true", help="build or rebuild the index")
+    parser.add_argument("--test", action="store_true", help="use the test database")
+    parser.add_argument("--path", help="path to GEOmetadb, overrides the configuration")
+    parser.add_argument("--index-path", help="path to the index file, overrides the configuration")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    config = Config(test=args.test)
+    geometadb_path = args.path or config.geometadb_path
+    index_path = args.index_path or config.gse_index_path
+    if args.build:
+        build_gse_record_index(geometadb_path, index_path)
+    try:
+        index = GSERecordIndex(index_path)
+    except (OSError, ValueError) as e:
+        print(f"No usable index: {e}")
+        return 1
+    print(f"{len(index)} series are indexed in {index_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+from abc import ABCMeta, abstractmethod
+from typing import Iterator, Optional
+
+from src.db.gsm import GSM
+
+
+class GSMLoader(metaclass=ABCMeta):
+    @abstractmethod
+    def iter_gsms(self, gse_accession: str, after: Optional[str] = None,
+                  limit: Optional[int] = None) -> Iterator[GSM]:
+        """
+        Yields the samples of a GEO series ordered by their accessions, so
+        that the samples of large series can be read page by page.
+
+        :param gse_accession: Accession number of the GEO series.
+        :type gse_accession: str
+        :param after: Only samples with accessions after this one are yielded.
+        Pass the last sample of a page to get the next page.
+        :type after: Optional[str]
+        :param limit: Maximum number of samples to yield, unlimited if None.
+        :type limit: Optional[int]
+        :return: Iterator over GSM objects representing the samples.
+        :rtype: Iterator[GSM]
+        """
+        pass
@@ -0,0 +1,50 @@
+from typing import Dict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class PooledHTTPSession(requests.Session):
+    """
+    HTTP session shared by all requests handled by the application.
+
+    - Connections are kept alive and pooled per host, so consecutive requests
+      to NCBI, EuropePMC and GEO don't pay for new TCP and TLS handshakes.
+    - Up to `pool_connections` hosts have a pool, and each pool keeps up to
+      `pool_maxsize` idle connections. Requests beyond that open temporary
+      connections rather than waiting for a free one.
+    - The connection pools are thread-safe, so the session can be used by
+      all request and worker threads at once.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 20) -> None:
+        """
+        :param pool_connections: Number of hosts for which connection pools are kept.
+        :param pool_maxsize: Maximum number of connections kept per host.
+        """
+        super().__init__()
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.mount("https://", self.adapter)
+        self.mount("http://", self.adapter)
+
+    def connection_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns connection counters of the hosts that currently have a pool.
+        Requests that didn't need a new connection reused a kept-alive one.
+
+        :return: Dictionary that maps hosts to the number of requests sent,
+        connections opened and connections reused.
+        """
+        pools = self.adapter.poolmanager.pools
+        stats = {}
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{pool.scheme}://{pool.host}:{pool.port}"
+            stats[host] = {
+                "requests": pool.num_requests,
+                "connections": pool.num_connections,
+                "reused": max(pool.num_requests - pool.num_connections, 0),
+            }
+        return stats
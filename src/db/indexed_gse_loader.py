@@ -0,0 +1,163 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.db.gse import GSE, project
+from src.db.gse_loader import GSELoader
+from src.db.gse_record_index import GSERecordIndex, build_gse_record_index
+
+logger = logging.getLogger(__name__)
+
+
+class IndexedGSELoader(GSELoader):
+    """
+    Loads series from the memory-mapped `GSERecordIndex`, and from the
+    wrapped loader (usually `GEOmetadbGSELoader`) for everything else.
+
+    - Series written to GEOmetadb after the index was built are marked dirty
+      by `invalidate`, which is meant to be a save listener, and are loaded by
+      the wrapped loader until an index built after they were written is
+      loaded, whichever process built it.
+    - Accessions that aren't in the index are passed to the wrapped loader,
+      since other processes may have written them to GEOmetadb.
+    - The index file is reloaded when it has been replaced, checked at most
+      every `reload_interval` seconds.
+    - If `rebuild_threshold` is set, the index is rebuilt in a background
+      thread once that many series are dirty.
+    - The reload listeners are called after a replaced index file is loaded,
+      e.g. to clear caches of the series read from the previous one.
+
+    Without an index file, every series is loaded by the wrapped loader.
+    """
+
+    def __init__(self, loader: GSELoader, index_path: str, geometadb_path: str,
+                 reload_interval: float = 5.0, rebuild_threshold: int = 0,
+                 reload_listeners: Optional[List[Callable[[], None]]] = None) -> None:
+        """
+        :param loader: Loader of the series that the index can't provide.
+        :param index_path: Path to the index file.
+        :param geometadb_path: Path to GEOmetadb, which the index is rebuilt from.
+        :param reload_interval: Minimum number of seconds between checks whether the index file was replaced.
+        :param rebuild_threshold: Number of dirty series that triggers a rebuild, 0 to never rebuild.
+        :param reload_listeners: Functions called after a replaced index file is loaded.
+        """
+        self.loader = loader
+        self.index_path = index_path
+        self.geometadb_path = geometadb_path
+        self.reload_interval = reload_interval
+        self.rebuild_threshold = rebuild_threshold
+        self.reload_listeners = reload_listeners or []
+        self.index: Optional[GSERecordIndex] = None
+        self.hits = 0
+        self.misses = 0
+        # Accessions of the dirty series and the times they were written at
+        self._dirty: Dict[str, float] = {}
+        self._next_reload_check = 0.0
+        self._rebuild_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._open_index()
+
+    def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        if not gse_accessions:
+            return []
+        self._reload_if_due()
+        index = self.index
+        found: Dict[str, GSE] = {}
+        missing: List[str] = []
+        gse_accessions = list(dict.fromkeys(gse_accessions))
+        with self._lock:
+            dirty = {accession for accession in gse_accessions if accession in self._dirty}
+        for accession in gse_accessions:
+            gse = index.find(accession) if index is not None and accession not in dirty else None
+            if gse is not None:
+                found[accession] = project(gse, fields)
+            else:
+                missing.append(accession)
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            for gse in self.loader.load_gses(missing, fields):
+                if gse and gse.gse:
+                    found.setdefault(gse.gse, gse)
+        return [found[accession] for accession in gse_accessions if accession in found]
+
+    def invalidate(self, gse_accessions: Iterable[str]) -> None:
+        """
+        Marks series as written to GEOmetadb after the index was built.
+
+        :param gse_accessions: Accessions of the written series.
+        """
+        now = time.time()
+        with self._lock:
+            self._dirty.update((accession, now) for accession in gse_accessions)
+            rebuild = (self.rebuild_threshold > 0 and len(self._dirty) >= self.rebuild_threshold
+                       and self._rebuild_thread is None)
+            if rebuild:
+                self._rebuild_thread = threading.Thread(target=self.rebuild, name="gse-index-rebuild", daemon=True)
+                self._rebuild_thread.start()
+
+    def rebuild(self) -> None:
+        """
+        Rebuilds the index from GEOmetadb and switches to it. Series marked
+        dirty while the index is being built stay dirty, since the build may
+        not include them.
+        """
+        try:
+            build_gse_record_index(self.geometadb_path, self.index_path)
+            self._reload()
+        except Exception:
+            logger.exception(f"Failed to rebuild the GSE record index {self.index_path}")
+        finally:
+            with self._lock:
+                self._rebuild_thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        :return: Number of series in the index, number of dirty series, and
+        the numbers of series loaded from the index and from the wrapped loader.
+        """
+        with self._lock:
+            return {
+                "entries": len(self.index) if self.index is not None else 0,
+                "dirty": len(self._dirty),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def _open_index(self) -> None:
+        try:
+            self.index = GSERecordIndex(self.index_path)
+            logger.info(f"Loaded {len(self.index)} series from {self.index_path}")
+        except (OSError, ValueError) as e:
+            logger.warning(f"GSE record index is unavailable, series are loaded from GEOmetadb: {e}")
+
+    def _reload(self) -> None:
+        """
+        Loads the index file if it was replaced, and cleans the series that
+        were written before the loaded index was built.
+        """
+        if self.index is None:
+            self._open_index()
+            reloaded = self.index is not None
+        else:
+            reloaded = self.index.reload_if_changed()
+        if self.index is not None:
+            built_at = self.index.built_at
+            with self._lock:
+                self._dirty = {accession: written_at for accession, written_at in self._dirty.items()
+                               if written_at >= built_at}
+        if reloaded:
+            for listener in self.reload_listeners:
+                listener()
+
+    def _reload_if_due(self) -> None:
+        now = time.monotonic()
+        if now < self._next_reload_check:
+            return
+        self._next_reload_check = now + self.reload_interval
+        try:
+            self._reload()
+        except (OSError, ValueError):
+            logger.exception(f"Failed to reload the GSE record index {self.index_path}")
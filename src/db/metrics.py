@@ -0,0 +1,302 @@
+"""
+Metrics of the service in the Prometheus text exposition format.
+
+`PaperDatasetLinker` and `GSELoader` record the duration, the errors and the
+number of results of every call to the linkers and loaders in the metrics of
+the default `REGISTRY`, which the app exposes at `/metrics`. Every worker
+process of a multi-process server has its own registry, so the metrics
+describe the worker that served the scrape.
+"""
+
+from abc import ABCMeta, abstractmethod
+import functools
+import math
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# Upstream requests of the linkers and loaders take from milliseconds to minutes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+class _Metric(metaclass=ABCMeta):
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} has labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        """
+        :return: Name, labels and value of every sample of the metric.
+        """
+        pass
+
+
+class Counter(_Metric):
+    """
+    Value that only increases, e.g. a number of requests.
+    """
+
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """
+        :return: Current value of the counter with the labels.
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in values]
+
+
+class Histogram(_Metric):
+    """
+    Distribution of observed values, e.g. durations, over cumulative buckets.
+    """
+
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of each bucket (not cumulative), sum and count of the observations
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value, count + 1)
+
+    def count(self, **labels: str) -> int:
+        """
+        :return: Number of observations with the labels.
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            return self._values[key][2] if key in self._values else 0
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        samples = []
+        for key, (counts, total, count) in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+            samples.append((f"{self.name}_bucket", {**labels, "le": "+Inf"}, count))
+            samples.append((f"{self.name}_sum", labels, total))
+            samples.append((f"{self.name}_count", labels, count))
+        return samples
+
+
+class CallbackMetric(_Metric):
+    """
+    Metric whose values are read from other objects when the metrics are
+    rendered, e.g. from the `stats()` of a cache.
+    """
+
+    def __init__(self, name: str, documentation: str, metric_type: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[LabelValues, float]]) -> None:
+        """
+        :param metric_type: Prometheus type of the metric, "gauge" or "counter".
+        :param collect: Function that returns the values of the metric by label values.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.TYPE = metric_type
+        self.collect = collect
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self.collect().items()]
+
+
+class MetricsRegistry:
+    """
+    Metrics of the service, rendered in the Prometheus text format 0.0.4.
+    """
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, metric_type: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[LabelValues, float]]) -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, metric_type, labelnames, collect))
+
+    def _register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """
+        :return: All metrics in the Prometheus text format. Metrics whose
+        callbacks fail are rendered without samples.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation, quote=False)}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            try:
+                samples = metric.samples()
+            except Exception:
+                samples = []
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str, quote: bool = True) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value.replace('"', '\\"') if quote else value
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+# Objects whose instrumented methods are running in the current thread
+_active = threading.local()
+
+
+def _active_objects() -> set:
+    if not hasattr(_active, "objects"):
+        _active.objects = set()
+    return _active.objects
+
+
+def instrument(method: Callable, histogram: Histogram, errors: Counter, results: Optional[Counter],
+               labels_of: Callable[[object], Dict[str, str]], count: Callable[[object], int] = len,
+               iterator: bool = False) -> Callable:
+    """
+    Wraps a method of a linker or a loader to record its duration, the type of
+    the exceptions it raises, and the number of results it returns. Calls made
+    by an instrumented method to instrumented methods of the same object (e.g.
+    the default `link_to_datasets_by_paper` calling `link_to_datasets`) are
+    not recorded again.
+
+    :param method: Method to wrap.
+    :param histogram: Histogram of the durations, with the labels of the object and a "method" label.
+    :param errors: Counter of the exceptions, with the labels of the object and an "exception" label.
+    :param results: Counter of the results, with the labels of the object, or None.
+    :param labels_of: Function that returns the labels of the object.
+    :param count: Function that returns the number of results in the return value.
+    :param iterator: Whether the method returns an iterator. Only the time
+    spent producing the items is recorded, not the time the caller spends between them.
+    :return: Wrapped method.
+    """
+    if iterator:
+        @functools.wraps(method)
+        def iterator_wrapper(self, *args, **kwargs) -> Iterator:
+            active = _active_objects()
+            if id(self) in active:
+                yield from method(self, *args, **kwargs)
+                return
+            labels = labels_of(self)
+            items = None
+            produced = 0
+            elapsed = 0.0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    active.add(id(self))
+                    try:
+                        if items is None:
+                            items = iter(method(self, *args, **kwargs))
+                        item = next(items)
+                    except StopIteration:
+                        break
+                    finally:
+                        active.discard(id(self))
+                        elapsed += time.perf_counter() - start
+                    produced += 1
+                    yield item
+            except Exception as e:
+                errors.inc(exception=type(e).__name__, **labels)
+                raise
+            finally:
+                if items is not None and hasattr(items, "close"):
+                    items.close()
+                histogram.observe(elapsed, method=method.__name__, **labels)
+                if results is not None:
+                    results.inc(produced, **labels)
+
+        return iterator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        active = _active_objects()
+        if id(self) in active:
+            return method(self, *args, **kwargs)
+        labels = labels_of(self)
+        active.add(id(self))
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception as e:
+            errors.inc(exception=type(e).__name__, **labels)
+            raise
+        finally:
+            active.discard(id(self))
+            histogram.observe(time.perf_counter() - start, method=method.__name__, **labels)
+        if results is not None:
+            results.inc(count(result), **labels)
+        return result
+
+    return wrapper
@@ -1,15 +1,22 @@
+import json
 import logging
 import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import fields, astuple
-from typing import List, Dict
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Dict, Optional
 
-import GEOparse
 import requests
 from dacite import from_dict
 
 from src.config.config import Config
-from src.db.gse import GSE
-from src.db.gse_loader import GSELoader
+from src.db.gse import GSE, project
+from src.db.gse_loader import GSELoader, LOADER_ERRORS
+from src.db.gse_negative_cache import GSENegativeCache
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.db.soft_header_parser import parse_series_header
+from src.db.write_behind_queue import WriteBehindQueue
 from src.exception.geo_error import GEOError
 
 logger = logging.getLogger(__name__)
@@ -18,62 +25,186 @@ logger = logging.getLogger(__name__)
 class NCBIGSELoader(GSELoader):
     DOWNLOAD_URL_TEMPLATE = "https://www.ncbi.nlm.nih.gov/geo/query/acc.cgi?acc={}&targ=self&form=text&view=quick"
     GEOMETADB_SEPARATOR = ";\t"
+    SOFT_DATE_FORMAT = "%b %d %Y"
+    GEOMETADB_DATE_FORMAT = "%Y-%m-%d"
+    MAX_RATE_LIMIT_RETRIES = 2
 
-    def __init__(self, session: requests.Session, config: Config) -> None:
+    def __init__(self, session: requests.Session, config: Config,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None,
+                 save_listeners: Optional[List[Callable[[List[str]], None]]] = None,
+                 negative_cache: Optional[GSENegativeCache] = None,
+                 write_behind: bool = False) -> None:
+        """
+        :param session: Session used to download the datasets.
+        :param config: Service configuration.
+        :param rate_limiter: Limiter shared by everything that sends requests to NCBI.
+        A limiter with the rate from the configuration is created if not provided.
+        :param save_listeners: Functions called with the accessions of the
+        series after they have been written to GEOmetadb, e.g. to invalidate caches.
+        :param negative_cache: Cache of series that failed to download. If
+        provided, cached failures are skipped and new ones are recorded instead
+        of raised; otherwise every failure is raised.
+        :param write_behind: Whether downloaded series are written to GEOmetadb
+        in batches by a background thread instead of by the calling thread.
+        `close` must be called to write the remaining series on shutdown.
+        """
         self.session = session
         self.geometadb_path = config.geometadb_path
+        self.max_connections = config.max_ncbi_connections
+        self.api_key = config.ncbi_api_key
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(config.ncbi_requests_per_second)
+        self.save_listeners = save_listeners or []
+        self.negative_cache = negative_cache
+        self.write_queue: Optional[WriteBehindQueue[GSE]] = WriteBehindQueue(
+            self._write_gses, config.gse_write_batch_size, config.gse_write_interval, name="gse-write-behind"
+        ) if write_behind else None
+
+    def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        # Complete series are saved, so that later queries for any field can be served by GEOmetadb
+        gses = self._download_geo_datasets(self.skip_known_failures(gse_accessions))
+        self._save_downloaded(gses)
+        return [project(gse, fields) for gse in gses]
+
+    def iter_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> Iterator[GSE]:
+        """
+        Yields the GEO datasets as soon as each of them is downloaded. The
+        downloaded datasets are saved to GEOmetadb once the iteration ends,
+        including when it is stopped early or a download fails.
+        """
+        gse_accessions = self.skip_known_failures(list(gse_accessions))
+        if not gse_accessions:
+            return
+        downloaded: List[GSE] = []
+        executor = ThreadPoolExecutor(max_workers=min(self.max_connections, len(gse_accessions)),
+                                      thread_name_prefix="ncbi-download")
+        try:
+            futures = [executor.submit(self.download_or_record_failure, accession) for accession in gse_accessions]
+            for future in as_completed(futures):
+                gse = future.result()
+                if gse is None:
+                    continue
+                downloaded.append(gse)
+                yield project(gse, fields)
+        finally:
+            executor.shutdown(cancel_futures=True)
+            if downloaded:
+                self._save_downloaded(downloaded)
 
-    def load_gses(self, gse_accessions: List[str]) -> List[GSE]:
-        gses = [self.download_geo_dataset(accession) for accession in gse_accessions]
-        self.save_gses(gses)
-        return gses
+    def _download_geo_datasets(self, gse_accessions: List[str]) -> List[GSE]:
+        """
+        Downloads several GEO datasets using at most `max_connections` parallel
+        connections. The request rate is bounded by the rate limiter.
+
+        :param gse_accessions: GEO accessions of the datasets to download.
+        :return: GEO datasets in the same order as the accessions, without
+        the datasets whose failures were recorded in the negative cache.
+        """
+        workers = min(self.max_connections, len(gse_accessions))
+        if workers <= 1:
+            gses = [self.download_or_record_failure(accession) for accession in gse_accessions]
+            return [gse for gse in gses if gse is not None]
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ncbi-download")
+        try:
+            return [gse for gse in executor.map(self.download_or_record_failure, gse_accessions) if gse is not None]
+        finally:
+            # Don't start the remaining downloads once one of them has failed
+            executor.shutdown(cancel_futures=True)
 
     def save_gses(self, gses: list[GSE]):
         """
-        Saves GEO datasets to the geometadb sqlite database.
+        Saves GEO datasets to the geometadb sqlite database. With write-behind,
+        the datasets are queued and written by the background thread, which
+        logs failed writes.
 
         :param gses: List of GEO datasets to save.
+        :raises sqlite3.Error: If the datasets are written without write-behind and the write fails.
+        """
+        if self.write_queue is not None:
+            self.write_queue.put(gses)
+        else:
+            self._write_gses(gses)
+
+    def _save_downloaded(self, gses: List[GSE]) -> None:
+        """
+        Saves datasets downloaded for a query. A failed write is only logged,
+        since the query can be answered without it.
         """
         try:
-            with sqlite3.connect(self.geometadb_path) as conn:
-                cursor = conn.cursor()
-                field_names = [f.name for f in fields(GSE)]
-                headers = ','.join(field_names)
-                gse_tuples = [astuple(gse) for gse in gses]
-                placeholders = ','.join(['?'] * len(field_names))
-                table = 'gse'
-                cursor.executemany(f"INSERT OR REPLACE INTO {table} ({headers}) VALUES ({placeholders})", gse_tuples)
+            self.save_gses(gses)
         except sqlite3.Error:
-            # Just log the exception so as not to fail the whole pipeline.
             logger.exception("Failed to save GEO datasets to geometadb:")
 
+    def close(self) -> None:
+        """
+        Writes the queued datasets and stops the write-behind thread.
+        """
+        if self.write_queue is not None:
+            self.write_queue.close()
+
+    def _write_gses(self, gses: List[GSE]) -> None:
+        """
+        Writes GEO datasets to GEOmetadb in one transaction and notifies the
+        save listeners once it is committed. Existing rows of the datasets are
+        replaced, since the gse table has no unique constraint on accessions.
+
+        :raises sqlite3.Error: If the write fails. Nothing is written then.
+        """
+        with sqlite3.connect(self.geometadb_path) as conn:
+            cursor = conn.cursor()
+            field_names = [f.name for f in fields(GSE)]
+            headers = ','.join(field_names)
+            gse_tuples = [astuple(gse) for gse in gses]
+            placeholders = ','.join(['?'] * len(field_names))
+            table = 'gse'
+            cursor.execute(f"DELETE FROM {table} WHERE gse IN (SELECT value FROM json_each(?))",
+                           (json.dumps([gse.gse for gse in gses]),))
+            cursor.executemany(f"INSERT OR REPLACE INTO {table} ({headers}) VALUES ({placeholders})", gse_tuples)
+        accessions = [gse.gse for gse in gses]
+        for listener in self.save_listeners:
+            listener(accessions)
+
     @staticmethod
-    def _format_geoparse_metadata(geoparse_metadata: Dict) -> Dict:
+    def _format_series_header(header: Dict[str, List[str]]) -> Dict:
         """
-        Formats the metadata dictionary from GEOparse into a format suitable for
-        creating a GSE object.
+        Formats the attributes of a series header into a format suitable for
+        creating a GSE object, with values formatted as in GEOmetadb.
 
-        :param geoparse_metadata: Metadata dictionary from GEOparse.
+        :param header: Attributes of the series header, see `parse_series_header`.
         """
         metadata_dict = {key: item[0] if isinstance(item, list) and len(item) > 0 else "" for key, item in
-                         geoparse_metadata.items()}
+                         header.items()}
         metadata_dict["gse"] = metadata_dict.get("geo_accession", "")
         if "pubmed_id" in metadata_dict:
             metadata_dict["pubmed_id"] = int(metadata_dict["pubmed_id"])
+        for date_field in ("submission_date", "last_update_date"):
+            if date_field in metadata_dict:
+                metadata_dict[date_field] = NCBIGSELoader._format_date(metadata_dict[date_field])
         NCBIGSELoader._format_contact_info(metadata_dict)
-        if "contributor" in geoparse_metadata:
-            metadata_dict["contributor"] = NCBIGSELoader.GEOMETADB_SEPARATOR.join(geoparse_metadata["contributor"])
+        if "contributor" in header:
+            metadata_dict["contributor"] = NCBIGSELoader.GEOMETADB_SEPARATOR.join(header["contributor"])
         return metadata_dict
 
+    @staticmethod
+    def _format_date(date: str) -> str:
+        """
+        Formats a SOFT date (e.g. "Jul 05 2018") as in GEOmetadb ("2018-07-05").
+        Dates in other formats are returned unchanged.
+        """
+        try:
+            return datetime.strptime(date, NCBIGSELoader.SOFT_DATE_FORMAT).strftime(
+                NCBIGSELoader.GEOMETADB_DATE_FORMAT)
+        except ValueError:
+            return date
+
     @staticmethod
     def _format_contact_info(metadata_dict):
         """
-        Formats the contact information from GEOparse into a single string
+        Formats the contact information from the series header into a single string
         in the format used in geometadb.
         Adds a contact field to the metadata dictionary with the formatted
         contact info.
 
-        :param metadata_dict: Metadata dictionary from GEOparse.
+        :param metadata_dict: Metadata dictionary of the series header.
         """
         contact_info = []
         if "contact_name" in metadata_dict:
@@ -96,20 +227,114 @@ class NCBIGSELoader(GSELoader):
             contact_info.append(f'Phone: {metadata_dict["contact_phone"]}')
         metadata_dict["contact"] = NCBIGSELoader.GEOMETADB_SEPARATOR.join(contact_info)
 
+    def skip_known_failures(self, gse_accessions: List[str]) -> List[str]:
+        """
+        Removes the datasets with failures in the negative cache.
+
+        :param gse_accessions: GEO accessions of the datasets.
+        :return: GEO accessions of the datasets without cached failures.
+        """
+        if self.negative_cache is None or not gse_accessions:
+            return gse_accessions
+        failures = self.negative_cache.find(gse_accessions)
+        if failures:
+            logger.info(f"Skipping {len(failures)} GEO datasets that recently failed to download")
+        return [accession for accession in gse_accessions if accession not in failures]
+
+    def download_or_record_failure(self, accession: str) -> Optional[GSE]:
+        """
+        Downloads the GEO dataset with the given accession. If the download
+        fails for a reason that the negative cache keeps, the failure is
+        recorded there instead of raised.
+
+        :param accession: GEO accession for the dataset (ex. GSE12345)
+        :return: GEO dataset, or None if its failure was recorded.
+        """
+        try:
+            return self.download_geo_dataset(accession)
+        except GEOError as e:
+            self.record_failure(accession, e)
+            return None
+
+    def record_failure(self, accession: str, error: GEOError) -> None:
+        """
+        Records a failed download in the negative cache.
+
+        :param accession: GEO accession of the dataset.
+        :param error: Error raised by the download.
+        :raises GEOError: The error, if the negative cache doesn't keep failures of its kind.
+        """
+        if self.negative_cache is None or not self.negative_cache.is_cached(error.reason):
+            raise error
+        LOADER_ERRORS.inc(loader=type(self).__name__, exception=type(error).__name__)
+        logger.warning(f"{error}, skipping it until the failure expires")
+        self.negative_cache.record(accession, error.reason)
+
     def download_geo_dataset(self, accession: str) -> GSE:
         """
         Downloads the GEO dataset with the given accession.
 
         :param accession: GEO accession for the dataset (ex. GSE12345)
         :return: GEO dataset
+        :raises GEOError: If the download fails or GEO returns no record of the dataset.
         """
         dataset_metadata_url = NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format(accession)
         try:
-            response = self.session.get(dataset_metadata_url, stream=True)
-            response.raise_for_status()
-            metadata = GEOparse.GEOparse.parse_metadata(response.iter_lines(decode_unicode=True))
-            return from_dict(GSE, NCBIGSELoader._format_geoparse_metadata(metadata))
+            response = self._rate_limited_get(dataset_metadata_url)
+            try:
+                response.raise_for_status()
+                # The parser stops at the end of the header, the rest of the response isn't needed
+                return NCBIGSELoader._parse_series(accession, response.iter_lines(decode_unicode=True))
+            finally:
+                response.close()
         except requests.HTTPError as e:
-            raise GEOError(f"Error downloading GEO dataset {accession}: {e.response.status_code}")
+            raise NCBIGSELoader._status_error(accession, e.response.status_code)
         except requests.RequestException:
             raise GEOError(f"Network failure when downloading GEO dataset {accession}")
+
+    @staticmethod
+    def _parse_series(accession: str, lines: Iterable[str]) -> GSE:
+        """
+        Parses the series header of a downloaded GEO dataset.
+
+        :param accession: GEO accession of the dataset.
+        :param lines: Lines of the acc.cgi response.
+        :return: GEO dataset
+        :raises GEOError: If GEO returned no record of the dataset.
+        """
+        gse = from_dict(GSE, NCBIGSELoader._format_series_header(parse_series_header(lines)))
+        # GEO answers with an empty record for withdrawn and private series
+        if not gse.gse:
+            raise GEOError(f"GEO returned no record of dataset {accession}", GEOError.EMPTY_RECORD)
+        return gse
+
+    @staticmethod
+    def _status_error(accession: str, status_code: int) -> GEOError:
+        """
+        :return: Error of a download that GEO answered with an error status.
+        """
+        # Exhausted rate limit retries say nothing about the dataset
+        reason = None if status_code == 429 else GEOError.NOT_FOUND if status_code == 404 else GEOError.HTTP_ERROR
+        return GEOError(f"Error downloading GEO dataset {accession}: {status_code}", reason)
+
+    def _rate_limited_get(self, url: str) -> requests.Response:
+        """
+        Sends a GET request once the rate limiter allows it. If NCBI still
+        answers with 429 Too Many Requests, waits for the time given in the
+        Retry-After header and tries again.
+
+        :param url: URL to request.
+        :return: Streamed response.
+        """
+        params = {"api_key": self.api_key} if self.api_key else None
+        retries = 0
+        while True:
+            self.rate_limiter.acquire()
+            response = self.session.get(url, params=params, stream=True)
+            if response.status_code != 429 or retries == NCBIGSELoader.MAX_RATE_LIMIT_RETRIES:
+                return response
+            retries += 1
+            retry_after = response.headers.get("Retry-After", "")
+            logger.warning(f"NCBI rate limit exceeded, retrying {url}")
+            response.close()
+            time.sleep(int(retry_after) if retry_after.isdigit() else 1)
@@ -0,0 +1,133 @@
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import fields
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from src.config.config import Config
+from src.db.gsm import GSM
+from src.db.gsm_loader import GSMLoader
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.db.soft_header_parser import iter_soft_entities
+from src.exception.geo_error import GEOError
+
+logger = logging.getLogger(__name__)
+
+
+class NCBIGSMLoader(GSMLoader):
+    """
+    Downloads the samples of a series from the GEO accession display.
+
+    GEO returns the samples of a series in an arbitrary order, so all of
+    them are downloaded and sorted before the first page is yielded. The
+    sorted samples of the most recently paged series are kept for `cache_ttl`
+    seconds, so the following pages are served without downloading the series
+    again. Only the sample attributes are downloaded (`view=brief`), not their
+    data tables.
+    """
+
+    DOWNLOAD_URL_TEMPLATE = "https://www.ncbi.nlm.nih.gov/geo/query/acc.cgi?acc={}&targ=gsm&form=text&view=brief"
+    GSM_FIELD_NAMES = frozenset(f.name for f in fields(GSM))
+
+    def __init__(self, session: requests.Session, config: Config,
+                 rate_limiter: Optional[TokenBucketRateLimiter] = None) -> None:
+        """
+        :param session: Session used to download the samples.
+        :param config: Service configuration.
+        :param rate_limiter: Limiter shared by everything that sends requests to NCBI.
+        A limiter with the rate from the configuration is created if not provided.
+        """
+        self.session = session
+        self.api_key = config.ncbi_api_key
+        self.rate_limiter = rate_limiter or TokenBucketRateLimiter(config.ncbi_requests_per_second)
+        self.cache_max_series = config.gsm_cache_max_series
+        self.cache_ttl = config.gsm_cache_ttl
+        # Expiry time, sorted accessions and samples of the most recently paged series
+        self._series: OrderedDict[str, Tuple[float, List[str], List[GSM]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def iter_gsms(self, gse_accession: str, after: Optional[str] = None,
+                  limit: Optional[int] = None) -> Iterator[GSM]:
+        accessions, gsms = self._sorted_gsms(gse_accession)
+        start = bisect.bisect_right(accessions, after or "")
+        yield from gsms[start:] if limit is None else gsms[start: start + limit]
+
+    def _sorted_gsms(self, gse_accession: str) -> Tuple[List[str], List[GSM]]:
+        """
+        :return: Accessions and samples of the series sorted by accession,
+        downloaded unless they are cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            cached = self._series.get(gse_accession)
+            if cached is not None and cached[0] > now:
+                self._series.move_to_end(gse_accession)
+                return cached[1], cached[2]
+
+        gsms = sorted(self.download_gsms(gse_accession), key=lambda gsm: gsm.gsm or "")
+        accessions = [gsm.gsm or "" for gsm in gsms]
+        if self.cache_max_series > 0:
+            with self._lock:
+                self._series[gse_accession] = (now + self.cache_ttl, accessions, gsms)
+                self._series.move_to_end(gse_accession)
+                while len(self._series) > self.cache_max_series:
+                    self._series.popitem(last=False)
+        return accessions, gsms
+
+    def download_gsms(self, gse_accession: str) -> List[GSM]:
+        """
+        Downloads the samples of the GEO series with the given accession.
+
+        :param gse_accession: GEO accession of the series (ex. GSE12345)
+        :return: Samples of the series in the order returned by GEO.
+        :raises GEOError: If the download fails.
+        """
+        url = NCBIGSMLoader.DOWNLOAD_URL_TEMPLATE.format(gse_accession)
+        params = {"api_key": self.api_key} if self.api_key else None
+        try:
+            self.rate_limiter.acquire()
+            response = self.session.get(url, params=params, stream=True)
+            try:
+                response.raise_for_status()
+                return [self._to_gsm(attributes)
+                        for entity_type, _, attributes in iter_soft_entities(response.iter_lines(decode_unicode=True))
+                        if entity_type == "SAMPLE"]
+            finally:
+                response.close()
+        except requests.HTTPError as e:
+            status_code = e.response.status_code
+            reason = None if status_code == 429 else GEOError.NOT_FOUND if status_code == 404 else GEOError.HTTP_ERROR
+            raise GEOError(f"Error downloading samples of GEO dataset {gse_accession}: {status_code}", reason)
+        except requests.RequestException:
+            raise GEOError(f"Network failure when downloading samples of GEO dataset {gse_accession}")
+
+    @staticmethod
+    def _to_gsm(attributes: Dict[str, List[str]]) -> GSM:
+        """
+        Creates a GSM object from the attributes of a sample, with values
+        formatted as in GEOmetadb.
+
+        :param attributes: Attributes of the sample, see `iter_soft_entities`.
+        """
+        values = {name: NCBIGSELoader.GEOMETADB_SEPARATOR.join(items) for name, items in attributes.items()}
+        values["gsm"] = values.get("geo_accession")
+        values["gpl"] = values.get("platform_id")
+        values["series_id"] = ",".join(attributes.get("series_id", []))
+        supplementary_files = [value for name in sorted(attributes) if name.startswith("supplementary_file")
+                               for value in attributes[name] if value and value != "NONE"]
+        values["supplementary_file"] = NCBIGSELoader.GEOMETADB_SEPARATOR.join(supplementary_files)
+        for date_field in ("submission_date", "last_update_date"):
+            if date_field in values:
+                values[date_field] = NCBIGSELoader._format_date(values[date_field])
+        for count_field in ("data_row_count", "channel_count"):
+            try:
+                values[count_field] = float(values[count_field])
+            except (KeyError, ValueError):
+                values[count_field] = None
+        NCBIGSELoader._format_contact_info(values)
+        return GSM(**{name: value for name, value in values.items() if name in NCBIGSMLoader.GSM_FIELD_NAMES})
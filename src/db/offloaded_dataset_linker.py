@@ -0,0 +1,36 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import Dict, List, Optional
+
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.paper_dataset_linker import PaperDatasetLinker
+
+
+class OffloadedDatasetLinker(AsyncPaperDatasetLinker):
+    """
+    Asynchronous linker that runs a blocking `PaperDatasetLinker` in a
+    thread pool, so the event loop is free while the linker waits for its
+    upstream service.
+    """
+
+    def __init__(self, linker: PaperDatasetLinker, executor: Optional[Executor] = None) -> None:
+        """
+        :param linker: Blocking linker to run.
+        :param executor: Thread pool that runs the linker. Long-lived pools let
+        the linker reuse per-thread resources; the event loop's default pool is
+        used if not provided.
+        """
+        self.linker = linker
+        self.executor = executor
+
+    @property
+    def name(self) -> str:
+        return self.linker.name
+
+    async def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.linker.link_to_datasets,
+                                                                pubmed_ids)
+
+    async def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.linker.link_to_datasets_by_paper,
+                                                                pubmed_ids)
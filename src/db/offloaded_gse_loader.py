@@ -0,0 +1,28 @@
+import asyncio
+from concurrent.futures import Executor
+from typing import List, Optional
+
+from src.db.async_gse_loader import AsyncGSELoader
+from src.db.gse import GSE
+from src.db.gse_loader import GSELoader
+
+
+class OffloadedGSELoader(AsyncGSELoader):
+    """
+    Asynchronous loader that runs a blocking `GSELoader` (e.g. the GEOmetadb
+    loader) in a thread pool, so the event loop is free while it waits for I/O.
+    """
+
+    def __init__(self, loader: GSELoader, executor: Optional[Executor] = None) -> None:
+        """
+        :param loader: Blocking loader to run.
+        :param executor: Thread pool that runs the loader. Long-lived pools let
+        the loader reuse per-thread resources such as SQLite connections; the
+        event loop's default pool is used if not provided.
+        """
+        self.loader = loader
+        self.executor = executor
+
+    async def load_gses(self, gse_accessions: List[str], fields: Optional[List[str]] = None) -> List[GSE]:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.loader.load_gses,
+                                                                gse_accessions, fields)
@@ -1,9 +1,56 @@
 from abc import ABCMeta
 from abc import abstractmethod
-from typing import List
+from typing import Callable, Dict, List
+
+from src.db.metrics import REGISTRY, instrument
+
+LINKER_DURATION = REGISTRY.histogram(
+    "pubtrends_datasets_linker_duration_seconds",
+    "Time spent linking papers to datasets, by linker class, data source and method.",
+    ["linker", "source", "method"])
+LINKER_ERRORS = REGISTRY.counter(
+    "pubtrends_datasets_linker_errors_total",
+    "Exceptions raised by the linkers, by linker class, data source and exception type.",
+    ["linker", "source", "exception"])
+LINKED_GSES = REGISTRY.counter(
+    "pubtrends_datasets_linked_datasets_total",
+    "GEO accessions returned by the linkers, by linker class and data source.",
+    ["linker", "source"])
+
+
+def _count_links(links) -> int:
+    # link_to_datasets returns a list, link_to_datasets_by_paper a dictionary of lists
+    return sum(map(len, links.values())) if isinstance(links, dict) else len(links)
+
+
+def _instrument(method: Callable) -> Callable:
+    return instrument(method, LINKER_DURATION, LINKER_ERRORS, LINKED_GSES,
+                      lambda linker: {"linker": type(linker).__name__, "source": linker.name}, _count_links)
 
 
 class PaperDatasetLinker(metaclass=ABCMeta):
+    """
+    Links papers to the GEO datasets associated with them.
+
+    The `link_to_datasets` and `link_to_datasets_by_paper` methods of every
+    linker are instrumented: their durations, exceptions and numbers of
+    linked datasets are recorded in the metrics of `src.db.metrics.REGISTRY`.
+    """
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        for method_name in ("link_to_datasets", "link_to_datasets_by_paper"):
+            method = cls.__dict__.get(method_name)
+            if method is not None and not getattr(method, "__isabstractmethod__", False):
+                setattr(cls, method_name, _instrument(method))
+
+    @property
+    def name(self) -> str:
+        """
+        Name of the data source, used in logs and timing reports.
+        """
+        return type(self).__name__
+
     @abstractmethod
     def link_to_datasets(self, pubmed_ids: List[str]) -> List[str]:
         """
@@ -17,3 +64,21 @@ class PaperDatasetLinker(metaclass=ABCMeta):
         :rtype: List[str]
         """
         pass
+
+    @_instrument
+    def link_to_datasets_by_paper(self, pubmed_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Returns the GEO accessions for datasets associated with each of the
+        articles provided by the list of PubMed IDs. The default implementation
+        links the articles one by one; linkers that can tell which article a
+        link belongs to override it to link all articles at once.
+
+        :param pubmed_ids: List of Pubmed IDs for which to get associtated GEO acessions.
+        :type pubmed_ids: List[str]
+        :return: Dictionary that maps each PubMed ID to the GEO accessions of
+        its datasets (an empty list if there are none).
+        :rtype: Dict[str, List[str]]
+        """
+        if not pubmed_ids:
+            raise ValueError("At least one valid PubMed ID is required")
+        return {pubmed_id: self.link_to_datasets([pubmed_id]) for pubmed_id in dict.fromkeys(pubmed_ids)}
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Thread-safe token bucket rate limiter, shared by blocking callers and
+    coroutines.
+
+    The bucket is refilled at `rate` tokens per second and holds at most
+    `burst` tokens. Every request takes one token; when the bucket is empty,
+    callers reserve the next free slot and sleep until it comes, so concurrent
+    callers are spaced out evenly instead of retrying all at once.
+    """
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """
+        :param rate: Allowed number of requests per second.
+        :param burst: Number of requests that may be made back to back after
+        the limiter has been idle.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Blocks until the caller is allowed to make a request.
+
+        :return: Number of seconds the caller had to wait.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self) -> float:
+        """
+        Waits until the calling coroutine is allowed to make a request, without
+        blocking the event loop.
+
+        :return: Number of seconds the caller had to wait.
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def reserve(self) -> float:
+        """
+        Takes a token, reserving the next free slot if the bucket is empty.
+
+        :return: Number of seconds until the reserved slot comes.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+            self._last_refill = now
+            # A negative balance means that the slots up to now are already reserved by other callers
+            self._tokens -= 1
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
@@ -0,0 +1,86 @@
+"""
+Incremental parsers of GEO entities in SOFT format, as returned by the GEO
+accession display (`acc.cgi?targ=self&form=text`)::
+
+    ^SERIES = GSE116672
+    !Series_title = ...
+    !Series_contributor = Fabio,,Zanini
+    !Series_contributor = Makeda,L,Robinson
+    ...
+
+`parse_series_header` only keeps the attribute lines of the first entity
+and stops reading as soon as the next entity or a data table begins, so the
+rest of the stream is never read. `iter_soft_entities` yields every entity
+of the stream as soon as its attributes have been read.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def parse_series_header(lines: Iterable[str]) -> Dict[str, List[str]]:
+    """
+    Parses the attributes of the first entity of a SOFT stream.
+
+    Attribute names lose their entity prefix (`!Series_title` becomes
+    `title`), and every attribute maps to the list of its values, since
+    attributes such as contributors are repeated.
+
+    :param lines: Lines of the SOFT stream.
+    :return: Dictionary that maps attribute names to their values.
+    """
+    attributes: Dict[str, List[str]] = {}
+    in_entity = False
+    for line in lines:
+        if line.startswith("^"):
+            if in_entity:
+                break
+            in_entity = True
+            continue
+        if not line.startswith("!"):
+            continue
+        name, value = _parse_attribute(line)
+        if name.endswith("table_begin"):
+            break
+        attributes.setdefault(name, []).append(value)
+    return attributes
+
+
+def iter_soft_entities(lines: Iterable[str]) -> Iterator[Tuple[str, str, Dict[str, List[str]]]]:
+    """
+    Parses all entities of a SOFT stream, skipping their data tables.
+
+    :param lines: Lines of the SOFT stream.
+    :return: Iterator over the type (e.g. "SAMPLE"), the accession and the
+    attributes of every entity, see `parse_series_header`.
+    """
+    entity: Optional[Tuple[str, str, Dict[str, List[str]]]] = None
+    in_table = False
+    for line in lines:
+        if line.startswith("^"):
+            if entity is not None:
+                yield entity
+            entity_type, _, accession = line[1:].partition("=")
+            entity = (entity_type.strip(), accession.strip(), {})
+            in_table = False
+        elif line.startswith("!") and entity is not None:
+            name, value = _parse_attribute(line)
+            if name.endswith("table_begin"):
+                in_table = True
+            elif name.endswith("table_end"):
+                in_table = False
+            elif not in_table:
+                entity[2].setdefault(name, []).append(value)
+    if entity is not None:
+        yield entity
+
+
+def _parse_attribute(line: str) -> Tuple[str, str]:
+    """
+    Parses an attribute line, e.g. "!Series_contact_name = Fabio,,Zanini".
+
+    :return: Attribute name without the entity prefix ("contact_name") and value.
+    """
+    name, _, value = line[1:].partition("=")
+    name = name.strip()
+    _, separator, attribute = name.partition("_")
+    return attribute if separator else name, value.strip()
@@ -0,0 +1,224 @@
+import logging
+import os
+import pathlib
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _Version:
+    """
+    One version of the database file, with the connections opened to it and
+    the number of readers currently using them.
+    """
+
+    def __init__(self, path: str, inode: Optional[int] = None) -> None:
+        self.path = path
+        self.inode = inode
+        self.leases = 0
+        self.retired = False
+        # All open connections, and those that no reader uses, most recently used last
+        self.connections: List[sqlite3.Connection] = []
+        self.idle: List[sqlite3.Connection] = []
+        # Open connections plus connections that are being opened
+        self.size = 0
+
+
+class ReadOnlySQLiteConnections:
+    """
+    Pool of long-lived, read-only connections to an SQLite database.
+
+    - Connections are opened in URI `mode=ro` with `query_only` enabled, so
+      they can never write to the database.
+    - Readers check out a connection from the pool and return it when they
+      are done, so connections keep the parsed schema and the page cache warm
+      across requests, whichever thread serves them. SQLite connections must
+      not be used by several threads at once, so a connection is only ever
+      checked out by one reader. Nested readers of a thread share its connection.
+    - At most `max_connections` connections are opened. Readers wait for a
+      connection to be returned when all of them are checked out.
+    - A process forked after connections were opened (e.g. a pre-fork
+      multi-worker server) opens its own connections instead of using the
+      inherited ones.
+    - If `swap_check_interval` is set, the path may be a symlink that is
+      switched to a new version of the database (see `geometadb_versions`).
+      Readers that start after the switch use the new file, while readers
+      that are running finish on the old one, whose connections are closed
+      once its last reader is done.
+    """
+
+    def __init__(self, path: str, mmap_size: int = 0, cache_size: int = -2000,
+                 swap_check_interval: Optional[float] = None, max_connections: int = 8) -> None:
+        """
+        :param path: Path to the SQLite database.
+        :param mmap_size: Maximum number of bytes of the database file that are memory-mapped.
+        :param cache_size: SQLite page cache size: number of pages if positive, KiB if negative.
+        :param swap_check_interval: Minimum number of seconds between checks whether the path
+        points to another file, None to never check.
+        :param max_connections: Maximum number of connections open to a version of the database.
+        """
+        if max_connections < 1:
+            raise ValueError("max_connections must be at least 1")
+        self.path = path
+        self.mmap_size = mmap_size
+        self.cache_size = cache_size
+        self.swap_check_interval = swap_check_interval
+        self.max_connections = max_connections
+        # Connections checked out by the readers of the current thread, with the number of nested readers
+        self._local = threading.local()
+        self._version = self._current_version()
+        # Connections inherited from the parent process, kept referenced so they are never closed by this process
+        self._inherited: List[sqlite3.Connection] = []
+        self._next_swap_check = 0.0
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """
+        Checks out a read-only connection from the pool and returns it once
+        the reader is done. The database version it is connected to isn't
+        closed before then.
+        """
+        if os.getpid() != self._pid:
+            self._detach_from_parent()
+        self._check_for_swap()
+        with self._lock:
+            version = self._version
+            version.leases += 1
+        try:
+            connection = self._check_out(version)
+            try:
+                yield connection
+            finally:
+                self._check_in(version, connection)
+        finally:
+            self._release(version)
+
+    @property
+    def current_path(self) -> str:
+        """
+        :return: Path of the database file that new readers use.
+        """
+        return self._version.path
+
+    def close(self) -> None:
+        """
+        Closes all connections that aren't in use, and the others once their
+        readers are done. Later readers open new connections.
+        """
+        with self._lock:
+            retired, self._version = self._version, _Version(self._version.path, self._version.inode)
+        self._retire(retired)
+
+    def _checked_out(self) -> Dict[_Version, List]:
+        if not hasattr(self._local, "checked_out"):
+            self._local.checked_out = {}
+        return self._local.checked_out
+
+    def _check_out(self, version: _Version) -> sqlite3.Connection:
+        checked_out = self._checked_out()
+        if version in checked_out:
+            checked_out[version][1] += 1
+            return checked_out[version][0]
+
+        with self._returned:
+            while not version.idle and version.size >= self.max_connections:
+                self._returned.wait()
+            connection = version.idle.pop() if version.idle else None
+            if connection is None:
+                version.size += 1
+        if connection is None:
+            try:
+                connection = self._open(version.path)
+            except BaseException:
+                with self._returned:
+                    version.size -= 1
+                    self._returned.notify()
+                raise
+            with self._lock:
+                version.connections.append(connection)
+        checked_out[version] = [connection, 1]
+        return connection
+
+    def _check_in(self, version: _Version, connection: sqlite3.Connection) -> None:
+        checked_out = self._checked_out()
+        checked_out[version][1] -= 1
+        if checked_out[version][1] > 0:
+            return
+        del checked_out[version]
+        with self._returned:
+            if connection in version.connections:
+                version.idle.append(connection)
+            self._returned.notify()
+
+    def _open(self, path: str) -> sqlite3.Connection:
+        uri = f"{pathlib.Path(path).absolute().as_uri()}?mode=ro"
+        # Connections are used by whichever thread checks them out
+        connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        connection.execute("PRAGMA query_only = ON")
+        connection.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        connection.execute(f"PRAGMA cache_size = {int(self.cache_size)}")
+        return connection
+
+    def _current_version(self) -> _Version:
+        if self.swap_check_interval is None:
+            return _Version(self.path)
+        path = os.path.realpath(self.path)
+        try:
+            return _Version(path, os.stat(path).st_ino)
+        except OSError:
+            return _Version(path)
+
+    def _check_for_swap(self) -> None:
+        if self.swap_check_interval is None:
+            return
+        now = time.monotonic()
+        if now < self._next_swap_check:
+            return
+        self._next_swap_check = now + self.swap_check_interval
+        version = self._current_version()
+        with self._lock:
+            retired = self._version
+            if version.inode is None or (version.path, version.inode) == (retired.path, retired.inode):
+                return
+            self._version = version
+        logger.info(f"Switching readers of {self.path} from {retired.path} to {version.path}")
+        self._retire(retired)
+
+    def _retire(self, version: _Version) -> None:
+        with self._lock:
+            version.retired = True
+            connections = self._take_drained_connections(version)
+        for connection in connections:
+            connection.close()
+
+    def _release(self, version: _Version) -> None:
+        with self._lock:
+            version.leases -= 1
+            connections = self._take_drained_connections(version)
+        for connection in connections:
+            connection.close()
+        if connections:
+            logger.info(f"Closed {len(connections)} drained connections to {version.path}")
+
+    @staticmethod
+    def _take_drained_connections(version: _Version) -> List[sqlite3.Connection]:
+        if not version.retired or version.leases > 0:
+            return []
+        connections, version.connections, version.idle = version.connections, [], []
+        return connections
+
+    def _detach_from_parent(self) -> None:
+        with self._lock:
+            if os.getpid() == self._pid:
+                return
+            logger.info(f"Process {os.getpid()} was forked, opening new connections to {self.path}")
+            self._inherited.extend(self._version.connections)
+            self._version = _Version(self._version.path, self._version.inode)
+            self._pid = os.getpid()
@@ -0,0 +1,147 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, Generic, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    """
+    Queue that takes writes off the request path: items are written in
+    batches by a background thread.
+
+    - A batch is written once `max_batch_size` items are queued, or
+      `flush_interval` seconds after the first item of the batch was queued,
+      so writes from many requests share a transaction.
+    - Failed writes are logged and the batch is dropped, like failed inline writes.
+    - `flush` waits until all queued items are written and `close` flushes
+      and stops the thread. Items queued after `close` are written inline.
+    """
+
+    def __init__(self, write: Callable[[List[T]], None], max_batch_size: int = 500,
+                 flush_interval: float = 1.0, name: str = "write-behind") -> None:
+        """
+        :param write: Function that writes a batch of items.
+        :param max_batch_size: Maximum number of items written at once.
+        :param flush_interval: Maximum number of seconds an item waits for its batch to fill up.
+        :param name: Name of the background thread.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.write = write
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.name = name
+        self._pending: List[T] = []
+        self._in_flight = 0
+        self._flush_requests = 0
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+        self._condition = threading.Condition()
+        self._flushes = 0
+        self._items_written = 0
+        self._last_flush_seconds = 0.0
+        self._max_flush_seconds = 0.0
+        self._total_flush_seconds = 0.0
+
+    def put(self, items: List[T]) -> None:
+        """
+        Queues items for writing.
+
+        :param items: Items to write.
+        """
+        if not items:
+            return
+        with self._condition:
+            if not self._closed:
+                self._pending.extend(items)
+                if self._thread is None:
+                    # Started on first use, so processes forked before that get their own thread
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+                self._condition.notify_all()
+                return
+        self._write_batch(list(items))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Waits until all items queued so far are written.
+
+        :param timeout: Maximum number of seconds to wait, or None to wait indefinitely.
+        :return: Whether all items were written before the timeout.
+        """
+        with self._condition:
+            self._flush_requests += 1
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+            finally:
+                self._flush_requests -= 1
+
+    def close(self) -> None:
+        """
+        Writes the queued items and stops the background thread.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        :return: Number of queued items (including the batch being written),
+        number of batches and items written, and the duration of the last
+        and the slowest write, and of all writes, in seconds.
+        """
+        with self._condition:
+            return {
+                "depth": len(self._pending) + self._in_flight,
+                "flushes": self._flushes,
+                "items_written": self._items_written,
+                "last_flush_seconds": self._last_flush_seconds,
+                "max_flush_seconds": self._max_flush_seconds,
+                "total_flush_seconds": self._total_flush_seconds,
+            }
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                deadline = time.monotonic() + self.flush_interval
+                while (len(self._pending) < self.max_batch_size and not self._closed
+                       and not self._flush_requests):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+                self._in_flight = len(batch)
+
+            elapsed = self._write_batch(batch)
+
+            with self._condition:
+                self._in_flight = 0
+                self._flushes += 1
+                self._items_written += len(batch)
+                self._last_flush_seconds = elapsed
+                self._max_flush_seconds = max(self._max_flush_seconds, elapsed)
+                self._total_flush_seconds += elapsed
+                depth = len(self._pending)
+                self._condition.notify_all()
+            logger.info(f"{self.name}: wrote {len(batch)} items in {elapsed:.3f}s, {depth} queued")
+
+    def _write_batch(self, batch: List[T]) -> float:
+        start = time.perf_counter()
+        try:
+            self.write(batch)
+        except Exception:
+            logger.exception(f"{self.name}: failed to write {len(batch)} items")
+        return time.perf_counter() - start
@@ -1,7 +1,18 @@
+from typing import Optional
+
+
 class GEOError(Exception):
     """
     Class for exceptions that are caused by problems with GEO.
+
+    `reason` tells permanent-looking failures of a series (e.g. GEO has no
+    record of it) from transient ones (network failures), for which it is None.
     """
 
-    def __init__(self, message: str):
+    NOT_FOUND = "not_found"
+    EMPTY_RECORD = "empty_record"
+    HTTP_ERROR = "http_error"
+
+    def __init__(self, message: str, reason: Optional[str] = None):
         super().__init__(message)
+        self.reason = reason
@@ -0,0 +1,283 @@
+import unittest
+from unittest.mock import AsyncMock, Mock, patch
+
+from parameterized import parameterized
+
+import src.app.app as app_module
+from src.db.async_gse_loader import AsyncGSELoader
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.entrez_client import EntrezClient
+from src.db.gse import GSE
+from src.db.gse_loader import GSELoader
+from src.db.gsm import GSM
+from src.db.gsm_loader import GSMLoader
+from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.exception.geo_error import GEOError
+
+LINKS = {
+    "1": ["GSE1", "GSE2"],
+    "2": ["GSE2", "GDS3"],
+    "3": [],
+}
+
+
+class TestPostDatasets(unittest.TestCase):
+    def setUp(self):
+        self.linker = Mock(spec=PaperDatasetLinker)
+        self.linker.link_to_datasets_by_paper.side_effect = lambda pubmed_ids: {
+            pubmed_id: LINKS.get(pubmed_id, []) for pubmed_id in pubmed_ids
+        }
+        self.loader = Mock(spec=GSELoader)
+        self.loader.load_gses.side_effect = lambda accessions, fields: [
+            GSE(gse=accession, title=f"Series {accession}") for accession in accessions]
+        for name, value in [("dataset_linker", self.linker), ("gse_loader", self.loader)]:
+            patcher = patch.object(app_module, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    @parameterized.expand([
+        ("no_body", None),
+        ("not_an_object", ["1", "2"]),
+        ("missing_pubmed_ids", {"fields": ["title"]}),
+        ("empty_pubmed_ids", {"pubmed_ids": []}),
+        ("blank_pubmed_ids", {"pubmed_ids": [" ", ""]}),
+        ("pubmed_ids_not_a_list", {"pubmed_ids": "1,2"}),
+        ("pubmed_ids_not_strings", {"pubmed_ids": [["1"]]}),
+        ("fields_not_a_list", {"pubmed_ids": ["1"], "fields": "title"}),
+        ("unknown_field", {"pubmed_ids": ["1"], "fields": ["no_such_field"]}),
+    ])
+    def test_bad_request(self, _, body):
+        response = self.client.post("/datasets", json=body) if body is not None else self.client.post("/datasets")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.get_json())
+        self.linker.link_to_datasets_by_paper.assert_not_called()
+        self.loader.load_gses.assert_not_called()
+
+    def test_too_many_pubmed_ids(self):
+        with patch.object(app_module.CONFIG, "max_bulk_pubmed_ids", 2):
+            response = self.client.post("/datasets", json={"pubmed_ids": ["1", "2", "3"]})
+            # Duplicates count once towards the limit
+            allowed = self.client.post("/datasets", json={"pubmed_ids": ["1", "2", "1"]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json(), {"error": "At most 2 PubMed IDs are allowed"})
+        self.assertEqual(allowed.status_code, 200)
+
+    def test_groups_series_by_paper(self):
+        response = self.client.post("/datasets", json={"pubmed_ids": ["1", "2", "3", "4"], "fields": ["title"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertDictEqual(response.get_json(), {
+            "1": [{"gse": "GSE1", "title": "Series GSE1"}, {"gse": "GSE2", "title": "Series GSE2"}],
+            "2": [{"gse": "GSE2", "title": "Series GSE2"}],
+            "3": [],
+            "4": [],
+        })
+        # Series linked to several papers are loaded once, and non-series accessions aren't loaded
+        self.loader.load_gses.assert_called_once_with(["GSE1", "GSE2"], ["title", "gse"])
+
+    def test_pubmed_ids_are_deduplicated(self):
+        response = self.client.post("/datasets", json={"pubmed_ids": [1, " 1 ", "2", 2]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(sorted(response.get_json()), ["1", "2"])
+        self.linker.link_to_datasets_by_paper.assert_called_once_with(["1", "2"])
+
+    def test_no_series_skips_loading(self):
+        response = self.client.post("/datasets", json={"pubmed_ids": ["3"]})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertDictEqual(response.get_json(), {"3": []})
+        self.loader.load_gses.assert_not_called()
+
+    def test_linker_error(self):
+        self.linker.link_to_datasets_by_paper.side_effect = RuntimeError("ELink is down")
+
+        response = self.client.post("/datasets", json={"pubmed_ids": ["1"]})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {"error": "ELink is down"})
+
+
+class TestGetDatasetsLoaderChain(unittest.TestCase):
+    def setUp(self):
+        linker = Mock(spec=PaperDatasetLinker)
+        linker.link_to_datasets.return_value = ["GSE1"]
+        self.entrez = Mock(spec=EntrezClient)
+        self.entrez.request_json.return_value = {"result": {"uids": ["200000001"], "200000001": {
+            "accession": "GSE1", "title": "Summary title"}}}
+        self.ncbi_loader = Mock(spec=GSELoader)
+        self.ncbi_loader.load_gses.side_effect = lambda accessions, fields: [
+            GSE(gse=accession, title="Full title", contact="Contact") for accession in accessions]
+        for target, name, value in [(app_module, "dataset_linker", linker),
+                                    (app_module.esummary_gse_loader, "entrez", self.entrez),
+                                    (app_module.geometadb_gse_loader, "load_gses", Mock(return_value=[])),
+                                    (app_module.gse_loader, "loaders", [app_module.geometadb_gse_loader,
+                                                                        app_module.esummary_gse_loader,
+                                                                        self.ncbi_loader])]:
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    def test_full_field_requests_skip_esummary(self):
+        response = self.client.get("/datasets?pubmed_ids=1")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()[0]["contact"], "Contact")
+        self.entrez.request_json.assert_not_called()
+        self.ncbi_loader.load_gses.assert_called_once_with(["GSE1"], None)
+
+    def test_esummary_fields_are_loaded_from_esummary(self):
+        response = self.client.get("/datasets?pubmed_ids=1&fields=title")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.get_json(), [{"gse": "GSE1", "title": "Summary title"}])
+        self.entrez.request_json.assert_called_once()
+        self.ncbi_loader.load_gses.assert_not_called()
+
+
+class TestNestedChainMetrics(unittest.TestCase):
+    def setUp(self):
+        geometadb = Mock(spec=PaperDatasetLinker)
+        geometadb.name = "GEOmetadbDatasetLinker"
+        geometadb.link_to_datasets.return_value = ["GSE1"]
+        geometadb.link_to_datasets_by_paper.return_value = {"1": ["GSE1"]}
+        network_linkers = []
+        for name, accessions in [("ELinkDatasetLinker", ["GSE2"]), ("EuropePMCDatasetLinker", ["GSE2", "GSE3"])]:
+            linker = Mock(spec=PaperDatasetLinker)
+            linker.name = name
+            linker.link_to_datasets.return_value = accessions
+            linker.link_to_datasets_by_paper.return_value = {"1": accessions}
+            network_linkers.append(linker)
+        network = app_module.dataset_linker.linkers[1]
+        loader = Mock(spec=GSELoader)
+        loader.load_gses.return_value = []
+        for target, name, value in [(app_module.dataset_linker, "linkers", [geometadb, network]),
+                                    (app_module.dataset_linker, "complete", True),
+                                    (network, "linkers", network_linkers),
+                                    (app_module, "gse_loader", loader)]:
+            patcher = patch.object(target, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    def _linked(self, source):
+        pattern = f'pubtrends_datasets_linked_datasets_total{{linker="ChainedDatasetLinker",source="{source}"}} '
+        lines = [line for line in self.client.get("/metrics").get_data(as_text=True).splitlines()
+                 if line.startswith(pattern)]
+        return float(lines[0][len(pattern):]) if lines else 0.0
+
+    def test_chains_are_recorded_separately(self):
+        before = {source: self._linked(source) for source in ("all", "network")}
+
+        self.assertEqual(self.client.get("/datasets?pubmed_ids=1").status_code, 200)
+
+        self.assertEqual(self._linked("all") - before["all"], 3)
+        self.assertEqual(self._linked("network") - before["network"], 2)
+
+
+class TestGetDatasetsAsync(unittest.TestCase):
+    def setUp(self):
+        self.linker = Mock(spec=AsyncPaperDatasetLinker)
+        self.linker.link_to_datasets = AsyncMock(return_value=["GSE1", "GDS3", "GSE2"])
+        self.loader = Mock(spec=AsyncGSELoader)
+        self.loader.load_gses = AsyncMock(side_effect=lambda accessions, fields: [
+            GSE(gse=accession, title=f"Series {accession}") for accession in accessions])
+        self.http_clients = []
+
+        def async_pipeline(http_client):
+            self.http_clients.append(http_client)
+            return self.linker, self.loader
+
+        patcher = patch.object(app_module, "async_pipeline", side_effect=async_pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    def test_loads_linked_series(self):
+        response = self.client.get("/datasets/async?pubmed_ids=1,2&fields=title")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertListEqual(response.get_json(), [{"gse": "GSE1", "title": "Series GSE1"},
+                                                   {"gse": "GSE2", "title": "Series GSE2"}])
+        self.linker.link_to_datasets.assert_awaited_once_with(["1", "2"])
+        self.loader.load_gses.assert_awaited_once_with(["GSE1", "GSE2"], ["title", "gse"])
+        # Every request gets its own client, closed once the response is built
+        self.assertEqual(len(self.http_clients), 1)
+        self.assertTrue(self.http_clients[0].is_closed)
+
+    def test_bad_request(self):
+        response = self.client.get("/datasets/async")
+
+        self.assertEqual(response.status_code, 400)
+        self.linker.link_to_datasets.assert_not_awaited()
+
+    def test_linker_error(self):
+        self.linker.link_to_datasets.side_effect = RuntimeError("ELink is down")
+
+        response = self.client.get("/datasets/async?pubmed_ids=1")
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.get_json(), {"error": "ELink is down"})
+
+
+class TestGetSamples(unittest.TestCase):
+    def setUp(self):
+        self.gsms = {"GSE1": [GSM(gsm=f"GSM{i}", title=f"Sample {i}") for i in range(1, 4)]}
+        self.loader = Mock(spec=GSMLoader)
+        self.loader.iter_gsms.side_effect = lambda accession, after, limit: iter(
+            [gsm for gsm in self.gsms.get(accession, []) if gsm.gsm > (after or "")][:limit])
+        patcher = patch.object(app_module, "gsm_loader", self.loader)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = app_module.app.test_client()
+
+    def test_get_samples(self):
+        response = self.client.get("/samples", query_string={"gse": "GSE1", "limit": 2})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertListEqual([sample["gsm"] for sample in body["samples"]], ["GSM1", "GSM2"])
+        self.assertEqual(body["next"], "GSM2")
+
+    def test_cursor_past_last_sample(self):
+        response = self.client.get("/samples", query_string={"gse": "GSE1", "after": "GSM3"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertDictEqual(response.get_json(), {"samples": [], "next": None})
+
+    @parameterized.expand([
+        ("no_samples", None),
+        ("no_samples_after_cursor", "GSM1"),
+        ("geo_not_found", None, GEOError("Error downloading samples of GEO dataset GSE2: 404", GEOError.NOT_FOUND)),
+    ])
+    def test_unknown_series(self, _, after, error=None):
+        if error is not None:
+            self.loader.iter_gsms.side_effect = lambda accession, after, limit: self._fail(error)
+
+        response = self.client.get("/samples", query_string={"gse": "GSE2", "after": after or ""})
+
+        self.assertEqual(response.status_code, 404)
+        self.assertDictEqual(response.get_json(), {"error": "GEO series GSE2 not found"})
+
+    def test_load_error(self):
+        self.loader.iter_gsms.side_effect = lambda accession, after, limit: self._fail(
+            GEOError("Network failure when downloading samples of GEO dataset GSE1"))
+
+        response = self.client.get("/samples", query_string={"gse": "GSE1"})
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn("error", response.get_json())
+
+    @staticmethod
+    def _fail(error):
+        # The loaders are generators, so they fail once the first sample is requested
+        raise error
+        yield
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import Mock
+
+from src.db.async_chained_dataset_linker import AsyncChainedDatasetLinker
+from src.db.async_paper_dataset_linker import AsyncPaperDatasetLinker
+from src.db.offloaded_dataset_linker import OffloadedDatasetLinker
+from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.exception.entrez_error import EntrezError
+
+
+class SlowAsyncLinker(AsyncPaperDatasetLinker):
+    def __init__(self, accessions, delay: float):
+        self.accessions = accessions
+        self.delay = delay
+
+    async def link_to_datasets(self, pubmed_ids):
+        await asyncio.sleep(self.delay)
+        return self.accessions
+
+
+class FailingAsyncLinker(AsyncPaperDatasetLinker):
+    async def link_to_datasets(self, pubmed_ids):
+        raise EntrezError("ELink status 500")
+
+
+class TestAsyncChainedDatasetLinker(unittest.IsolatedAsyncioTestCase):
+    async def test_link_to_datasets_merges_in_linker_order(self):
+        # The first linker finishes last, but its accessions still come first
+        linker = AsyncChainedDatasetLinker(SlowAsyncLinker(["GSE1", "GSE2"], 0.05),
+                                           SlowAsyncLinker(["GSE2", "GSE3"], 0))
+
+        self.assertListEqual(await linker.link_to_datasets(["112233"]), ["GSE1", "GSE2", "GSE3"])
+
+    async def test_link_to_datasets_runs_linkers_concurrently(self):
+        linker = AsyncChainedDatasetLinker(SlowAsyncLinker(["GSE1"], 0.2), SlowAsyncLinker(["GSE2"], 0.2))
+
+        start = time.perf_counter()
+        await linker.link_to_datasets(["112233"])
+        elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.35)
+
+    async def test_link_to_datasets_skips_failing_linker(self):
+        linker = AsyncChainedDatasetLinker(FailingAsyncLinker(), SlowAsyncLinker(["GSE1"], 0))
+
+        with self.assertLogs("src.db.async_chained_dataset_linker") as logs:
+            self.assertListEqual(await linker.link_to_datasets(["112233"]), ["GSE1"])
+        self.assertRegex(logs.output[-1], r"FailingAsyncLinker=[0-9.]+s, SlowAsyncLinker=[0-9.]+s")
+
+    async def test_link_to_datasets_by_paper(self):
+        first = SlowAsyncLinker(["GSE1"], 0)
+        linker = AsyncChainedDatasetLinker(first, FailingAsyncLinker())
+
+        result = await linker.link_to_datasets_by_paper(["1", "2", "1"])
+
+        self.assertDictEqual(result, {"1": ["GSE1"], "2": ["GSE1"]})
+
+    async def test_offloaded_linker(self):
+        sync_linker = Mock(spec=PaperDatasetLinker)
+        sync_linker.name = "ELinkDatasetLinker"
+        sync_linker.link_to_datasets.return_value = ["GSE1"]
+        sync_linker.link_to_datasets_by_paper.return_value = {"1": ["GSE1"]}
+        linker = AsyncChainedDatasetLinker(OffloadedDatasetLinker(sync_linker))
+
+        self.assertListEqual(await linker.link_to_datasets(["1"]), ["GSE1"])
+        self.assertDictEqual(await linker.link_to_datasets_by_paper(["1"]), {"1": ["GSE1"]})
+        sync_linker.link_to_datasets.assert_called_once_with(["1"])
+
+    async def test_link_to_datasets_empty_input(self):
+        linker = AsyncChainedDatasetLinker(SlowAsyncLinker(["GSE1"], 0))
+        with self.assertRaises(ValueError):
+            await linker.link_to_datasets([])
+
+    def test_no_linkers(self):
+        self.assertRaises(ValueError, AsyncChainedDatasetLinker)
+
+    async def test_incomplete_mode_only_asks_later_linkers_about_unresolved_papers(self):
+        local = Mock(spec=PaperDatasetLinker)
+        local.name = "GEOmetadbDatasetLinker"
+        local.link_to_datasets_by_paper.return_value = {"1": ["GSE1"], "2": []}
+        network = Mock(spec=PaperDatasetLinker)
+        network.name = "ELinkDatasetLinker"
+        network.link_to_datasets_by_paper.return_value = {"2": ["GSE2"]}
+        linker = AsyncChainedDatasetLinker(OffloadedDatasetLinker(local), OffloadedDatasetLinker(network),
+                                           complete=False)
+
+        self.assertListEqual(await linker.link_to_datasets(["1", "2"]), ["GSE1", "GSE2"])
+        network.link_to_datasets_by_paper.assert_called_once_with(["2"])
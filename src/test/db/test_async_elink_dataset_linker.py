@@ -0,0 +1,164 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs
+
+import httpx
+
+from src.db.async_cached_dataset_linker import AsyncCachedDatasetLinker
+from src.db.async_elink_dataset_linker import AsyncELinkDatasetLinker
+from src.db.async_europepmc_dataset_linker import AsyncEuropePMCDatasetLinker
+from src.db.cached_dataset_linker import CachedDatasetLinker
+from src.db.elink_dataset_linker import ELinkDatasetLinker
+from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.exception.entrez_error import EntrezError
+from src.exception.europepmc_error import EuropePMCError
+
+GEO_IDS = {"1": ["200000001", "100000001"], "2": ["200000001", "200000002"], "3": []}
+ACCESSIONS = {"200000001": "GSE1", "200000002": "GSE2", "100000001": "GPL1"}
+
+
+def entrez_handler(requests):
+    def handle(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        form = parse_qs(request.content.decode())
+        if request.url.path.endswith("elink.fcgi"):
+            return httpx.Response(200, json={"linksets": [
+                {"ids": [pubmed_id], "linksetdbs": [{"links": GEO_IDS[pubmed_id]}] if GEO_IDS[pubmed_id] else []}
+                for pubmed_id in form["id"]
+            ]})
+        uids = form["id"][0].split(",")
+        return httpx.Response(200, json={"result": {
+            "uids": uids, **{uid: {"uid": uid, "accession": ACCESSIONS[uid]} for uid in uids}
+        }})
+
+    return handle
+
+
+class TestAsyncELinkDatasetLinker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.requests = []
+        self.linker = AsyncELinkDatasetLinker(
+            httpx.AsyncClient(transport=httpx.MockTransport(entrez_handler(self.requests))), api_key="key")
+
+    async def test_link_to_datasets_by_paper(self):
+        result = await self.linker.link_to_datasets_by_paper(["1", "2", "3"])
+
+        self.assertDictEqual(result, {"1": ["GSE1"], "2": ["GSE1", "GSE2"], "3": []})
+        self.assertListEqual([request.method for request in self.requests], ["POST", "POST"])
+        self.assertTrue(all(request.url.params["api_key"] == "key" for request in self.requests))
+
+    async def test_link_to_datasets(self):
+        self.assertListEqual(await self.linker.link_to_datasets(["1", "2"]), ["GSE1", "GSE2"])
+
+    async def test_requests_are_batched(self):
+        with patch.object(ELinkDatasetLinker, "ELINK_BATCH_SIZE", 1), \
+                patch.object(ELinkDatasetLinker, "ESUMMARY_BATCH_SIZE", 2):
+            result = await self.linker.link_to_datasets_by_paper(["1", "2", "3"])
+
+        self.assertDictEqual(result, {"1": ["GSE1"], "2": ["GSE1", "GSE2"], "3": []})
+        paths = [request.url.path.rsplit("/", 1)[-1] for request in self.requests]
+        self.assertListEqual(paths, ["elink.fcgi"] * 3 + ["esummary.fcgi"] * 2)
+
+    async def test_upstream_error(self):
+        linker = AsyncELinkDatasetLinker(httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(500, text="ERROR"))))
+
+        with self.assertRaisesRegex(EntrezError, "ELink status 500"):
+            await linker.link_to_datasets_by_paper(["1"])
+
+    async def test_network_error(self):
+        def fail(request):
+            raise httpx.ConnectError("Connection refused")
+
+        linker = AsyncELinkDatasetLinker(httpx.AsyncClient(transport=httpx.MockTransport(fail)))
+
+        with self.assertRaisesRegex(EntrezError, "Network error during ELink API call"):
+            await linker.link_to_datasets_by_paper(["1"])
+
+    async def test_empty_input(self):
+        with self.assertRaises(ValueError):
+            await self.linker.link_to_datasets_by_paper([])
+
+
+class TestAsyncEuropePMCDatasetLinker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.requests = []
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        pubmed_ids = [article_id[len("MED:"):] for article_id in request.url.params["articleIds"].split(",")]
+        return httpx.Response(200, json=[
+            {"extId": pubmed_id, "annotations": [{"exact": f"GSE{pubmed_id}"}, {"exact": f"GSE{pubmed_id}"}]}
+            for pubmed_id in pubmed_ids if pubmed_id != "3"
+        ])
+
+    async def test_link_to_datasets_by_paper(self):
+        linker = AsyncEuropePMCDatasetLinker(httpx.AsyncClient(transport=httpx.MockTransport(self._handle)), 2)
+        pubmed_ids = [str(i) for i in range(1, 11)]
+
+        result = await linker.link_to_datasets_by_paper(pubmed_ids)
+
+        self.assertDictEqual(result, {pubmed_id: [] if pubmed_id == "3" else [f"GSE{pubmed_id}"]
+                                      for pubmed_id in pubmed_ids})
+        # Batches of EuropePMCDatasetLinker.BATCH_SIZE papers
+        self.assertEqual(len(self.requests), 2)
+        self.assertEqual(self.requests[0].url.params["subType"], "geo")
+
+    async def test_malformed_response(self):
+        linker = AsyncEuropePMCDatasetLinker(httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, json=[{"extId": "1"}]))))
+
+        with self.assertRaisesRegex(EuropePMCError, "Malformed response"):
+            await linker.link_to_datasets(["1"])
+
+    async def test_upstream_error(self):
+        linker = AsyncEuropePMCDatasetLinker(httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(503))))
+
+        with self.assertRaisesRegex(EuropePMCError, "status 503"):
+            await linker.link_to_datasets(["1"])
+
+    def test_invalid_concurrency(self):
+        self.assertRaises(ValueError, AsyncEuropePMCDatasetLinker, Mock(), 0)
+
+
+class TestAsyncCachedDatasetLinker(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        fd, self.cache_path = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.addCleanup(os.remove, self.cache_path)
+        sync_linker = Mock(spec=PaperDatasetLinker)
+        sync_linker.name = "ELinkDatasetLinker"
+        self.cache = CachedDatasetLinker(sync_linker, self.cache_path, ttl=3600, negative_ttl=3600)
+        self.requests = []
+        self.linker = AsyncCachedDatasetLinker(self.cache, AsyncELinkDatasetLinker(
+            httpx.AsyncClient(transport=httpx.MockTransport(entrez_handler(self.requests)))))
+
+    async def test_links_are_cached_and_shared_with_the_blocking_linker(self):
+        self.assertDictEqual(await self.linker.link_to_datasets_by_paper(["1", "3"]), {"1": ["GSE1"], "3": []})
+        self.assertDictEqual(await self.linker.link_to_datasets_by_paper(["3", "1", "2"]),
+                             {"3": [], "1": ["GSE1"], "2": ["GSE1", "GSE2"]})
+
+        # Only paper 2 was linked by the second call
+        elink_ids = [parse_qs(request.content.decode())["id"] for request in self.requests
+                     if request.url.path.endswith("elink.fcgi")]
+        self.assertListEqual(elink_ids, [["1", "3"], ["2"]])
+        self.assertDictEqual(self.cache.stats(), {"hits": 2, "misses": 3})
+        # The blocking linker reads the same cache entries
+        self.assertDictEqual(self.cache.link_to_datasets_by_paper(["2"]), {"2": ["GSE1", "GSE2"]})
+        self.cache.linker.link_to_datasets_by_paper.assert_not_called()
+        self.assertEqual(self.linker.name, "ELinkDatasetLinker")
+
+    async def test_errors_are_not_cached(self):
+        linker = AsyncCachedDatasetLinker(self.cache, AsyncELinkDatasetLinker(httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(500)))))
+
+        with self.assertRaises(EntrezError):
+            await linker.link_to_datasets_by_paper(["1"])
+        self.assertDictEqual(self.cache._load(["1"]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest.mock import patch
+from urllib.parse import parse_qs
+
+import httpx
+
+from src.db.async_entrez_client import AsyncEntrezClient
+from src.db.async_esummary_gse_loader import AsyncESummaryGSELoader
+from src.db.esummary_gse_loader import ESummaryGSELoader
+from src.db.gse import GSE
+
+
+def summary(uid: str) -> dict:
+    number = int(uid) - ESummaryGSELoader.SERIES_UID_OFFSET
+    return {"uid": uid, "accession": f"GSE{number}", "title": f"Series {number}", "summary": "Summary",
+            "gdstype": "Expression profiling by array", "pubmedids": ["123"], "pdat": "2018/11/19"}
+
+
+class TestAsyncESummaryGSELoader(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.requests = []
+        self.failing_batches = set()
+        self.loader = AsyncESummaryGSELoader(AsyncEntrezClient(
+            httpx.AsyncClient(transport=httpx.MockTransport(self._handle))))
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        uids = parse_qs(request.content.decode())["id"][0].split(",")
+        if self.failing_batches.intersection(uids):
+            return httpx.Response(500)
+        # GSE404 is unknown to ESummary
+        known = [uid for uid in uids if uid != "200000404"]
+        return httpx.Response(200, json={"result": {"uids": known, **{uid: summary(uid) for uid in known}}})
+
+    async def test_load_gses(self):
+        gses = await self.loader.load_gses(["GSE2", "GSE404", "GDS1", "GSE1", "GSE2"], ["gse", "title", "status"])
+
+        self.assertListEqual(gses, [
+            GSE(gse="GSE2", title="Series 2", status="Public on Nov 19 2018"),
+            GSE(gse="GSE1", title="Series 1", status="Public on Nov 19 2018"),
+        ])
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_failed_batches_are_left_to_the_next_loader(self):
+        self.failing_batches.add("200000001")
+
+        with patch.object(ESummaryGSELoader, "BATCH_SIZE", 1):
+            gses = await self.loader.load_gses(["GSE1", "GSE2"], ["gse", "title"])
+
+        self.assertListEqual(gses, [GSE(gse="GSE2", title="Series 2")])
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_fields_not_in_esummary_make_no_request(self):
+        self.assertListEqual(await self.loader.load_gses(["GSE1"]), [])
+        self.assertListEqual(await self.loader.load_gses(["GSE1"], ["gse", "contributor"]), [])
+        self.assertListEqual(self.requests, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import unittest
+from unittest.mock import AsyncMock, Mock
+
+import httpx
+
+from src.config.config import Config
+from src.db.async_chained_gse_loader import AsyncChainedGSELoader
+from src.db.async_ncbi_gse_loader import AsyncNCBIGSELoader
+from src.db.gse import GSE
+from src.db.gse_loader import GSELoader
+from src.db.gse_negative_cache import GSENegativeCache
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.offloaded_gse_loader import OffloadedGSELoader
+from src.db.rate_limiter import TokenBucketRateLimiter
+from src.exception.geo_error import GEOError
+
+
+def series_text(accession: str) -> str:
+    return "\n".join([f"^SERIES = {accession}", "!Series_title = Title",
+                      f"!Series_geo_accession = {accession}", "!Series_pubmed_id = 12345"])
+
+
+class TestAsyncNCBIGSELoader(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.ncbi_loader = NCBIGSELoader(Mock(), Config(test=True), TokenBucketRateLimiter(1000, burst=100))
+        self.ncbi_loader.max_connections = 2
+        self.ncbi_loader.save_gses = Mock()
+        self.statuses = {}
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def _handle(self, request: httpx.Request) -> httpx.Response:
+        accession = request.url.params["acc"]
+        self.requests.append(accession)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.02)
+        self.in_flight -= 1
+        status = self.statuses.get(accession, 200)
+        return httpx.Response(status, text=series_text(accession) if status == 200 else "ERROR")
+
+    def _loader(self) -> AsyncNCBIGSELoader:
+        return AsyncNCBIGSELoader(self.ncbi_loader, httpx.AsyncClient(transport=httpx.MockTransport(self._handle)))
+
+    async def test_load_gses_bounds_concurrent_downloads(self):
+        accessions = [f"GSE{i}" for i in range(1, 7)]
+
+        gses = await self._loader().load_gses(accessions)
+
+        self.assertListEqual([gse.gse for gse in gses], accessions)
+        self.assertEqual(gses[0].title, "Title")
+        self.assertEqual(gses[0].pubmed_id, 12345)
+        self.assertEqual(self.max_in_flight, 2)
+        self.ncbi_loader.save_gses.assert_called_once_with(gses)
+
+    async def test_load_gses_projects_fields(self):
+        gses = await self._loader().load_gses(["GSE1"], ["gse", "title"])
+
+        self.assertEqual(gses, [GSE(gse="GSE1", title="Title")])
+        # Complete series are saved
+        self.assertEqual(self.ncbi_loader.save_gses.call_args.args[0][0].pubmed_id, 12345)
+
+    async def test_load_gses_download_error(self):
+        self.statuses["GSE2"] = 500
+
+        with self.assertRaises(GEOError):
+            await self._loader().load_gses(["GSE1", "GSE2"])
+        self.ncbi_loader.save_gses.assert_not_called()
+
+    async def test_load_gses_empty_record(self):
+        loader = AsyncNCBIGSELoader(self.ncbi_loader, httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: httpx.Response(200, text="^SERIES = GSE1\n"))))
+
+        with self.assertRaises(GEOError) as error:
+            await loader.load_gses(["GSE1"])
+        self.assertEqual(error.exception.reason, GEOError.EMPTY_RECORD)
+
+    async def test_load_gses_retries_rate_limited_downloads(self):
+        responses = [httpx.Response(429, headers={"Retry-After": "0"}),
+                     httpx.Response(200, text=series_text("GSE1"))]
+        loader = AsyncNCBIGSELoader(self.ncbi_loader, httpx.AsyncClient(
+            transport=httpx.MockTransport(lambda request: responses.pop(0))))
+
+        gses = await loader.load_gses(["GSE1"])
+
+        self.assertListEqual([gse.gse for gse in gses], ["GSE1"])
+        self.assertListEqual(responses, [])
+
+    async def test_load_gses_records_failures_in_negative_cache(self):
+        negative_cache = Mock(spec=GSENegativeCache)
+        negative_cache.find.return_value = {"GSE3": GEOError.NOT_FOUND}
+        negative_cache.is_cached.side_effect = lambda reason: reason == GEOError.NOT_FOUND
+        self.ncbi_loader.negative_cache = negative_cache
+        self.statuses["GSE2"] = 404
+
+        gses = await self._loader().load_gses(["GSE1", "GSE2", "GSE3"])
+
+        self.assertListEqual([gse.gse for gse in gses], ["GSE1"])
+        self.assertListEqual(sorted(self.requests), ["GSE1", "GSE2"])
+        negative_cache.record.assert_called_once_with("GSE2", GEOError.NOT_FOUND)
+
+    async def test_chained_loader_queries_fallback_for_missing(self):
+        local = Mock(spec=GSELoader)
+        local.load_gses.return_value = [GSE(gse="GSE1")]
+        loader = AsyncChainedGSELoader(OffloadedGSELoader(local), self._loader())
+
+        gses = await loader.load_gses(["GSE2", "GSE1", "GSE2"])
+
+        self.assertListEqual([gse.gse for gse in gses], ["GSE2", "GSE1", "GSE2"])
+        local.load_gses.assert_called_once_with(["GSE2", "GSE1"], None)
+        self.assertListEqual(self.requests, ["GSE2"])
+
+    async def test_downloads_wait_for_the_rate_limiter(self):
+        self.ncbi_loader.rate_limiter = Mock(spec=TokenBucketRateLimiter)
+        self.ncbi_loader.rate_limiter.acquire_async = AsyncMock(return_value=0.0)
+
+        await self._loader().load_gses(["GSE1", "GSE2"])
+
+        self.assertEqual(self.ncbi_loader.rate_limiter.acquire_async.await_count, 2)
+        self.ncbi_loader.rate_limiter.acquire.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock, patch
+
+from src.db.cached_dataset_linker import CachedDatasetLinker
+from src.db.paper_dataset_linker import PaperDatasetLinker
+from src.exception.entrez_error import EntrezError
+
+TTL = 3600
+NEGATIVE_TTL = 60
+
+
+class TestCachedDatasetLinker(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "cache.sqlite")
+        self.upstream = Mock(spec=PaperDatasetLinker)
+        self.upstream.name = "ELinkDatasetLinker"
+        self.upstream.link_to_datasets_by_paper.side_effect = lambda pubmed_ids: {
+            pubmed_id: [f"GSE{pubmed_id}"] if pubmed_id != "0" else [] for pubmed_id in pubmed_ids
+        }
+        self.linker = CachedDatasetLinker(self.upstream, self.cache_path, TTL, NEGATIVE_TTL)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_only_uncached_papers_are_linked(self):
+        self.assertDictEqual(self.linker.link_to_datasets_by_paper(["1", "2"]), {"1": ["GSE1"], "2": ["GSE2"]})
+        self.assertDictEqual(self.linker.link_to_datasets_by_paper(["2", "3"]), {"2": ["GSE2"], "3": ["GSE3"]})
+
+        calls = [c.args[0] for c in self.upstream.link_to_datasets_by_paper.call_args_list]
+        self.assertListEqual(calls, [["1", "2"], ["3"]])
+
+    def test_fully_cached_query_skips_upstream(self):
+        self.linker.link_to_datasets(["1", "2"])
+        self.upstream.link_to_datasets_by_paper.reset_mock()
+
+        self.assertListEqual(self.linker.link_to_datasets(["2", "1"]), ["GSE2", "GSE1"])
+        self.upstream.link_to_datasets_by_paper.assert_not_called()
+
+    def test_stats_count_papers(self):
+        self.linker.link_to_datasets_by_paper(["1", "2"])
+        self.linker.link_to_datasets_by_paper(["2", "3", "3"])
+
+        self.assertDictEqual(self.linker.stats(), {"hits": 1, "misses": 3})
+
+    def test_cache_is_shared_between_instances(self):
+        self.linker.link_to_datasets(["1"])
+        other = CachedDatasetLinker(self.upstream, self.cache_path, TTL, NEGATIVE_TTL)
+        self.upstream.link_to_datasets_by_paper.reset_mock()
+
+        self.assertListEqual(other.link_to_datasets(["1"]), ["GSE1"])
+        self.upstream.link_to_datasets_by_paper.assert_not_called()
+
+    def test_sources_are_cached_separately(self):
+        self.linker.link_to_datasets(["1"])
+        other_upstream = Mock(spec=PaperDatasetLinker)
+        other_upstream.name = "EuropePMCDatasetLinker"
+        other_upstream.link_to_datasets_by_paper.return_value = {"1": ["GSE100"]}
+        other = CachedDatasetLinker(other_upstream, self.cache_path, TTL, NEGATIVE_TTL)
+
+        self.assertListEqual(other.link_to_datasets(["1"]), ["GSE100"])
+
+    @patch("src.db.cached_dataset_linker.time.time")
+    def test_entries_expire(self, mock_time):
+        mock_time.return_value = 1000
+        self.linker.link_to_datasets_by_paper(["0", "1"])
+        self.upstream.link_to_datasets_by_paper.reset_mock()
+
+        # The negative entry has expired, the positive one has not
+        mock_time.return_value = 1000 + NEGATIVE_TTL + 1
+        self.assertDictEqual(self.linker.link_to_datasets_by_paper(["0", "1"]), {"0": [], "1": ["GSE1"]})
+        self.upstream.link_to_datasets_by_paper.assert_called_once_with(["0"])
+
+        self.upstream.link_to_datasets_by_paper.reset_mock()
+        mock_time.return_value = 1000 + TTL + 1
+        self.linker.link_to_datasets_by_paper(["1"])
+        self.upstream.link_to_datasets_by_paper.assert_called_once_with(["1"])
+
+    def test_upstream_errors_are_not_cached(self):
+        self.upstream.link_to_datasets_by_paper.side_effect = EntrezError("ELink status 500")
+        self.assertRaises(EntrezError, self.linker.link_to_datasets, ["1"])
+
+        self.upstream.link_to_datasets_by_paper.side_effect = None
+        self.upstream.link_to_datasets_by_paper.return_value = {"1": ["GSE1"]}
+        self.assertListEqual(self.linker.link_to_datasets(["1"]), ["GSE1"])
+
+    def test_empty_input(self):
+        self.assertRaises(ValueError, self.linker.link_to_datasets, [])
+        self.upstream.link_to_datasets_by_paper.assert_not_called()
@@ -0,0 +1,114 @@
+import unittest
+from unittest.mock import Mock, patch
+
+from src.db.cached_gse_loader import CachedGSELoader
+from src.db.gse import GSE
+from src.db.gse_loader import GSELoader
+from src.test.db.test_datasets import TEST_GSEs
+
+MAX_BYTES = 1024 * 1024
+TTL = 60
+
+
+class TestCachedGSELoader(unittest.TestCase):
+    def setUp(self):
+        self.upstream = Mock(spec=GSELoader)
+        self.upstream.load_gses.side_effect = lambda accessions, fields: [
+            gse for gse in TEST_GSEs if gse.gse in accessions]
+        self.loader = CachedGSELoader(self.upstream, MAX_BYTES, TTL)
+
+    def test_hits_are_served_from_memory(self):
+        accessions = [TEST_GSEs[0].gse, TEST_GSEs[1].gse]
+        self.assertListEqual(self.loader.load_gses(accessions), TEST_GSEs[:2])
+        self.assertListEqual(self.loader.load_gses(accessions[::-1]), TEST_GSEs[1::-1])
+
+        self.upstream.load_gses.assert_called_once_with(accessions, None)
+        self.assertEqual(self.loader.stats()["hits"], 2)
+        self.assertEqual(self.loader.stats()["misses"], 2)
+
+    def test_only_misses_are_loaded(self):
+        self.loader.load_gses([TEST_GSEs[0].gse])
+        self.loader.load_gses([TEST_GSEs[0].gse, TEST_GSEs[1].gse, "GSE0"])
+
+        self.upstream.load_gses.assert_called_with([TEST_GSEs[1].gse, "GSE0"], None)
+
+    def test_cache_is_bounded_by_size(self):
+        gse_size = CachedGSELoader._estimate_size(TEST_GSEs[1])
+        loader = CachedGSELoader(self.upstream, gse_size + 1, TTL)
+
+        loader.load_gses([TEST_GSEs[0].gse])
+        loader.load_gses([TEST_GSEs[1].gse])
+
+        stats = loader.stats()
+        self.assertEqual(stats["entries"], 1)
+        self.assertEqual(stats["evictions"], 1)
+        self.assertLessEqual(stats["bytes"], gse_size + 1)
+
+    def test_entries_larger_than_the_cache_are_not_cached(self):
+        loader = CachedGSELoader(self.upstream, CachedGSELoader._estimate_size(TEST_GSEs[0]) - 1, TTL)
+
+        self.assertListEqual(loader.load_gses([TEST_GSEs[0].gse]), [TEST_GSEs[0]])
+        self.assertEqual(loader.stats()["entries"], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        small = [GSE(gse=f"GSE{i}", title="Title") for i in range(3)]
+        self.upstream.load_gses.side_effect = lambda accessions, fields: [gse for gse in small if gse.gse in accessions]
+        loader = CachedGSELoader(self.upstream, CachedGSELoader._estimate_size(small[0]) * 2, TTL)
+
+        loader.load_gses(["GSE0", "GSE1"])
+        loader.load_gses(["GSE0"])
+        loader.load_gses(["GSE2"])
+        self.upstream.load_gses.reset_mock()
+
+        loader.load_gses(["GSE0", "GSE1", "GSE2"])
+        self.upstream.load_gses.assert_called_once_with(["GSE1"], None)
+
+    @patch("src.db.cached_gse_loader.time.monotonic")
+    def test_entries_expire(self, mock_time):
+        mock_time.return_value = 0
+        self.loader.load_gses([TEST_GSEs[0].gse])
+        mock_time.return_value = TTL + 1
+        self.loader.load_gses([TEST_GSEs[0].gse])
+
+        self.assertEqual(self.upstream.load_gses.call_count, 2)
+
+    def test_invalidate(self):
+        self.loader.load_gses([TEST_GSEs[0].gse, TEST_GSEs[1].gse])
+        self.loader.invalidate([TEST_GSEs[0].gse])
+        self.loader.load_gses([TEST_GSEs[0].gse, TEST_GSEs[1].gse])
+
+        self.upstream.load_gses.assert_called_with([TEST_GSEs[0].gse], None)
+
+    def test_results_loaded_during_invalidation_are_not_cached(self):
+        def load_and_invalidate(accessions, fields):
+            self.loader.invalidate(accessions)
+            return [TEST_GSEs[0]]
+
+        self.upstream.load_gses.side_effect = load_and_invalidate
+        self.assertListEqual(self.loader.load_gses([TEST_GSEs[0].gse]), [TEST_GSEs[0]])
+        self.assertEqual(self.loader.stats()["entries"], 0)
+
+    def test_empty_input(self):
+        self.assertListEqual(self.loader.load_gses([]), [])
+        self.upstream.load_gses.assert_not_called()
+
+    def test_iter_gses_yields_hits_first_and_caches_misses(self):
+        self.upstream.iter_gses.side_effect = lambda accessions, fields: iter(
+            [gse for gse in TEST_GSEs if gse.gse in accessions])
+        self.loader.load_gses([TEST_GSEs[1].gse])
+
+        gses = list(self.loader.iter_gses([TEST_GSEs[0].gse, TEST_GSEs[1].gse]))
+
+        self.assertListEqual(gses, [TEST_GSEs[1], TEST_GSEs[0]])
+        self.upstream.iter_gses.assert_called_once_with([TEST_GSEs[0].gse], None)
+        self.assertEqual(self.loader.stats()["entries"], 2)
+
+    def test_projected_loads_use_cache_but_are_not_cached(self):
+        fields = ["title", "gse"]
+        self.loader.load_gses([TEST_GSEs[0].gse])
+
+        gses = self.loader.load_gses([TEST_GSEs[0].gse, TEST_GSEs[1].gse], fields)
+
+        self.assertEqual(gses[0], GSE(title=TEST_GSEs[0].title, gse=TEST_GSEs[0].gse))
+        self.upstream.load_gses.assert_called_with([TEST_GSEs[1].gse], fields)
+        self.assertEqual(self.loader.stats()["entries"], 1)
@@ -0,0 +1,142 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+from src.db.chained_dataset_linker import ChainedDatasetLinker
+from src.db.paper_dataset_linker import LINKED_GSES, LINKER_DURATION, PaperDatasetLinker
+from src.exception.entrez_error import EntrezError
+
+
+class SlowLinker(PaperDatasetLinker):
+    def __init__(self, accessions, delay: float):
+        self.accessions = accessions
+        self.delay = delay
+
+    def link_to_datasets(self, pubmed_ids):
+        time.sleep(self.delay)
+        return self.accessions
+
+
+class MeetingLinker(PaperDatasetLinker):
+    """
+    Returns its accessions only once all linkers sharing the barrier are
+    running at the same time, and fails if they never are.
+    """
+
+    def __init__(self, accessions, barrier: threading.Barrier):
+        self.accessions = accessions
+        self.barrier = barrier
+
+    def link_to_datasets(self, pubmed_ids):
+        self.barrier.wait()
+        return self.accessions
+
+
+class FailingLinker(PaperDatasetLinker):
+    def link_to_datasets(self, pubmed_ids):
+        raise EntrezError("ELink status 500")
+
+
+class TestChainedDatasetLinker(unittest.TestCase):
+    @parameterized.expand([
+        (True,),
+        (False,),
+    ])
+    def test_link_to_datasets_merges_in_linker_order(self, parallel):
+        # The first linker finishes last, but its accessions still come first
+        first = SlowLinker(["GSE1", "GSE2"], 0.05)
+        second = SlowLinker(["GSE2", "GSE3"], 0)
+        linker = ChainedDatasetLinker(first, second, parallel=parallel)
+
+        self.assertListEqual(linker.link_to_datasets(["112233"]), ["GSE1", "GSE2", "GSE3"])
+
+    def test_link_to_datasets_skips_failing_linker(self):
+        failing = Mock(spec=PaperDatasetLinker)
+        failing.link_to_datasets.side_effect = EntrezError("ELink status 500")
+        working = SlowLinker(["GSE1"], 0)
+        linker = ChainedDatasetLinker(failing, working)
+
+        self.assertListEqual(linker.link_to_datasets(["112233"]), ["GSE1"])
+        failing.link_to_datasets.assert_called_once_with(["112233"])
+
+    def test_link_to_datasets_runs_linkers_in_parallel(self):
+        # Run one after the other, the first linker would time out waiting for the second one
+        barrier = threading.Barrier(2, timeout=5)
+        linker = ChainedDatasetLinker(MeetingLinker(["GSE1"], barrier), MeetingLinker(["GSE2"], barrier))
+
+        self.assertListEqual(linker.link_to_datasets(["112233"]), ["GSE1", "GSE2"])
+
+    def test_link_to_datasets_records_linker_durations(self):
+        labels = {
+            "SlowLinker": {"linker": "SlowLinker", "source": "SlowLinker", "method": "link_to_datasets"},
+            "FailingLinker": {"linker": "FailingLinker", "source": "FailingLinker", "method": "link_to_datasets"},
+        }
+        counts = {name: LINKER_DURATION.count(**name_labels) for name, name_labels in labels.items()}
+        linker = ChainedDatasetLinker(SlowLinker(["GSE1"], 0), FailingLinker())
+
+        linker.link_to_datasets(["112233"])
+
+        for name, name_labels in labels.items():
+            self.assertEqual(LINKER_DURATION.count(**name_labels), counts[name] + 1)
+
+    def test_nested_chains_are_recorded_by_name(self):
+        labels = {name: {"linker": "ChainedDatasetLinker", "source": name} for name in ("outer", "inner")}
+        counts = {name: LINKED_GSES.value(**name_labels) for name, name_labels in labels.items()}
+        linker = ChainedDatasetLinker(SlowLinker(["GSE1"], 0),
+                                      ChainedDatasetLinker(SlowLinker(["GSE2"], 0), name="inner"), name="outer")
+
+        linker.link_to_datasets(["112233"])
+
+        self.assertEqual(LINKED_GSES.value(**labels["outer"]), counts["outer"] + 2)
+        self.assertEqual(LINKED_GSES.value(**labels["inner"]), counts["inner"] + 1)
+        self.assertEqual(ChainedDatasetLinker(SlowLinker([], 0)).name, "ChainedDatasetLinker")
+
+    def test_link_to_datasets_by_paper(self):
+        first = Mock(spec=PaperDatasetLinker)
+        first.link_to_datasets_by_paper.return_value = {"1": ["GSE1"], "2": []}
+        second = Mock(spec=PaperDatasetLinker)
+        second.link_to_datasets_by_paper.return_value = {"1": ["GSE2", "GSE1"], "2": ["GSE3"]}
+        linker = ChainedDatasetLinker(first, second, FailingLinker())
+
+        result = linker.link_to_datasets_by_paper(["1", "2", "3"])
+
+        self.assertDictEqual(result, {"1": ["GSE1", "GSE2"], "2": ["GSE3"], "3": []})
+
+    def test_link_to_datasets_empty_input(self):
+        linker = ChainedDatasetLinker(SlowLinker(["GSE1"], 0))
+        self.assertRaises(ValueError, linker.link_to_datasets, [])
+
+    def test_no_linkers(self):
+        self.assertRaises(ValueError, ChainedDatasetLinker)
+
+    def test_incomplete_mode_only_asks_later_linkers_about_unresolved_papers(self):
+        local = Mock(spec=PaperDatasetLinker)
+        local.name = "GEOmetadbDatasetLinker"
+        local.link_to_datasets_by_paper.return_value = {"1": ["GSE1"], "2": []}
+        network = Mock(spec=PaperDatasetLinker)
+        network.name = "ELinkDatasetLinker"
+        network.link_to_datasets_by_paper.return_value = {"2": ["GSE2"], "3": []}
+        linker = ChainedDatasetLinker(local, network, complete=False)
+
+        self.assertDictEqual(linker.link_to_datasets_by_paper(["1", "2", "3"]),
+                             {"1": ["GSE1"], "2": ["GSE2"], "3": []})
+        network.link_to_datasets_by_paper.assert_called_once_with(["2", "3"])
+        self.assertListEqual(linker.link_to_datasets(["1", "2"]), ["GSE1", "GSE2"])
+
+    def test_incomplete_mode_skips_later_linkers_when_all_papers_are_resolved(self):
+        local = Mock(spec=PaperDatasetLinker)
+        local.name = "GEOmetadbDatasetLinker"
+        local.link_to_datasets_by_paper.return_value = {"1": ["GSE1"]}
+        network = Mock(spec=PaperDatasetLinker)
+        linker = ChainedDatasetLinker(local, network, complete=False)
+
+        self.assertListEqual(linker.link_to_datasets(["1"]), ["GSE1"])
+        network.link_to_datasets_by_paper.assert_not_called()
+
+    def test_incomplete_mode_falls_through_failing_linker(self):
+        linker = ChainedDatasetLinker(FailingLinker(), SlowLinker(["GSE1"], 0), complete=False)
+
+        self.assertListEqual(linker.link_to_datasets(["112233"]), ["GSE1"])
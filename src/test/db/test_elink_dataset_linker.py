@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import requests
 
@@ -12,37 +12,26 @@ MOCK_ELINK_DATA = {
     "linksets": [
         {
             "linksetdbs": [
-                {"linkname": "pubmed_gds", "links": ["12345", "67890"]}
+                {"linkname": "pubmed_gds", "links": ["200012345", "200054321"]}
             ]
         }
     ]
 }
-MOCK_EFETCH_DATA = """
-10. Title 1
-(Submitter supplied) Summary 1
-Organism:	Mus musculus
-Type:		Expression profiling by high throughput sequencing
-Platform: GPL21626 3072 Samples
-FTP download: GEO (CSV, TSV) ftp://ftp.ncbi.nlm.nih.gov/...
-SRA Run Selector: https://www.ncbi.nlm.nih.gov/...
-Series		Accession: GSE12345	ID: 200127884
-
-11. Title 2
-(Submitter supplied) Summary 2
-Organism:	Homo sapiens
-Type:		Expression profiling by high throughput sequencing
-Platforms: GPL24676 GPL18573 13127 Samples
-FTP download: GEO (TSV) ftp://ftp.ncbi.nlm.nih.gov/...
-SRA Run Selector: https://www.ncbi.nlm.nih.gov/...
-Series		Accession: GSE54321	ID: 200116672
-"""
-
+MOCK_ESUMMARY_DATA = {
+    "header": {},
+    "result": {
+        "uids": ["200012345", "200054321", "100001234"],
+        "200012345": {"uid": "200012345", "accession": "GSE12345", "entrytype": "GSE", "title": "Title 1"},
+        "200054321": {"uid": "200054321", "accession": "GSE54321", "entrytype": "GSE", "title": "Title 2"},
+        "100001234": {"uid": "100001234", "accession": "GPL1234", "entrytype": "GPL", "title": "Platform"},
+    }
+}
 
 class TestELinkDatasetLinker(unittest.TestCase):
     def setUp(self):
         self.mock_elink_response = create_mock_response(MOCK_ELINK_DATA, 200)
         self.mock_fail_response = create_mock_response("ERROR", 500)
-        self.mock_efetch_response = create_mock_response(MOCK_EFETCH_DATA, 200)
+        self.mock_esummary_response = create_mock_response(MOCK_ESUMMARY_DATA, 200)
 
         self.mock_session = Mock()
 
@@ -54,23 +43,22 @@ class TestELinkDatasetLinker(unittest.TestCase):
         pubmed_ids = ["112233"]
         result = self.linker._fetch_geo_ids(pubmed_ids)
 
-        expected_result = ["12345", "67890"]
+        expected_result = ["200012345", "200054321"]
 
         self.assertListEqual(result, expected_result)
 
     def test_fetch_geo_accessions_success(self):
-        self.mock_session.get.return_value = self.mock_efetch_response
+        self.mock_session.post.return_value = self.mock_esummary_response
 
-        pubmed_ids = ["112233"]
-        result = self.linker._fetch_geo_accessions(pubmed_ids)
+        geo_ids = ["200012345", "200054321", "100001234"]
+        result = self.linker._fetch_geo_accessions(geo_ids)
 
         expected_result = ["GSE12345", "GSE54321"]
 
         self.assertListEqual(result, expected_result)
 
     def test_link_papers_to_datasets_success(self):
-        self.mock_session.post.return_value = self.mock_elink_response
-        self.mock_session.get.return_value = self.mock_efetch_response
+        self.mock_session.post.side_effect = [self.mock_elink_response, self.mock_esummary_response]
 
         pubmed_ids = ["112233"]
         result = self.linker.link_to_datasets(pubmed_ids)
@@ -85,13 +73,11 @@ class TestELinkDatasetLinker(unittest.TestCase):
         self.mock_session.post.assert_called_once()
         self.mock_session.get.assert_not_called()
 
-    def test_link_papers_to_datasets_efetch_server_error(self):
-        self.mock_session.post.return_value = self.mock_elink_response
-        self.mock_session.get.return_value = self.mock_fail_response
+    def test_link_papers_to_datasets_esummary_server_error(self):
+        self.mock_session.post.side_effect = [self.mock_elink_response, self.mock_fail_response]
 
         self.assertRaises(EntrezError, self.linker.link_to_datasets, ["112233"])
-        self.mock_session.post.assert_called_once()
-        self.mock_session.get.assert_called_once()
+        self.assertEqual(self.mock_session.post.call_count, 2)
 
     def test_link_papers_to_datasets_elink_network_failure(self):
         self.mock_session.post.side_effect = requests.RequestException
@@ -99,15 +85,63 @@ class TestELinkDatasetLinker(unittest.TestCase):
         self.mock_session.post.assert_called_once()
         self.mock_session.get.assert_not_called()
 
-    def test_link_papers_to_datasets_efetch_network_failure(self):
-        self.mock_session.post.return_value = self.mock_elink_response
-        self.mock_session.get.side_effect = requests.RequestException
+    def test_link_papers_to_datasets_esummary_network_failure(self):
+        self.mock_session.post.side_effect = [self.mock_elink_response, requests.RequestException]
 
         self.assertRaises(EntrezError, self.linker.link_to_datasets, ["112233"])
-        self.mock_session.post.assert_called_once()
-        self.mock_session.get.assert_called_once()
+        self.assertEqual(self.mock_session.post.call_count, 2)
 
     def test_link_papers_to_datasets_empty_input(self):
         self.assertRaises(ValueError, self.linker.link_to_datasets, [])
         self.mock_session.post.assert_not_called()
         self.mock_session.get.assert_not_called()
+
+    def test_link_papers_without_links_skips_esummary(self):
+        self.mock_session.post.return_value = create_mock_response({"header": {}, "linksets": [{}]}, 200)
+
+        self.assertListEqual(self.linker.link_to_datasets(["112233"]), [])
+        self.mock_session.post.assert_called_once()
+
+    @patch.object(ELinkDatasetLinker, "ELINK_BATCH_SIZE", 2)
+    @patch.object(ELinkDatasetLinker, "ESUMMARY_BATCH_SIZE", 2)
+    def test_link_papers_to_datasets_in_chunks(self):
+        self.mock_session.post.side_effect = [self.mock_elink_response, self.mock_elink_response,
+                                              self.mock_esummary_response]
+
+        result = self.linker.link_to_datasets(["1", "2", "3"])
+
+        self.assertListEqual(result, ["GSE12345", "GSE54321"])
+        elink_calls = self.mock_session.post.call_args_list[:2]
+        self.assertListEqual([c.kwargs["data"]["id"] for c in elink_calls], ["1,2", "3"])
+        # The links of both chunks are deduplicated before fetching the summaries
+        self.assertEqual(self.mock_session.post.call_args_list[2].kwargs["data"]["id"], "200012345,200054321")
+
+    def test_api_key_and_rate_limiter(self):
+        rate_limiter = Mock()
+        linker = ELinkDatasetLinker(self.mock_session, rate_limiter, api_key="KEY")
+        self.mock_session.post.side_effect = [self.mock_elink_response, self.mock_esummary_response]
+
+        linker.link_to_datasets(["112233"])
+
+        self.assertEqual(rate_limiter.acquire.call_count, 2)
+        for call in self.mock_session.post.call_args_list:
+            self.assertEqual(call.kwargs["params"]["api_key"], "KEY")
+
+    def test_link_to_datasets_by_paper(self):
+        elink_response = create_mock_response({
+            "header": {},
+            "linksets": [
+                {"ids": ["1"], "linksetdbs": [{"linkname": "pubmed_gds", "links": ["200012345", "100001234"]}]},
+                {"ids": ["2"], "linksetdbs": [{"linkname": "pubmed_gds", "links": ["200012345", "200054321"]}]},
+                {"ids": ["3"]},
+            ]
+        }, 200)
+        self.mock_session.post.side_effect = [elink_response, self.mock_esummary_response]
+
+        result = self.linker.link_to_datasets_by_paper(["1", "2", "3"])
+
+        self.assertDictEqual(result, {"1": ["GSE12345"], "2": ["GSE12345", "GSE54321"], "3": []})
+        # Each PubMed ID is sent as a separate parameter, so that ELink links them separately
+        self.assertListEqual(self.mock_session.post.call_args_list[0].kwargs["data"]["id"], ["1", "2", "3"])
+        self.assertEqual(self.mock_session.post.call_args_list[1].kwargs["data"]["id"],
+                         "200012345,100001234,200054321")
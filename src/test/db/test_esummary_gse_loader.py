@@ -0,0 +1,74 @@
+import unittest
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+from src.db.entrez_client import EntrezClient
+from src.db.esummary_gse_loader import ESummaryGSELoader
+from src.db.gse import GSE
+from src.exception.entrez_error import EntrezError
+from src.test.helpers.http import create_mock_response
+
+MOCK_ESUMMARY_DATA = {
+    "header": {},
+    "result": {
+        "uids": ["200116672", "200127884"],
+        "200116672": {
+            "uid": "200116672", "accession": "GSE116672", "entrytype": "GSE", "title": "Dengue",
+            "summary": "Summary", "gdstype": "Expression profiling by high throughput sequencing",
+            "pdat": "2018/11/19", "pubmedids": ["30530648"],
+        },
+        "200127884": {
+            "uid": "200127884", "accession": "GSE127884", "entrytype": "GSE", "title": "Microglia",
+            "summary": "", "gdstype": "Expression profiling by array; Other", "pdat": "2019/04/23",
+            "pubmedids": [],
+        },
+    }
+}
+
+
+class TestESummaryGSELoader(unittest.TestCase):
+    def setUp(self):
+        self.mock_session = Mock()
+        self.mock_session.post.return_value = create_mock_response(MOCK_ESUMMARY_DATA, 200)
+        self.loader = ESummaryGSELoader(EntrezClient(self.mock_session))
+
+    def test_load_gses(self):
+        gses = self.loader.load_gses(["GSE127884", "GSE116672", "GSE1", "GPL1"], ["gse", "title", "pubmed_id",
+                                                                                   "status", "type"])
+
+        self.assertListEqual(gses, [
+            GSE(gse="GSE127884", title="Microglia", status="Public on Apr 23 2019",
+                type="Expression profiling by array;\tOther"),
+            GSE(gse="GSE116672", title="Dengue", status="Public on Nov 19 2018", pubmed_id=30530648,
+                type="Expression profiling by high throughput sequencing"),
+        ])
+        self.mock_session.post.assert_called_once()
+        self.assertEqual(self.mock_session.post.call_args.kwargs["data"], {"id": "200127884,200116672,200000001"})
+
+    def test_load_gses_in_batches(self):
+        accessions = [f"GSE{i}" for i in range(1, ESummaryGSELoader.BATCH_SIZE + 2)]
+        self.loader.load_gses(accessions, ["gse", "title"])
+
+        self.assertEqual(self.mock_session.post.call_count, 2)
+
+    @parameterized.expand([
+        (None,),
+        (["gse", "title", "contact"],),
+    ])
+    def test_fields_not_provided_by_esummary_are_left_to_other_loaders(self, fields):
+        self.assertListEqual(self.loader.load_gses(["GSE116672"], fields), [])
+        self.mock_session.post.assert_not_called()
+
+    def test_failed_batches_are_left_to_other_loaders(self):
+        self.mock_session.post.return_value = create_mock_response("", 500)
+
+        self.assertListEqual(self.loader.load_gses(["GSE116672"], ["gse", "title"]), [])
+
+    def test_entrez_client_errors(self):
+        self.mock_session.post.return_value = create_mock_response("", 500)
+        client = EntrezClient(self.mock_session, api_key="key")
+
+        with self.assertRaises(EntrezError):
+            client.request("ESummary", EntrezClient.ESUMMARY_REQUEST_URL, {"db": "gds"}, data={"id": "1"})
+        self.assertEqual(self.mock_session.post.call_args.kwargs["params"], {"db": "gds", "api_key": "key"})
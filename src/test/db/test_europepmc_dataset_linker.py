@@ -64,3 +64,37 @@ class TestEuropePMCDatasetLinker(unittest.TestCase):
         self.mock_session.get.side_effect = requests.RequestException
         self.assertRaises(EuropePMCError, self.linker.link_to_datasets, ["112233"])
         self.mock_session.get.assert_called_once()
+
+    @parameterized.expand([
+        (1,),
+        (4,),
+    ])
+    def test_link_papers_to_datasets_concurrent(self, max_concurrent_requests):
+        self.mock_session.get.return_value = self.mock_europepmc_response
+        linker = EuropePMCDatasetLinker(self.mock_session, max_concurrent_requests=max_concurrent_requests)
+        pubmed_ids = [str(i) for i in range(EuropePMCDatasetLinker.BATCH_SIZE * 5)]
+
+        result = linker.link_to_datasets(pubmed_ids)
+
+        self.assertCountEqual(result, ["GSE12345", "GSE54321"])
+        self.assertEqual(self.mock_session.get.call_count, 5)
+
+    def test_link_papers_to_datasets_concurrent_failure(self):
+        self.mock_session.get.return_value = self.mock_fail_response
+        linker = EuropePMCDatasetLinker(self.mock_session, max_concurrent_requests=4)
+        pubmed_ids = [str(i) for i in range(EuropePMCDatasetLinker.BATCH_SIZE * 3)]
+
+        self.assertRaises(EuropePMCError, linker.link_to_datasets, pubmed_ids)
+
+    def test_invalid_max_concurrent_requests(self):
+        self.assertRaises(ValueError, EuropePMCDatasetLinker, self.mock_session, 0)
+
+    def test_link_to_datasets_by_paper(self):
+        self.mock_session.get.return_value = create_mock_response(MOCK_EUROPEPMC_DATA + [
+            {"source": "MED", "extId": "445566", "annotations": [{"exact": "GSE12345"}, {"exact": "GSE12345"}]},
+        ], 200)
+
+        result = self.linker.link_to_datasets_by_paper(["112233", "445566", "778899"])
+
+        self.assertDictEqual(result, {"112233": ["GSE12345", "GSE54321"], "445566": ["GSE12345"], "778899": []})
+        self.mock_session.get.assert_called_once()
@@ -0,0 +1,30 @@
+import unittest
+
+from parameterized import parameterized
+
+from src.config.config import Config
+from src.db.geometadb_dataset_linker import GEOmetadbDatasetLinker
+
+
+class TestGEOmetadbDatasetLinker(unittest.TestCase):
+    def setUp(self):
+        self.linker = GEOmetadbDatasetLinker(Config(test=True))
+
+    def tearDown(self):
+        self.linker.connections.close()
+
+    @parameterized.expand([
+        (["30530648"], ["GSE116672"]),
+        (["31018141"], ["GSE127884", "GSE127892", "GSE127893"]),
+        (["11111111", "not-a-pmid"], []),
+    ])
+    def test_link_to_datasets(self, pubmed_ids, expected_accessions):
+        self.assertListEqual(sorted(self.linker.link_to_datasets(pubmed_ids)), expected_accessions)
+
+    def test_link_to_datasets_by_paper(self):
+        result = self.linker.link_to_datasets_by_paper(["30530648", "32572264", "11111111"])
+
+        self.assertDictEqual(result, {"30530648": ["GSE116672"], "32572264": ["GSE146026"], "11111111": []})
+
+    def test_link_to_datasets_empty_input(self):
+        self.assertRaises(ValueError, self.linker.link_to_datasets, [])
@@ -4,7 +4,7 @@ from src.db.geometadb_gse_loader import GEOmetadbGSELoader
 from parameterized import parameterized
 from typing import List
 
-from src.db.gse import GSE
+from src.db.gse import GSE, normalize_fields
 from src.test.db.test_datasets import TEST_GSEs
 
 
@@ -23,3 +23,14 @@ class TestGEOmetadbGSELoader(unittest.TestCase):
         gse_ids = list(map(lambda x: x.gse, gses))
         expected_gse_ids = list(map(lambda x: x.gse, expected_gses))
         self.assertListEqual(gse_ids, expected_gse_ids)
+
+    def test_load_gses_projects_fields(self):
+        fields = normalize_fields(["title", "pubmed_id"])
+        gses = self.GEOmetadb_gse_loader.load_gses([TEST_GSEs[0].gse], fields)
+
+        self.assertListEqual(gses, [GSE(title=TEST_GSEs[0].title, gse=TEST_GSEs[0].gse,
+                                        pubmed_id=TEST_GSEs[0].pubmed_id)])
+
+    def test_normalize_fields(self):
+        self.assertListEqual(normalize_fields(["pubmed_id", "title", "title"]), ["title", "gse", "pubmed_id"])
+        self.assertRaises(ValueError, normalize_fields, ["title", "abstract"])
@@ -0,0 +1,77 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+from src.config.config import Config
+from src.db.chained_gsm_loader import ChainedGSMLoader
+from src.db.geometadb_gsm_loader import GEOmetadbGSMLoader
+from src.db.gsm_loader import GSMLoader
+from src.test.db.test_datasets import TEST_GSMs
+from src.test.helpers.geometadb import create_test_geometadb
+
+
+class TestGEOmetadbGSMLoader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        create_test_geometadb(geometadb_path)
+        # Link the samples of the other series to GSE116672 as well, so that it has several pages
+        with sqlite3.connect(geometadb_path) as conn:
+            conn.executemany("INSERT INTO gse_gsm (gse, gsm) VALUES ('GSE116672', ?)",
+                             [(gsm.gsm,) for gsm in TEST_GSMs[1:]])
+        config = Config(test=True)
+        config.geometadb_path = geometadb_path
+        self.loader = GEOmetadbGSMLoader(config, page_size=2)
+
+    def tearDown(self):
+        self.loader.connections.close()
+        self.temp_dir.cleanup()
+
+    def test_iter_gsms(self):
+        gsms = list(self.loader.iter_gsms("GSE137444"))
+        self.assertListEqual([(gsm.gsm, gsm.title, gsm.series_id) for gsm in gsms],
+                             [(TEST_GSMs[1].gsm, TEST_GSMs[1].title, TEST_GSMs[1].series_id)])
+
+    @parameterized.expand([
+        (None, None, ["GSM3245112", "GSM4107622", "GSM4352062", "GSM4701141"]),
+        (None, 3, ["GSM3245112", "GSM4107622", "GSM4352062"]),
+        ("GSM4107622", None, ["GSM4352062", "GSM4701141"]),
+        ("GSM4107622", 1, ["GSM4352062"]),
+        ("GSM4701141", None, []),
+    ])
+    def test_iter_gsms_pages(self, after, limit, expected_accessions):
+        gsms = self.loader.iter_gsms("GSE116672", after, limit)
+        self.assertListEqual([gsm.gsm for gsm in gsms], expected_accessions)
+
+    def test_iter_gsms_unknown_series(self):
+        self.assertListEqual(list(self.loader.iter_gsms("GSE1")), [])
+
+
+class TestChainedGSMLoader(unittest.TestCase):
+    def test_uses_first_loader_with_samples(self):
+        empty = Mock(spec=GSMLoader)
+        empty.iter_gsms.return_value = iter([])
+        first = Mock(spec=GSMLoader)
+        first.iter_gsms.return_value = iter(TEST_GSMs[:2])
+        second = Mock(spec=GSMLoader)
+        loader = ChainedGSMLoader(empty, first, second)
+
+        self.assertListEqual(list(loader.iter_gsms("GSE1", "GSM1", 2)), TEST_GSMs[:2])
+        first.iter_gsms.assert_called_once_with("GSE1", "GSM1", 2)
+        second.iter_gsms.assert_not_called()
+
+    def test_last_page_of_known_series_ends_iteration(self):
+        first = Mock(spec=GSMLoader)
+        first.iter_gsms.side_effect = lambda gse_accession, after, limit: iter([] if after else TEST_GSMs[:1])
+        second = Mock(spec=GSMLoader)
+        loader = ChainedGSMLoader(first, second)
+
+        self.assertListEqual(list(loader.iter_gsms("GSE1", TEST_GSMs[0].gsm, 2)), [])
+        second.iter_gsms.assert_not_called()
+
+    def test_no_loaders(self):
+        self.assertRaises(ValueError, ChainedGSMLoader)
@@ -0,0 +1,44 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.db.geometadb_indexes import (HOT_QUERIES, MissingIndexError, check_indexes, create_missing_indexes,
+                                      find_table_scans)
+from src.test.helpers.geometadb import create_test_geometadb
+
+
+class TestGEOmetadbIndexes(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        create_test_geometadb(self.geometadb_path)
+        self.conn = sqlite3.connect(self.geometadb_path)
+
+    def tearDown(self):
+        self.conn.close()
+        self.temp_dir.cleanup()
+
+    def test_table_scans_are_found(self):
+        scans = find_table_scans(self.conn)
+        self.assertSetEqual(set(scans), {query.name for query in HOT_QUERIES})
+        self.assertIn("SCAN gse", scans["GSE by accession"])
+
+    def test_create_missing_indexes(self):
+        created = create_missing_indexes(self.geometadb_path)
+
+        self.assertListEqual(created, [query.name for query in HOT_QUERIES])
+        with sqlite3.connect(self.geometadb_path) as conn:
+            self.assertDictEqual(find_table_scans(conn), {})
+        self.assertListEqual(create_missing_indexes(self.geometadb_path), [])
+
+    def test_check_indexes_strict(self):
+        self.assertRaises(MissingIndexError, check_indexes, self.conn, True)
+        create_missing_indexes(self.geometadb_path)
+        with sqlite3.connect(self.geometadb_path) as conn:
+            check_indexes(conn, True)
+
+    def test_check_indexes_warns(self):
+        with self.assertLogs("src.db.geometadb_indexes", level="ERROR") as logs:
+            check_indexes(self.conn, False)
+        self.assertIn("GSE by accession", logs.output[0])
@@ -0,0 +1,78 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+from src.config.config import Config
+from src.db.geometadb_search import (GEOmetadbSearch, SearchIndexMissingError, create_search_index,
+                                     has_search_index, to_match_query)
+from src.db.gse import GSE
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
+from src.test.helpers.geometadb import create_test_geometadb
+
+
+class TestGEOmetadbSearch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        create_test_geometadb(self.geometadb_path)
+        self.config = Config(test=True)
+        self.config.geometadb_path = self.geometadb_path
+        self.connections = ReadOnlySQLiteConnections(self.geometadb_path)
+        self.search = GEOmetadbSearch(self.config, self.connections)
+
+    def tearDown(self):
+        self.connections.close()
+        self.temp_dir.cleanup()
+
+    def test_missing_index(self):
+        self.assertRaises(SearchIndexMissingError, self.search.search, "microglia", 10)
+
+    def test_create_search_index(self):
+        self.assertEqual(create_search_index(self.geometadb_path), 11)
+        # An existing index is kept, and rebuilding it doesn't duplicate the series
+        self.assertEqual(create_search_index(self.geometadb_path), 11)
+        self.assertEqual(create_search_index(self.geometadb_path, rebuild=True), 11)
+        with sqlite3.connect(self.geometadb_path) as conn:
+            self.assertTrue(has_search_index(conn))
+
+    @parameterized.expand([
+        ("dengue", ["GSE116672"]),
+        ("human microglia", ["GSE137444", "GSE216999", "GSE127884", "GSE127892"]),
+        # Stemming matches other forms of the words
+        ("transplant", ["GSE137444", "GSE216999"]),
+        # Operators and special characters are searched for literally
+        ("dengue OR zebrafish", []),
+        ('"ovarian" NEAR cancer*', []),
+        ("ovarian cancer*", ["GSE146026"]),
+    ])
+    def test_search(self, query, expected_accessions):
+        create_search_index(self.geometadb_path)
+        self.assertListEqual(self.search.search(query, 10), expected_accessions)
+
+    def test_search_ranks_title_matches_first(self):
+        create_search_index(self.geometadb_path)
+        # GSE127893 has the shortest title with "microglia" and no overall design
+        self.assertListEqual(self.search.search("microglia", 2), ["GSE127893", "GSE137444"])
+        self.assertListEqual(self.search.search("microglia", 2, offset=1), ["GSE137444", "GSE216999"])
+
+    def test_saved_series_are_indexed(self):
+        create_search_index(self.geometadb_path)
+        loader = NCBIGSELoader(Mock(), self.config)
+
+        loader.save_gses([GSE(gse="GSE100", title="Zebrafish fin regeneration"),
+                          GSE(gse="GSE116672", title="Replaced title")])
+
+        self.assertListEqual(self.search.search("zebrafish", 10), ["GSE100"])
+        self.assertListEqual(self.search.search("replaced", 10), ["GSE116672"])
+        with sqlite3.connect(self.geometadb_path) as conn:
+            conn.execute("DELETE FROM gse WHERE gse = 'GSE100'")
+        self.assertListEqual(self.search.search("zebrafish", 10), [])
+
+    def test_to_match_query(self):
+        self.assertEqual(to_match_query('human "microglia" OR'), '"human" "microglia" "OR"')
+        self.assertRaises(ValueError, to_match_query, " *() ")
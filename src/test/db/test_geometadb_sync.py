@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import Mock, patch
+
+from src.config.config import Config
+from src.db.entrez_client import EntrezClient
+from src.db.geometadb_sync import GEOmetadbSync
+from src.db.gse import GSE
+from src.db.gse_record_index import GSERecordIndex
+from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.exception.geo_error import GEOError
+from src.test.helpers.geometadb import create_test_geometadb
+
+
+class TestGEOmetadbSync(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config = Config(test=True)
+        self.config.geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        self.config.cache_path = os.path.join(self.temp_dir.name, "cache.sqlite")
+        self.config.gse_index_path = os.path.join(self.temp_dir.name, "geometadb.sqlite.gseidx")
+        create_test_geometadb(self.config.geometadb_path)
+        self.entrez = Mock(spec=EntrezClient)
+        self.loader = NCBIGSELoader(Mock(), self.config)
+        self.loader.download_geo_dataset = Mock(
+            side_effect=lambda accession: GSE(gse=accession, title=f"Updated {accession}",
+                                              last_update_date="2024-03-01"))
+        self.sync = GEOmetadbSync(self.config, self.entrez, self.loader, batch_size=2)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _search_results(self, *pages):
+        count = sum(len(page) for page in pages)
+        self.entrez.request_json.side_effect = [{"esearchresult": {"count": str(count), "idlist": page}}
+                                                for page in pages]
+
+    def test_first_sync_starts_from_newest_update_date(self):
+        self.assertEqual(self.sync.start_date(), date(2024, 2, 29))
+
+    def test_first_sync_ignores_soft_update_dates(self):
+        with sqlite3.connect(self.config.geometadb_path) as conn:
+            conn.execute("INSERT INTO gse (gse, last_update_date) VALUES ('GSE100', 'Dec 31 2019')")
+
+        self.assertEqual(self.sync.start_date(), date(2024, 2, 29))
+
+    def test_sync_upserts_modified_series(self):
+        # A GDS dataset (UID without the series offset) is not synced
+        self._search_results(["200116672", "200000100", "1000"])
+
+        stats = self.sync.sync()
+
+        self.assertDictEqual(stats, {"found": 2, "retried": 0, "written": 2, "failed": 0})
+        params = self.entrez.request_json.call_args.args[2]
+        self.assertEqual(params["mindate"], "2024/02/29")
+        self.assertEqual(params["datetype"], "mdat")
+        with sqlite3.connect(self.config.geometadb_path) as conn:
+            rows = conn.execute("SELECT gse, title FROM gse WHERE gse IN ('GSE116672', 'GSE100')").fetchall()
+        # The existing row of GSE116672 was replaced rather than duplicated
+        self.assertCountEqual(rows, [("GSE116672", "Updated GSE116672"), ("GSE100", "Updated GSE100")])
+
+    def test_sync_rebuilds_gse_index(self):
+        self._search_results(["200000100"])
+
+        self.sync.sync()
+
+        self.assertIn("GSE100", GSERecordIndex(self.config.gse_index_path))
+
+    def test_sync_without_writes_keeps_gse_index(self):
+        self._search_results([])
+        self.sync.sync()
+        self._search_results(["200000100"])
+        self.sync.sync(dry_run=True)
+
+        self.assertFalse(os.path.exists(self.config.gse_index_path))
+
+    def test_next_sync_starts_from_last_sync(self):
+        self._search_results([])
+        self.sync.sync(since=date(2020, 1, 1))
+
+        self.assertEqual(self.sync.start_date(), date.today())
+
+    def test_search_results_are_paged(self):
+        self._search_results(["200000001", "200000002"], ["200000003"])
+        with patch.object(GEOmetadbSync, "ESEARCH_PAGE_SIZE", 2):
+            self.assertListEqual(self.sync.find_modified_series(date(2024, 1, 1), date(2024, 2, 1)),
+                                 ["GSE1", "GSE2", "GSE3"])
+        self.assertEqual(self.entrez.request_json.call_args.args[2]["retstart"], 2)
+
+    def test_failed_downloads_are_retried_by_next_sync(self):
+        self._search_results(["200000100", "200000200"])
+        self.loader.download_geo_dataset.side_effect = lambda accession: self._fail_for(accession, "GSE100")
+
+        self.assertDictEqual(self.sync.sync(), {"found": 2, "retried": 0, "written": 1, "failed": 1})
+        self.assertListEqual(self.sync.failed_accessions(), ["GSE100"])
+
+        self._search_results(["200000300"])
+        self.loader.download_geo_dataset.side_effect = lambda accession: GSE(gse=accession)
+
+        self.assertDictEqual(self.sync.sync(), {"found": 1, "retried": 1, "written": 2, "failed": 0})
+        self.assertListEqual(self.sync.failed_accessions(), [])
+
+    def test_failed_writes_are_retried_by_next_sync(self):
+        self._search_results(["200000100", "200000200"])
+
+        with patch.object(self.loader, "_write_gses", side_effect=sqlite3.OperationalError("database is locked")):
+            stats = self.sync.sync()
+
+        self.assertDictEqual(stats, {"found": 2, "retried": 0, "written": 0, "failed": 2})
+        self.assertListEqual(self.sync.failed_accessions(), ["GSE100", "GSE200"])
+        # The start date still advances, since the failed series are retried anyway
+        self.assertEqual(self.sync.start_date(), date.today())
+
+    def test_write_behind_loader_is_rejected(self):
+        self.loader.write_queue = Mock()
+
+        with self.assertRaises(ValueError):
+            GEOmetadbSync(self.config, self.entrez, self.loader, batch_size=2)
+
+    def test_dry_run(self):
+        self._search_results(["200000100"])
+
+        self.assertDictEqual(self.sync.sync(dry_run=True), {"found": 1, "retried": 0, "written": 0, "failed": 0})
+        self.loader.download_geo_dataset.assert_not_called()
+        # A dry run doesn't count as a completed sync
+        self.assertEqual(self.sync.start_date(), date(2024, 2, 29))
+
+    @staticmethod
+    def _fail_for(accession, failing):
+        if accession == failing:
+            raise GEOError(f"Error downloading GEO dataset {accession}: 404", GEOError.NOT_FOUND)
+        return GSE(gse=accession)
@@ -0,0 +1,77 @@
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from src.config.config import Config
+from src.db.geometadb_search import has_search_index
+from src.db.geometadb_versions import (activate_version, active_version, list_versions, prepare_version,
+                                       retire_versions, versions_directory, warm)
+
+
+class TestGEOmetadbVersions(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        shutil.copyfile(Config(test=True).geometadb_path, self.geometadb_path)
+        self.source_path = os.path.join(self.temp_dir.name, "GEOmetadb.sqlite.gz")
+        with open(Config(test=True).geometadb_path, "rb") as f, gzip.open(self.source_path, "wb") as target:
+            shutil.copyfileobj(f, target)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_prepare_version(self):
+        version_path = prepare_version(self.geometadb_path, self.source_path)
+
+        self.assertListEqual(list_versions(self.geometadb_path), [version_path])
+        with sqlite3.connect(version_path) as conn:
+            self.assertEqual(conn.execute("SELECT count(*) FROM gse").fetchone()[0], 11)
+            self.assertTrue(has_search_index(conn))
+            indexes = {name for name, in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("gse_gse_idx", indexes)
+        # Nothing is switched before the version is activated
+        self.assertIsNone(active_version(self.geometadb_path))
+
+    def test_prepare_invalid_file(self):
+        invalid_path = os.path.join(self.temp_dir.name, "invalid.sqlite")
+        with open(invalid_path, "wb") as f:
+            f.write(b"not a database")
+
+        self.assertRaises(sqlite3.DatabaseError, prepare_version, self.geometadb_path, invalid_path)
+        self.assertListEqual(list_versions(self.geometadb_path), [])
+        # The partial copy is removed
+        self.assertListEqual(os.listdir(versions_directory(self.geometadb_path)), [])
+
+    def test_activate_version_replaces_regular_file(self):
+        version_path = prepare_version(self.geometadb_path, self.source_path)
+        with open(self.geometadb_path, "rb") as f:
+            original = f.read()
+
+        warm(version_path)
+        activate_version(self.geometadb_path, version_path)
+
+        self.assertEqual(active_version(self.geometadb_path), os.path.realpath(version_path))
+        # The original file becomes the first version
+        original_path, new_path = list_versions(self.geometadb_path)
+        self.assertEqual(new_path, version_path)
+        with open(original_path, "rb") as f:
+            self.assertEqual(f.read(), original)
+
+    def test_retire_versions(self):
+        first = prepare_version(self.geometadb_path, self.source_path)
+        activate_version(self.geometadb_path, first)
+        second = prepare_version(self.geometadb_path, self.source_path)
+        third = prepare_version(self.geometadb_path, self.source_path)
+        activate_version(self.geometadb_path, third)
+
+        retired = retire_versions(self.geometadb_path, keep=1)
+
+        # The original file and the first version are deleted
+        self.assertEqual(len(retired), 2)
+        self.assertIn(first, retired)
+        self.assertListEqual(list_versions(self.geometadb_path), [second, third])
+        with sqlite3.connect(self.geometadb_path) as conn:
+            self.assertEqual(conn.execute("SELECT count(*) FROM gse").fetchone()[0], 11)
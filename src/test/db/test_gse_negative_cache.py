@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.db.gse_negative_cache import GSENegativeCache
+from src.exception.geo_error import GEOError
+
+MISSING_TTL = 3600
+ERROR_TTL = 60
+
+
+class TestGSENegativeCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.temp_dir.name, "cache.sqlite")
+        self.cache = GSENegativeCache(self.cache_path, {GEOError.EMPTY_RECORD: MISSING_TTL,
+                                                        GEOError.HTTP_ERROR: ERROR_TTL})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    @patch("src.db.gse_negative_cache.time.time")
+    def test_failures_expire_by_reason(self, mock_time):
+        mock_time.return_value = 1000
+        self.cache.record("GSE1", GEOError.EMPTY_RECORD)
+        self.cache.record("GSE2", GEOError.HTTP_ERROR)
+        self.assertDictEqual(self.cache.find(["GSE1", "GSE2", "GSE3"]),
+                             {"GSE1": GEOError.EMPTY_RECORD, "GSE2": GEOError.HTTP_ERROR})
+
+        mock_time.return_value = 1000 + ERROR_TTL + 1
+        self.assertDictEqual(self.cache.find(["GSE1", "GSE2"]), {"GSE1": GEOError.EMPTY_RECORD})
+
+    def test_uncached_reasons_are_not_recorded(self):
+        self.assertFalse(self.cache.is_cached(None))
+        self.cache.record("GSE1", GEOError.NOT_FOUND)
+        self.assertDictEqual(self.cache.find(["GSE1"]), {})
+
+    def test_clear(self):
+        self.cache.record("GSE1", GEOError.EMPTY_RECORD)
+        self.cache.record("GSE2", GEOError.EMPTY_RECORD)
+
+        self.cache.clear(["GSE1"])
+
+        self.assertDictEqual(GSENegativeCache(self.cache_path, self.cache.ttls).find(["GSE1", "GSE2"]),
+                             {"GSE2": GEOError.EMPTY_RECORD})
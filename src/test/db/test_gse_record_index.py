@@ -0,0 +1,167 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import Mock
+
+from parameterized import parameterized
+
+from src.db.gse import GSE
+from src.db.gse_loader import GSELoader
+from src.db.gse_record_index import GSERecordIndex, build_gse_record_index
+from src.db.indexed_gse_loader import IndexedGSELoader
+from src.test.db.test_datasets import TEST_GSEs
+from src.test.helpers.geometadb import create_test_geometadb
+
+
+class TestGSERecordIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        self.index_path = os.path.join(self.temp_dir.name, "geometadb.sqlite.gseidx")
+        create_test_geometadb(self.geometadb_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_build_and_find(self):
+        self.assertEqual(build_gse_record_index(self.geometadb_path, self.index_path), 11)
+        index = GSERecordIndex(self.index_path)
+
+        self.assertEqual(len(index), 11)
+        with sqlite3.connect(self.geometadb_path) as conn:
+            for accession, title in conn.execute("SELECT gse, title FROM gse"):
+                self.assertIn(accession, index)
+                self.assertEqual(index.find(accession).title, title)
+        self.assertEqual(index.find(TEST_GSEs[0].gse).pubmed_id, TEST_GSEs[0].pubmed_id)
+
+    @parameterized.expand([("GSE1",), ("GSE999999",), ("GDS116672",), ("GSE",), ("GSE99999999999",)])
+    def test_find_missing(self, accession):
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        index = GSERecordIndex(self.index_path)
+
+        self.assertIsNone(index.find(accession))
+        self.assertNotIn(accession, index)
+
+    def test_later_duplicate_rows_win(self):
+        with sqlite3.connect(self.geometadb_path) as conn:
+            conn.execute("INSERT INTO gse (gse, title) VALUES ('GSE116672', 'Newer title')")
+        build_gse_record_index(self.geometadb_path, self.index_path)
+
+        self.assertEqual(GSERecordIndex(self.index_path).find("GSE116672").title, "Newer title")
+
+    def test_ids_are_sorted_by_number(self):
+        with sqlite3.connect(self.geometadb_path) as conn:
+            conn.executemany("INSERT INTO gse (gse, title) VALUES (?, ?)",
+                             [("GSE9", "Nine"), ("GSE10", "Ten"), ("GSE100", "Hundred"), ("GSE12x", "Invalid")])
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        index = GSERecordIndex(self.index_path)
+
+        self.assertListEqual(list(index._snapshot.ids), sorted(index._snapshot.ids))
+        self.assertEqual(index.find("GSE9").title, "Nine")
+        self.assertEqual(index.find("GSE10").title, "Ten")
+        self.assertEqual(index.find("GSE100").title, "Hundred")
+        self.assertNotIn("GSE12x", index)
+
+    def test_reload_if_changed(self):
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        index = GSERecordIndex(self.index_path)
+        self.assertFalse(index.reload_if_changed())
+
+        with sqlite3.connect(self.geometadb_path) as conn:
+            conn.execute("INSERT INTO gse (gse, title) VALUES ('GSE100', 'New series')")
+        build_gse_record_index(self.geometadb_path, self.index_path)
+
+        self.assertTrue(index.reload_if_changed())
+        self.assertEqual(index.find("GSE100").title, "New series")
+
+    def test_invalid_file(self):
+        with open(self.index_path, "wb") as f:
+            f.write(b"not an index at all")
+        self.assertRaises(ValueError, GSERecordIndex, self.index_path)
+
+
+class TestIndexedGSELoader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.geometadb_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        self.index_path = os.path.join(self.temp_dir.name, "geometadb.sqlite.gseidx")
+        create_test_geometadb(self.geometadb_path)
+        self.fallback = Mock(spec=GSELoader)
+        self.fallback.load_gses.side_effect = lambda accessions, fields: [GSE(gse=acc, title="fallback")
+                                                                          for acc in accessions]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_load_gses_from_index(self):
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        loader = IndexedGSELoader(self.fallback, self.index_path, self.geometadb_path)
+
+        gses = loader.load_gses(["GSE100", TEST_GSEs[0].gse], ["gse", "title"])
+
+        self.assertListEqual(gses, [GSE(gse="GSE100", title="fallback"),
+                                    GSE(gse=TEST_GSEs[0].gse, title=TEST_GSEs[0].title)])
+        self.fallback.load_gses.assert_called_once_with(["GSE100"], ["gse", "title"])
+        self.assertDictEqual(loader.stats(), {"entries": 11, "dirty": 0, "hits": 1, "misses": 1})
+
+    def test_load_gses_without_index(self):
+        loader = IndexedGSELoader(self.fallback, self.index_path, self.geometadb_path)
+
+        self.assertListEqual(loader.load_gses(["GSE116672"]), [GSE(gse="GSE116672", title="fallback")])
+
+    def test_dirty_series_are_loaded_by_fallback_until_rebuild(self):
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        loader = IndexedGSELoader(self.fallback, self.index_path, self.geometadb_path, reload_interval=0)
+
+        loader.invalidate(["GSE116672"])
+        self.assertEqual(loader.load_gses(["GSE116672"])[0].title, "fallback")
+
+        loader.rebuild()
+        self.assertEqual(loader.load_gses(["GSE116672"])[0].title, TEST_GSEs[0].title)
+        self.assertEqual(loader.stats()["dirty"], 0)
+
+    def test_index_rebuilt_by_another_process_is_loaded(self):
+        listener = Mock()
+        loader = IndexedGSELoader(self.fallback, self.index_path, self.geometadb_path, reload_interval=0,
+                                  reload_listeners=[listener])
+        loader.invalidate(["GSE116672"])
+
+        build_gse_record_index(self.geometadb_path, self.index_path)
+
+        self.assertEqual(loader.load_gses(["GSE116672"])[0].title, TEST_GSEs[0].title)
+        self.fallback.load_gses.assert_not_called()
+        listener.assert_called_once_with()
+
+    def test_reload_listeners_are_called_once_per_replaced_index(self):
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        listener = Mock()
+        loader = IndexedGSELoader(self.fallback, self.index_path, self.geometadb_path, reload_interval=0,
+                                  reload_listeners=[listener])
+
+        loader.load_gses(["GSE116672"])
+        listener.assert_not_called()
+
+        with sqlite3.connect(self.geometadb_path) as conn:
+            conn.execute("INSERT INTO gse (gse, title) VALUES ('GSE100', 'New series')")
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        loader.load_gses(["GSE100"])
+        loader.load_gses(["GSE100"])
+
+        listener.assert_called_once_with()
+
+    def test_rebuild_threshold(self):
+        build_gse_record_index(self.geometadb_path, self.index_path)
+        loader = IndexedGSELoader(self.fallback, self.index_path, self.geometadb_path, rebuild_threshold=2)
+        with sqlite3.connect(self.geometadb_path) as conn:
+            conn.execute("INSERT INTO gse (gse, title) VALUES ('GSE100', 'New series')")
+
+        loader.invalidate(["GSE100"])
+        self.assertIsNone(loader._rebuild_thread)
+        loader.invalidate(["GSE200"])
+        for thread in threading.enumerate():
+            if thread.name == "gse-index-rebuild":
+                thread.join()
+
+        self.assertIn("GSE100", loader.index)
@@ -0,0 +1,52 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.db.http_session import PooledHTTPSession
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"OK"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestPooledHTTPSession(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        self.session = PooledHTTPSession(pool_connections=2, pool_maxsize=4)
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connections_are_reused(self):
+        for _ in range(3):
+            self.assertEqual(self.session.get(self.url).text, "OK")
+
+        stats = self.session.connection_stats()[f"http://127.0.0.1:{self.server.server_port}"]
+        self.assertDictEqual(stats, {"requests": 3, "connections": 1, "reused": 2})
+
+    def test_session_is_shared_between_threads(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            responses = list(executor.map(lambda _: self.session.get(self.url).text, range(20)))
+
+        self.assertListEqual(responses, ["OK"] * 20)
+        stats = self.session.connection_stats()[f"http://127.0.0.1:{self.server.server_port}"]
+        self.assertEqual(stats["requests"], 20)
+        self.assertLessEqual(stats["connections"], 4)
+
+    def test_no_stats_before_first_request(self):
+        self.assertDictEqual(self.session.connection_stats(), {})
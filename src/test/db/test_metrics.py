@@ -0,0 +1,163 @@
+import math
+import unittest
+
+from parameterized import parameterized
+
+from src.db.gse import GSE
+from src.db.gse_loader import GSELoader, LOADED_GSES, LOADER_DURATION, LOADER_ERRORS
+from src.db.metrics import MetricsRegistry, _Metric
+from src.db.paper_dataset_linker import LINKED_GSES, LINKER_DURATION, LINKER_ERRORS, PaperDatasetLinker
+from src.exception.europepmc_error import EuropePMCError
+from src.exception.geo_error import GEOError
+
+
+class MetricsTestLinker(PaperDatasetLinker):
+    def link_to_datasets(self, pubmed_ids):
+        if "0" in pubmed_ids:
+            raise EuropePMCError("EuropePMC status 500")
+        return [f"GSE{pubmed_id}" for pubmed_id in pubmed_ids]
+
+
+class MetricsTestLoader(GSELoader):
+    def load_gses(self, gse_accessions, fields=None):
+        return [GSE(gse=accession) for accession in gse_accessions]
+
+
+class FailingMetricsTestLoader(GSELoader):
+    def load_gses(self, gse_accessions, fields=None):
+        return []
+
+    def iter_gses(self, gse_accessions, fields=None):
+        yield GSE(gse=gse_accessions[0])
+        raise GEOError("GSE2", GEOError.HTTP_ERROR)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    def test_render_counter_and_histogram(self):
+        registry = MetricsRegistry()
+        counter = registry.counter("requests_total", "Requests.", ["source"])
+        histogram = registry.histogram("duration_seconds", "Duration.", ["source"], buckets=(0.1, 1))
+        counter.inc(source='a"b')
+        counter.inc(2, source='a"b')
+        histogram.observe(0.05, source="x")
+        histogram.observe(0.5, source="x")
+        histogram.observe(5, source="x")
+
+        self.assertEqual(registry.render(), "\n".join([
+            "# HELP requests_total Requests.",
+            "# TYPE requests_total counter",
+            'requests_total{source="a\\"b"} 3',
+            "# HELP duration_seconds Duration.",
+            "# TYPE duration_seconds histogram",
+            'duration_seconds_bucket{source="x",le="0.1"} 1',
+            'duration_seconds_bucket{source="x",le="1"} 2',
+            'duration_seconds_bucket{source="x",le="+Inf"} 3',
+            'duration_seconds_sum{source="x"} 5.55',
+            'duration_seconds_count{source="x"} 3',
+        ]) + "\n")
+
+    def test_render_callbacks(self):
+        registry = MetricsRegistry()
+        registry.callback("hit_ratio", "Hit ratio.", "gauge", ["cache"],
+                          lambda: {("gse",): 0.25, ("elink",): math.nan})
+        registry.callback("broken", "Broken.", "gauge", [], lambda: 1 / 0)
+
+        self.assertIn('hit_ratio{cache="gse"} 0.25\nhit_ratio{cache="elink"} NaN\n', registry.render())
+        self.assertTrue(registry.render().endswith("# TYPE broken gauge\n"))
+
+    @parameterized.expand([
+        ({},),
+        ({"source": "a", "other": "b"},),
+    ])
+    def test_wrong_labels(self, labels):
+        counter = MetricsRegistry().counter("requests_total", "Requests.", ["source"])
+        with self.assertRaises(ValueError):
+            counter.inc(**labels)
+
+    def test_metric_without_samples_is_abstract(self):
+        class IncompleteMetric(_Metric):
+            TYPE = "gauge"
+
+        with self.assertRaises(TypeError):
+            IncompleteMetric("incomplete", "Incomplete.")
+
+    def test_duplicate_name(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests.")
+        with self.assertRaises(ValueError):
+            registry.histogram("requests_total", "Requests.")
+
+
+class TestInstrumentation(unittest.TestCase):
+    LINKER_LABELS = {"linker": "MetricsTestLinker", "source": "MetricsTestLinker"}
+    LOADER_LABELS = {"loader": "MetricsTestLoader"}
+
+    def test_linker_records_calls_once(self):
+        linker = MetricsTestLinker()
+        calls = LINKER_DURATION.count(method="link_to_datasets", **self.LINKER_LABELS)
+        by_paper_calls = LINKER_DURATION.count(method="link_to_datasets_by_paper", **self.LINKER_LABELS)
+        linked = LINKED_GSES.value(**self.LINKER_LABELS)
+
+        linker.link_to_datasets(["1", "2"])
+        # The default implementation calls link_to_datasets for each paper, which isn't recorded again
+        linker.link_to_datasets_by_paper(["3", "4", "5"])
+
+        self.assertEqual(LINKER_DURATION.count(method="link_to_datasets", **self.LINKER_LABELS), calls + 1)
+        self.assertEqual(LINKER_DURATION.count(method="link_to_datasets_by_paper", **self.LINKER_LABELS),
+                         by_paper_calls + 1)
+        self.assertEqual(LINKED_GSES.value(**self.LINKER_LABELS), linked + 5)
+
+    def test_linker_counts_errors_by_type(self):
+        errors = LINKER_ERRORS.value(exception="EuropePMCError", **self.LINKER_LABELS)
+
+        with self.assertRaises(EuropePMCError):
+            MetricsTestLinker().link_to_datasets(["0"])
+
+        self.assertEqual(LINKER_ERRORS.value(exception="EuropePMCError", **self.LINKER_LABELS), errors + 1)
+
+    def test_loader_records_iterator_once(self):
+        loader = MetricsTestLoader()
+        calls = LOADER_DURATION.count(method="iter_gses", **self.LOADER_LABELS)
+        load_calls = LOADER_DURATION.count(method="load_gses", **self.LOADER_LABELS)
+        loaded = LOADED_GSES.value(**self.LOADER_LABELS)
+
+        self.assertEqual([gse.gse for gse in loader.iter_gses(["GSE1", "GSE2"])], ["GSE1", "GSE2"])
+
+        self.assertEqual(LOADER_DURATION.count(method="iter_gses", **self.LOADER_LABELS), calls + 1)
+        self.assertEqual(LOADER_DURATION.count(method="load_gses", **self.LOADER_LABELS), load_calls)
+        self.assertEqual(LOADED_GSES.value(**self.LOADER_LABELS), loaded + 2)
+
+    def test_loader_counts_iterator_errors(self):
+        labels = {"loader": "FailingMetricsTestLoader"}
+        errors = LOADER_ERRORS.value(exception="GEOError", **labels)
+        loaded = LOADED_GSES.value(**labels)
+
+        with self.assertRaises(GEOError):
+            list(FailingMetricsTestLoader().iter_gses(["GSE1", "GSE2"]))
+
+        self.assertEqual(LOADER_ERRORS.value(exception="GEOError", **labels), errors + 1)
+        self.assertEqual(LOADED_GSES.value(**labels), loaded + 1)
+
+    def test_abandoned_iterator_is_closed(self):
+        closed = []
+
+        class ClosingLoader(GSELoader):
+            def load_gses(self, gse_accessions, fields=None):
+                return []
+
+            def iter_gses(self, gse_accessions, fields=None):
+                try:
+                    yield from (GSE(gse=accession) for accession in gse_accessions)
+                finally:
+                    closed.append(True)
+
+        iterator = ClosingLoader().iter_gses(["GSE1", "GSE2"])
+        next(iterator)
+        iterator.close()
+
+        self.assertListEqual(closed, [True])
+        self.assertEqual(LOADED_GSES.value(loader="ClosingLoader"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
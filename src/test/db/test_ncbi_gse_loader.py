@@ -1,3 +1,5 @@
+import sqlite3
+import time
 import unittest
 from typing import List
 from unittest.mock import Mock, patch
@@ -8,6 +10,7 @@ from parameterized import parameterized
 from src.config.config import Config
 from src.db.gse import GSE
 from src.db.ncbi_gse_loader import NCBIGSELoader
+from src.db.rate_limiter import TokenBucketRateLimiter
 from src.exception.geo_error import GEOError
 from src.test.helpers.http import create_mock_response
 
@@ -40,7 +43,10 @@ class TestNCBIGSELoader(unittest.TestCase):
         executemany_mock.side_effect = None
         executemany_mock.return_value = None
 
-        self.mock_session.get.side_effect = [self._make_ok_response(accession) for accession in gse_accessions]
+        responses = {NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format(accession): self._make_ok_response(accession)
+                     for accession in gse_accessions}
+        # Downloads run in parallel, so the responses are matched by URL rather than by call order
+        self.mock_session.get.side_effect = lambda url, **kwargs: responses[url]
 
         gses: List[GSE] = self.loader.load_gses(gse_accessions)
         gse_ids = [g.gse for g in gses]
@@ -51,6 +57,59 @@ class TestNCBIGSELoader(unittest.TestCase):
         sql_args, kwargs = executemany_mock.call_args
         self.assertEqual(len(sql_args[1]), len(gse_accessions))
 
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_load_gses_projects_fields_but_saves_complete_series(self, mock_sql):
+        executemany_mock = mock_sql.return_value.__enter__.return_value.cursor.return_value.executemany
+        self.mock_session.get.return_value = self._make_ok_response("GSE100")
+
+        gses = self.loader.load_gses(["GSE100"], ["gse", "pubmed_id"])
+
+        self.assertListEqual(gses, [GSE(gse="GSE100", pubmed_id=12345)])
+        saved_row = executemany_mock.call_args[0][1][0]
+        self.assertIn("Title", saved_row)
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_save_gses_notifies_listeners(self, mock_sql):
+        listener = Mock()
+        loader = NCBIGSELoader(self.mock_session, Config(test=True), save_listeners=[listener])
+
+        loader.save_gses([GSE(gse="GSE100"), GSE(gse="GSE200")])
+
+        listener.assert_called_once_with(["GSE100", "GSE200"])
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_write_behind_saves_in_background(self, mock_sql):
+        executemany_mock = mock_sql.return_value.__enter__.return_value.cursor.return_value.executemany
+        listener = Mock()
+        loader = NCBIGSELoader(self.mock_session, Config(test=True), save_listeners=[listener], write_behind=True)
+
+        loader.save_gses([GSE(gse="GSE100")])
+        loader.save_gses([GSE(gse="GSE200")])
+        loader.close()
+
+        # Both saves are batched into one transaction, since the flush interval hasn't passed
+        executemany_mock.assert_called_once()
+        self.assertListEqual([row[2] for row in executemany_mock.call_args.args[1]], ["GSE100", "GSE200"])
+        listener.assert_called_once_with(["GSE100", "GSE200"])
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_failed_save_does_not_notify_listeners(self, mock_sql):
+        mock_sql.side_effect = sqlite3.OperationalError("database is locked")
+        listener = Mock()
+        loader = NCBIGSELoader(self.mock_session, Config(test=True), save_listeners=[listener])
+
+        with self.assertRaises(sqlite3.OperationalError):
+            loader.save_gses([GSE(gse="GSE100")])
+
+        listener.assert_not_called()
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_failed_save_does_not_fail_load(self, mock_sql):
+        mock_sql.side_effect = sqlite3.OperationalError("database is locked")
+        self.mock_session.get.return_value = self._make_ok_response("GSE100")
+
+        self.assertListEqual([gse.gse for gse in self.loader.load_gses(["GSE100"])], ["GSE100"])
+
     def test_load_gses_http_error(self):
         self.mock_session.get.return_value = self._make_error_response()
 
@@ -68,3 +127,132 @@ class TestNCBIGSELoader(unittest.TestCase):
             self.loader.load_gses(["GSE99999"])
 
         self.mock_session.get.assert_called_once()
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_load_gses_respects_rate_limit(self, mock_sql):
+        loader = NCBIGSELoader(self.mock_session, Config(test=True), TokenBucketRateLimiter(rate=20))
+        self.mock_session.get.side_effect = lambda url, **kwargs: self._make_ok_response("GSE100")
+
+        start = time.perf_counter()
+        loader.load_gses(["GSE100"] * 5)
+        elapsed = time.perf_counter() - start
+
+        # The first request is sent immediately, the other four are spaced 50 ms apart
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertEqual(self.mock_session.get.call_count, 5)
+
+    @patch("src.db.ncbi_gse_loader.time.sleep")
+    def test_download_retries_when_rate_limited(self, mock_sleep):
+        rate_limited_response = create_mock_response("", 429)
+        rate_limited_response.headers = {"Retry-After": "2"}
+        self.mock_session.get.side_effect = [rate_limited_response, self._make_ok_response("GSE100")]
+
+        gse = self.loader.download_geo_dataset("GSE100")
+
+        self.assertEqual(gse.gse, "GSE100")
+        self.assertEqual(self.mock_session.get.call_count, 2)
+        mock_sleep.assert_any_call(2)
+
+    @patch("src.db.ncbi_gse_loader.time.sleep")
+    def test_download_gives_up_when_rate_limited(self, mock_sleep):
+        rate_limited_response = create_mock_response("", 429)
+        rate_limited_response.headers = {}
+        self.mock_session.get.return_value = rate_limited_response
+
+        with self.assertRaises(GEOError):
+            self.loader.download_geo_dataset("GSE100")
+
+        self.assertEqual(self.mock_session.get.call_count, NCBIGSELoader.MAX_RATE_LIMIT_RETRIES + 1)
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_iter_gses_yields_downloads_as_they_complete(self, mock_sql):
+        loader = NCBIGSELoader(self.mock_session, Config(test=True), TokenBucketRateLimiter(rate=1000))
+        executemany_mock = mock_sql.return_value.__enter__.return_value.cursor.return_value.executemany
+
+        def get(url, **kwargs):
+            if "GSE100" in url:
+                time.sleep(0.1)
+                return self._make_ok_response("GSE100")
+            return self._make_ok_response("GSE200")
+        self.mock_session.get.side_effect = get
+
+        gses = list(loader.iter_gses(["GSE100", "GSE200"]))
+
+        self.assertListEqual([gse.gse for gse in gses], ["GSE200", "GSE100"])
+        executemany_mock.assert_called_once()
+        self.assertEqual(len(executemany_mock.call_args[0][1]), 2)
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_iter_gses_saves_completed_downloads_on_failure(self, mock_sql):
+        executemany_mock = mock_sql.return_value.__enter__.return_value.cursor.return_value.executemany
+        responses = {NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format("GSE100"): self._make_ok_response("GSE100"),
+                     NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format("GSE200"): self._make_error_response()}
+
+        def get(url, **kwargs):
+            if "GSE200" in url:
+                # Fail after the other download has completed
+                time.sleep(0.1)
+            return responses[url]
+        self.mock_session.get.side_effect = get
+
+        gses = self.loader.iter_gses(["GSE100", "GSE200"])
+        self.assertEqual(next(gses).gse, "GSE100")
+        with self.assertRaises(GEOError):
+            next(gses)
+
+        executemany_mock.assert_called_once()
+        self.assertEqual(executemany_mock.call_args[0][1][0][2], "GSE100")
+
+    @patch("src.db.ncbi_gse_loader.sqlite3.connect")
+    def test_failures_are_recorded_and_skipped_with_negative_cache(self, mock_sql):
+        negative_cache = Mock()
+        negative_cache.find.return_value = {"GSE300": GEOError.NOT_FOUND}
+        negative_cache.is_cached.side_effect = lambda reason: reason is not None
+        loader = NCBIGSELoader(self.mock_session, Config(test=True), TokenBucketRateLimiter(rate=1000),
+                               negative_cache=negative_cache)
+        responses = {NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format("GSE100"): self._make_ok_response("GSE100"),
+                     NCBIGSELoader.DOWNLOAD_URL_TEMPLATE.format("GSE200"): create_mock_response("", 200)}
+        self.mock_session.get.side_effect = lambda url, **kwargs: responses[url]
+
+        gses = loader.load_gses(["GSE100", "GSE200", "GSE300"])
+
+        self.assertListEqual([gse.gse for gse in gses], ["GSE100"])
+        self.assertEqual(self.mock_session.get.call_count, 2)
+        negative_cache.record.assert_called_once_with("GSE200", GEOError.EMPTY_RECORD)
+
+    @parameterized.expand([
+        (404, GEOError.NOT_FOUND),
+        (500, GEOError.HTTP_ERROR),
+        (429, None),
+    ])
+    @patch("src.db.ncbi_gse_loader.time.sleep")
+    def test_download_error_reasons(self, status_code, reason, mock_sleep):
+        response = create_mock_response("", status_code)
+        response.headers = {}
+        self.mock_session.get.return_value = response
+
+        with self.assertRaises(GEOError) as context:
+            self.loader.download_geo_dataset("GSE100")
+        self.assertEqual(context.exception.reason, reason)
+
+    def test_download_formats_header_as_in_geometadb(self):
+        self.mock_session.get.return_value = create_mock_response("\n".join([
+            "^SERIES = GSE100", "!Series_geo_accession = GSE100", "!Series_submission_date = Jul 05 2018",
+            "!Series_last_update_date = not a date", "!Series_contributor = Fabio,,Zanini",
+            "!Series_contributor = Makeda,L,Robinson", "!Series_contact_name = Fabio,,Zanini",
+            "!Series_contact_country = Australia"]), 200)
+
+        gse = self.loader.download_geo_dataset("GSE100")
+
+        self.assertEqual(gse.submission_date, "2018-07-05")
+        self.assertEqual(gse.last_update_date, "not a date")
+        self.assertEqual(gse.contributor, "Fabio,,Zanini;\tMakeda,L,Robinson")
+        self.assertEqual(gse.contact, "Name: Fabio,,Zanini;\tCountry: Australia")
+        self.mock_session.get.return_value.close.assert_called_once()
+
+    def test_empty_record_raises_without_negative_cache(self):
+        self.mock_session.get.return_value = create_mock_response("", 200)
+
+        with self.assertRaises(GEOError) as context:
+            self.loader.load_gses(["GSE100"])
+        self.assertEqual(context.exception.reason, GEOError.EMPTY_RECORD)
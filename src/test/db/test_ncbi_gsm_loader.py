@@ -0,0 +1,100 @@
+import unittest
+from unittest.mock import Mock
+
+import requests
+
+from src.config.config import Config
+from src.db.ncbi_gsm_loader import NCBIGSMLoader
+from src.exception.geo_error import GEOError
+from src.test.helpers.http import create_mock_response
+
+SOFT_SAMPLES = "\n".join([
+    "^SAMPLE = GSM200",
+    "!Sample_title = Second",
+    "!Sample_geo_accession = GSM200",
+    "!Sample_submission_date = Jul 05 2018",
+    "!Sample_series_id = GSE100",
+    "!Sample_series_id = GSE101",
+    "!Sample_platform_id = GPL1",
+    "!Sample_characteristics_ch1 = tissue: blood",
+    "!Sample_characteristics_ch1 = Sex: M",
+    "!Sample_contact_name = Fabio,,Zanini",
+    "!Sample_supplementary_file_1 = ftp://example.org/GSM200.txt.gz",
+    "!Sample_supplementary_file_2 = NONE",
+    "!Sample_data_row_count = 0",
+    "!Sample_channel_count = 1",
+    "!sample_table_begin",
+    "ID_REF\tVALUE",
+    "!Sample_title = Not an attribute",
+    "!sample_table_end",
+    "^SAMPLE = GSM100",
+    "!Sample_title = First",
+    "!Sample_geo_accession = GSM100",
+    "!Sample_series_id = GSE100",
+])
+
+
+class TestNCBIGSMLoader(unittest.TestCase):
+    def setUp(self):
+        self.mock_session = Mock()
+        self.loader = NCBIGSMLoader(self.mock_session, Config(test=True))
+
+    def test_iter_gsms(self):
+        self.mock_session.get.return_value = create_mock_response(SOFT_SAMPLES, 200)
+
+        gsms = list(self.loader.iter_gsms("GSE100"))
+
+        self.assertListEqual([gsm.gsm for gsm in gsms], ["GSM100", "GSM200"])
+        second = gsms[1]
+        self.assertEqual(second.title, "Second")
+        self.assertEqual(second.series_id, "GSE100,GSE101")
+        self.assertEqual(second.gpl, "GPL1")
+        self.assertEqual(second.submission_date, "2018-07-05")
+        self.assertEqual(second.characteristics_ch1, "tissue: blood;\tSex: M")
+        self.assertEqual(second.contact, "Name: Fabio,,Zanini")
+        self.assertEqual(second.supplementary_file, "ftp://example.org/GSM200.txt.gz")
+        self.assertEqual(second.channel_count, 1.0)
+        self.mock_session.get.assert_called_once()
+        self.assertEqual(self.mock_session.get.call_args[0][0], NCBIGSMLoader.DOWNLOAD_URL_TEMPLATE.format("GSE100"))
+
+    def test_iter_gsms_page(self):
+        self.mock_session.get.return_value = create_mock_response(SOFT_SAMPLES, 200)
+        self.assertListEqual([gsm.gsm for gsm in self.loader.iter_gsms("GSE100", "GSM100", 1)], ["GSM200"])
+
+    def test_pages_are_served_from_downloaded_series(self):
+        self.mock_session.get.return_value = create_mock_response(SOFT_SAMPLES, 200)
+
+        self.assertListEqual([gsm.gsm for gsm in self.loader.iter_gsms("GSE100", None, 1)], ["GSM100"])
+        self.assertListEqual([gsm.gsm for gsm in self.loader.iter_gsms("GSE100", "GSM100", 1)], ["GSM200"])
+        self.assertListEqual(list(self.loader.iter_gsms("GSE100", "GSM200", 1)), [])
+        self.mock_session.get.assert_called_once()
+
+    def test_expired_series_are_downloaded_again(self):
+        self.mock_session.get.side_effect = lambda *args, **kwargs: create_mock_response(SOFT_SAMPLES, 200)
+        self.loader.cache_ttl = 0
+
+        list(self.loader.iter_gsms("GSE100", None, 1))
+        list(self.loader.iter_gsms("GSE100", "GSM100", 1))
+
+        self.assertEqual(self.mock_session.get.call_count, 2)
+
+    def test_least_recently_paged_series_are_evicted(self):
+        self.mock_session.get.side_effect = lambda *args, **kwargs: create_mock_response(SOFT_SAMPLES, 200)
+        self.loader.cache_max_series = 1
+
+        list(self.loader.iter_gsms("GSE100"))
+        list(self.loader.iter_gsms("GSE101"))
+        list(self.loader.iter_gsms("GSE100"))
+
+        self.assertEqual(self.mock_session.get.call_count, 3)
+
+    def test_iter_gsms_not_found(self):
+        self.mock_session.get.return_value = create_mock_response("", 404)
+
+        with self.assertRaises(GEOError) as context:
+            list(self.loader.iter_gsms("GSE100"))
+        self.assertEqual(context.exception.reason, GEOError.NOT_FOUND)
+
+    def test_iter_gsms_network_failure(self):
+        self.mock_session.get.side_effect = requests.ConnectionError()
+        self.assertRaises(GEOError, list, self.loader.iter_gsms("GSE100"))
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from src.db.rate_limiter import TokenBucketRateLimiter
+
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    def test_burst_is_not_delayed(self):
+        limiter = TokenBucketRateLimiter(rate=1, burst=3)
+        waits = [limiter.acquire() for _ in range(3)]
+        self.assertListEqual(waits, [0.0, 0.0, 0.0])
+
+    def test_requests_are_spaced_by_rate(self):
+        limiter = TokenBucketRateLimiter(rate=20)
+        start = time.perf_counter()
+        for _ in range(5):
+            limiter.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+    def test_concurrent_callers_share_the_rate(self):
+        limiter = TokenBucketRateLimiter(rate=20)
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(6)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.25)
+
+    def test_coroutines_and_threads_share_the_rate(self):
+        limiter = TokenBucketRateLimiter(rate=20)
+
+        async def acquire_concurrently():
+            await asyncio.gather(*(limiter.acquire_async() for _ in range(3)))
+
+        thread = threading.Thread(target=lambda: [limiter.acquire() for _ in range(3)])
+        start = time.perf_counter()
+        thread.start()
+        asyncio.run(acquire_concurrently())
+        thread.join()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.25)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, TokenBucketRateLimiter, 0)
+        self.assertRaises(ValueError, TokenBucketRateLimiter, 1, 0)
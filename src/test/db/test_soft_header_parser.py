@@ -0,0 +1,47 @@
+import unittest
+
+from src.db.soft_header_parser import iter_soft_entities, parse_series_header
+
+
+class TestSoftHeaderParser(unittest.TestCase):
+    def test_parse_series_header(self):
+        lines = ["^SERIES = GSE100",
+                 "!Series_title = Title = with equals sign",
+                 "!Series_contributor = Fabio,,Zanini",
+                 "!Series_contributor = Makeda,L,Robinson",
+                 "!Series_contact_name = Fabio,,Zanini",
+                 "!Series_summary = "]
+
+        self.assertDictEqual(parse_series_header(lines), {
+            "title": ["Title = with equals sign"],
+            "contributor": ["Fabio,,Zanini", "Makeda,L,Robinson"],
+            "contact_name": ["Fabio,,Zanini"],
+            "summary": [""],
+        })
+
+    def test_stops_at_the_end_of_the_header(self):
+        def lines():
+            yield "^SERIES = GSE100"
+            yield "!Series_title = Title"
+            yield "^SAMPLE = GSM100"
+            raise AssertionError("The lines after the header must not be read")
+
+        self.assertDictEqual(parse_series_header(lines()), {"title": ["Title"]})
+
+    def test_stops_at_table(self):
+        lines = ["^SERIES = GSE100", "!Series_title = Title", "!series_table_begin", "ID_REF\tVALUE",
+                 "!Series_title = Not a header line"]
+
+        self.assertDictEqual(parse_series_header(lines), {"title": ["Title"]})
+
+    def test_empty_stream(self):
+        self.assertDictEqual(parse_series_header([]), {})
+
+    def test_iter_soft_entities(self):
+        lines = ["^SERIES = GSE100", "!Series_title = Series", "^SAMPLE = GSM100", "!Sample_title = Sample",
+                 "!sample_table_begin", "ID_REF\tVALUE", "!sample_table_end", "!Sample_type = SRA"]
+
+        self.assertListEqual(list(iter_soft_entities(lines)), [
+            ("SERIES", "GSE100", {"title": ["Series"]}),
+            ("SAMPLE", "GSM100", {"title": ["Sample"], "type": ["SRA"]}),
+        ])
@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.config.config import Config
+from src.db.sqlite_connections import ReadOnlySQLiteConnections
+
+
+class TestReadOnlySQLiteConnections(unittest.TestCase):
+    def setUp(self):
+        self.connections = ReadOnlySQLiteConnections(Config(test=True).geometadb_path,
+                                                     mmap_size=1024 * 1024, cache_size=-1024)
+
+    def tearDown(self):
+        self.connections.close()
+
+    def _connection_in_new_thread(self) -> sqlite3.Connection:
+        result = []
+
+        def read():
+            with self.connections.reader() as conn:
+                result.append(conn)
+
+        thread = threading.Thread(target=read)
+        thread.start()
+        thread.join()
+        return result[0]
+
+    def test_nested_readers_share_connection(self):
+        with self.connections.reader() as first, self.connections.reader() as second:
+            self.assertIs(first, second)
+
+    def test_concurrent_readers_get_separate_connections(self):
+        with self.connections.reader() as conn:
+            self.assertIsNot(conn, self._connection_in_new_thread())
+
+    def test_returned_connections_are_reused_by_other_threads(self):
+        conn = self._connection_in_new_thread()
+
+        self.assertIs(self._connection_in_new_thread(), conn)
+        with self.connections.reader() as reused:
+            self.assertIs(reused, conn)
+            self.assertEqual(reused.execute("SELECT 1").fetchone()[0], 1)
+
+    def test_readers_wait_for_a_connection(self):
+        connections = ReadOnlySQLiteConnections(Config(test=True).geometadb_path, max_connections=1)
+        self.addCleanup(connections.close)
+        checked_out = threading.Event()
+        release = threading.Event()
+        result = []
+
+        def hold():
+            with connections.reader() as conn:
+                result.append(conn)
+                checked_out.set()
+                release.wait(5)
+
+        def read():
+            with connections.reader() as conn:
+                result.append(conn)
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        checked_out.wait(5)
+        reader = threading.Thread(target=read)
+        reader.start()
+        reader.join(0.1)
+        # The only connection is checked out, so the reader waits until it is returned
+        self.assertTrue(reader.is_alive())
+        release.set()
+        holder.join(5)
+        reader.join(5)
+
+        self.assertEqual(len(result), 2)
+        self.assertIs(result[0], result[1])
+
+    def test_connection_is_read_only(self):
+        with self.connections.reader() as conn:
+            self.assertGreater(conn.execute("SELECT count(*) FROM gse").fetchone()[0], 0)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM gse")
+
+    def test_pragmas_are_applied(self):
+        with self.connections.reader() as conn:
+            self.assertEqual(conn.execute("PRAGMA query_only").fetchone()[0], 1)
+            self.assertEqual(conn.execute("PRAGMA cache_size").fetchone()[0], -1024)
+
+    def test_close(self):
+        with self.connections.reader() as conn:
+            pass
+        self.connections.close()
+
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+        with self.connections.reader() as reopened:
+            self.assertEqual(reopened.execute("SELECT 1").fetchone()[0], 1)
+
+    def test_forked_process_opens_new_connections(self):
+        with self.connections.reader() as conn:
+            pass
+        with patch("src.db.sqlite_connections.os.getpid", return_value=-1):
+            with self.connections.reader() as child_conn:
+                self.assertIsNot(conn, child_conn)
+        # Inherited connections are left open for the parent process
+        self.assertEqual(conn.execute("SELECT 1").fetchone()[0], 1)
+
+
+class TestReadOnlySQLiteConnectionsSwap(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.link_path = os.path.join(self.temp_dir.name, "geometadb.sqlite")
+        self.versions = []
+        for title in ("first", "second"):
+            path = os.path.join(self.temp_dir.name, f"geometadb-{title}.sqlite")
+            with sqlite3.connect(path) as conn:
+                conn.execute("CREATE TABLE gse (gse TEXT, title TEXT)")
+                conn.execute("INSERT INTO gse VALUES ('GSE1', ?)", (title,))
+            conn.close()
+            self.versions.append(path)
+        os.symlink(self.versions[0], self.link_path)
+        self.connections = ReadOnlySQLiteConnections(self.link_path, swap_check_interval=0)
+
+    def tearDown(self):
+        self.connections.close()
+        self.temp_dir.cleanup()
+
+    def _switch_to(self, path):
+        os.symlink(path, self.link_path + ".new")
+        os.replace(self.link_path + ".new", self.link_path)
+
+    @staticmethod
+    def _title(conn):
+        return conn.execute("SELECT title FROM gse").fetchone()[0]
+
+    def test_readers_switch_to_new_version(self):
+        with self.connections.reader() as conn:
+            self.assertEqual(self._title(conn), "first")
+        self._switch_to(self.versions[1])
+
+        with self.connections.reader() as new_conn:
+            self.assertEqual(self._title(new_conn), "second")
+        self.assertEqual(self.connections.current_path, os.path.realpath(self.versions[1]))
+        # The old version had no readers, so its connection was closed right away
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+    def test_running_readers_finish_on_old_version(self):
+        with self.connections.reader() as old_conn:
+            self._switch_to(self.versions[1])
+            # The old file may even be deleted while it is read
+            os.unlink(self.versions[0])
+            with self.connections.reader() as new_conn:
+                self.assertEqual(self._title(new_conn), "second")
+            self.assertEqual(self._title(old_conn), "first")
+        # The old version is closed once its last reader is done
+        with self.assertRaises(sqlite3.ProgrammingError):
+            old_conn.execute("SELECT 1")
@@ -0,0 +1,69 @@
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from src.db.write_behind_queue import WriteBehindQueue
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+        self.queue = WriteBehindQueue(self.batches.append, max_batch_size=3, flush_interval=60)
+
+    def tearDown(self):
+        self.queue.close()
+
+    def test_items_are_written_in_batches(self):
+        self.queue.put([1, 2])
+        self.queue.put([3, 4])
+        self.queue.flush()
+
+        self.assertListEqual(self.batches, [[1, 2, 3], [4]])
+        stats = self.queue.stats()
+        self.assertEqual(stats["depth"], 0)
+        self.assertEqual(stats["flushes"], 2)
+        self.assertEqual(stats["items_written"], 4)
+
+    def test_batch_is_written_after_flush_interval(self):
+        queue = WriteBehindQueue(self.batches.append, max_batch_size=100, flush_interval=0.05)
+        queue.put([1])
+        time.sleep(0.3)
+
+        self.assertListEqual(self.batches, [[1]])
+        queue.close()
+
+    def test_put_does_not_wait_for_the_write(self):
+        release = threading.Event()
+        queue = WriteBehindQueue(lambda batch: release.wait(), max_batch_size=1, flush_interval=0)
+
+        start = time.perf_counter()
+        queue.put([1])
+        queue.put([2])
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertFalse(queue.flush(timeout=0.05))
+        self.assertGreaterEqual(queue.stats()["depth"], 1)
+
+        release.set()
+        self.assertTrue(queue.flush(timeout=1))
+        queue.close()
+
+    def test_close_writes_queued_items(self):
+        self.queue.put([1])
+        self.queue.close()
+
+        self.assertListEqual(self.batches, [[1]])
+        # Items queued after closing are written inline
+        self.queue.put([2])
+        self.assertListEqual(self.batches, [[1], [2]])
+
+    def test_failed_writes_are_dropped(self):
+        write = Mock(side_effect=[RuntimeError("database is locked"), None])
+        queue = WriteBehindQueue(write, max_batch_size=1, flush_interval=0)
+
+        queue.put([1, 2])
+        queue.flush()
+
+        self.assertEqual(write.call_count, 2)
+        self.assertEqual(queue.stats()["depth"], 0)
+        queue.close()
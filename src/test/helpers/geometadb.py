@@ -0,0 +1,13 @@
+import shutil
+
+from src.config.config import Config
+
+
+def create_test_geometadb(path: str) -> None:
+    """
+    Creates a copy of the test GEOmetadb sample at the given path, for tests
+    that modify the database.
+
+    :param path: Path of the SQLite database to create.
+    """
+    shutil.copyfile(Config(test=True).geometadb_path, path)